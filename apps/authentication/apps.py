@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.authentication'
-    verbose_name = 'Аутентификация и авторизация'
\ No newline at end of file
+    verbose_name = 'Аутентификация и авторизация'
+
+    def ready(self):
+        from apps.authentication import signals  # noqa: F401
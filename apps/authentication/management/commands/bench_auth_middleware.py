@@ -0,0 +1,88 @@
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDbSessionStore
+from django.contrib.sessions.backends.db import SessionStore as DbSessionStore
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_otp import DEVICE_ID_SESSION_KEY
+from django_otp.middleware import OTPMiddleware
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from apps.authentication.middleware import CachedAuthenticationMiddleware, CachedOTPMiddleware
+from apps.authentication.models import UserProfile
+
+
+User = get_user_model()
+
+
+def view(request):
+    """Обращается к тем же данным пользователя, что и типичная страница портала"""
+    user = request.user
+    user.is_verified()
+    getattr(user, 'profile', None)
+    return HttpResponse(user.role)
+
+
+def build_chain(session_engine, authentication, otp):
+    with override_settings(SESSION_ENGINE=session_engine):
+        return SessionMiddleware(authentication(otp(view)))
+
+
+class Command(BaseCommand):
+    help = 'Измеряет накладные расходы цепочки сессия → пользователь → OTP на запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Запросов на вариант')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=f'bench-{uuid.uuid4().hex[:8]}', password=uuid.uuid4().hex, role='chairman')
+        try:
+            UserProfile.objects.create(user=user, two_factor_enabled=True)
+            device = TOTPDevice.objects.create(user=user, name='bench', confirmed=True)
+            variants = [
+                ('База данных', 'django.contrib.sessions.backends.db', DbSessionStore,
+                 AuthenticationMiddleware, OTPMiddleware),
+                ('Кэш', 'django.contrib.sessions.backends.cached_db', CachedDbSessionStore,
+                 CachedAuthenticationMiddleware, CachedOTPMiddleware),
+            ]
+            for label, engine, store_class, authentication, otp in variants:
+                session = store_class()
+                session.update({
+                    SESSION_KEY: str(user.pk),
+                    BACKEND_SESSION_KEY: 'django.contrib.auth.backends.ModelBackend',
+                    HASH_SESSION_KEY: user.get_session_auth_hash(),
+                    DEVICE_ID_SESSION_KEY: device.persistent_id,
+                })
+                session.create()
+                self.measure(label, build_chain(engine, authentication, otp), session.session_key, options['requests'])
+                session.delete()
+        finally:
+            user.delete()
+
+    def measure(self, label, chain, session_key, count):
+        factory = RequestFactory()
+        # Первый запрос заполняет кэш
+        chain(factory.get('/', HTTP_COOKIE=f'{settings.SESSION_COOKIE_NAME}={session_key}'))
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(count):
+                request = factory.get('/', HTTP_COOKIE=f'{settings.SESSION_COOKIE_NAME}={session_key}')
+                began = time.perf_counter()
+                response = chain(request)
+                timings.append((time.perf_counter() - began) * 1_000_000)
+                if response.content != b'chairman':
+                    raise RuntimeError('Пользователь не аутентифицирован')
+        self.stdout.write(
+            f'{label}: медиана {statistics.median(timings):.0f} мкс, '
+            f'95-й процентиль {statistics.quantiles(timings, n=20)[-1]:.0f} мкс, '
+            f'{len(queries) / count:.1f} запросов к БД на запрос'
+        )
@@ -0,0 +1,24 @@
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+from django_otp.middleware import OTPMiddleware
+
+from apps.authentication.snapshots import get_cached_device, get_cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware, берущий пользователя со снимком профиля из кэша
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+class CachedOTPMiddleware(OTPMiddleware):
+    """
+    OTPMiddleware, запоминающий устройство, которым подтвержден вход, в кэше
+    """
+
+    def _device_from_persistent_id(self, persistent_id):
+        return get_cached_device(persistent_id, super()._device_from_persistent_id)
@@ -0,0 +1,119 @@
+"""
+Область видимости пользователя.
+
+Область - организации и подразделения, доступные пользователю: его
+организация со всеми подчиненными (по таблице замыкания
+apps.members.hierarchy) и их подразделения. Администратор видит все.
+
+Область вычисляется один раз и кэшируется в общем кэше. Ключ содержит роль
+и организацию пользователя, поэтому смена роли или организации сразу дает
+новый ключ, и версию структуры, которую увеличивает любое изменение
+организаций и подразделений (apps.authentication.signals). В пределах
+запроса область запоминается на объекте пользователя.
+"""
+import time
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from apps.members.hierarchy import organization_tree
+from apps.members.models import Department
+
+
+FULL_ACCESS_ROLES = ('admin',)
+SCOPE_TTL = 60 * 60
+TREE_VERSION_KEY = 'auth:scope:tree_version'
+
+
+@dataclass(frozen=True)
+class UserScope:
+    unrestricted: bool = False
+    organization_ids: frozenset = frozenset()
+    department_ids: frozenset = frozenset()
+
+    def can_see_organization(self, organization_id):
+        return self.unrestricted or organization_id in self.organization_ids
+
+    def can_see_department(self, department_id):
+        return self.unrestricted or department_id in self.department_ids
+
+    def filter(self, queryset, organization_field=None, department_field=None):
+        """
+        Ограничивает queryset областью: по пути к подразделению
+        (department_field) или, если он не указан, к организации
+        """
+        if self.unrestricted:
+            return queryset
+        if department_field:
+            return queryset.filter(**{f'{department_field}__in': self.department_ids})
+        return queryset.filter(**{f'{organization_field or "organization"}__in': self.organization_ids})
+
+
+def get_tree_version():
+    version = cache.get(TREE_VERSION_KEY)
+    if version is None:
+        # Версия от текущего времени не совпадет с версией вытесненного ключа
+        cache.add(TREE_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(TREE_VERSION_KEY)
+    return version
+
+
+def bump_tree_version():
+    """Сбрасывает области всех пользователей после изменения организаций или подразделений"""
+    try:
+        cache.incr(TREE_VERSION_KEY)
+    except ValueError:
+        cache.set(TREE_VERSION_KEY, time.time_ns() // 1000, timeout=None)
+
+
+def compute_scope(user):
+    """Вычисляет область пользователя (два запроса)"""
+    if not user.is_authenticated:
+        return UserScope()
+    if user.role in FULL_ACCESS_ROLES or user.is_superuser:
+        return UserScope(unrestricted=True)
+    if not user.organization_id:
+        return UserScope()
+    organizations = organization_tree.descendants([user.organization_id])
+    organization_ids = frozenset(organization_tree.descendant_ids([user.organization_id]))
+    department_ids = frozenset(
+        Department.objects.filter(organization_id__in=organizations).values_list('id', flat=True)
+    )
+    return UserScope(organization_ids=organization_ids, department_ids=department_ids)
+
+
+def get_user_scope(user):
+    """Область пользователя из кэша запроса, общего кэша или вычисленная заново"""
+    scope = getattr(user, '_scope', None)
+    if scope is not None:
+        return scope
+    if not user.is_authenticated:
+        scope = UserScope()
+    else:
+        key = f'auth:scope:{user.pk}:{user.role}:{user.organization_id}:{int(user.is_superuser)}:{get_tree_version()}'
+        scope = cache.get(key)
+        if scope is None:
+            scope = compute_scope(user)
+            cache.set(key, scope, timeout=SCOPE_TTL)
+    user._scope = scope
+    return scope
+
+
+def filter_by_scope(queryset, user, organization_field=None, department_field=None):
+    """Оставляет в queryset только объекты из области пользователя"""
+    return get_user_scope(user).filter(queryset, organization_field, department_field)
+
+
+def filter_votings_by_scope(queryset, user):
+    """
+    Оставляет голосования, доступные пользователю: без целевой аудитории
+    или с хотя бы одним подразделением из его области
+    """
+    scope = get_user_scope(user)
+    if scope.unrestricted:
+        return queryset
+    from apps.voting.models import Voting
+
+    audience = Voting.target_audience.through.objects.filter(voting_id=OuterRef('pk'))
+    return queryset.filter(~Exists(audience) | Exists(audience.filter(department_id__in=scope.department_ids)))
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django_otp.plugins.otp_static.models import StaticDevice
+from django_otp.plugins.otp_totp.models import TOTPDevice
+
+from apps.authentication.models import UserProfile
+from apps.authentication.scope import bump_tree_version
+from apps.authentication.snapshots import invalidate_otp_device, invalidate_user_snapshot
+from apps.members.models import Department, Organization
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_user_scopes(sender, raw=False, **kwargs):
+    """Изменение структуры организаций сбрасывает области видимости пользователей"""
+    if not raw:
+        # После фиксации транзакции, чтобы область не закэшировалась по старой структуре
+        transaction.on_commit(bump_tree_version)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    """Пароль, роль или активность пользователя изменились - снимок устарел"""
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile(sender, instance, **kwargs):
+    """Профиль входит в снимок пользователя (two_factor_enabled)"""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_snapshot(user_id))
+
+
+@receiver(post_save, sender=TOTPDevice)
+@receiver(post_delete, sender=TOTPDevice)
+@receiver(post_save, sender=StaticDevice)
+@receiver(post_delete, sender=StaticDevice)
+def invalidate_device(sender, instance, **kwargs):
+    """Удаленное или отключенное устройство не должно подтверждать вход из кэша"""
+    # persistent_id вычисляется сразу: после удаления Collector обнуляет pk
+    persistent_id = instance.persistent_id
+    transaction.on_commit(lambda: invalidate_otp_device(persistent_id))
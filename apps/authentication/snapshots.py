@@ -0,0 +1,102 @@
+"""
+Кэширование данных аутентификации между запросами.
+
+Стандартный путь аутентификации на каждом запросе читает сессию, загружает
+пользователя и устройство OTP, которым он подтвердил вход. Сессии хранятся
+в бэкенде cached_db (settings.SESSION_ENGINE), а пользователь вместе с
+профилем и устройство OTP - в общем кэше:
+
+* снимок пользователя - объект CustomUser с загруженным профилем под ключом
+  auth:user:v<версия формата>:<id>. При чтении хэш сессии сверяется с
+  хэшем пароля из снимка, как это делает django.contrib.auth.get_user;
+* состояние устройства OTP - пара (user_id, confirmed) под ключом
+  auth:otp:<persistent_id> из сессии. Сам объект устройства с секретным
+  ключом в общий кэш не попадает: при попадании в кэш user.otp_device -
+  несохраненный экземпляр модели устройства только с pk, user_id и
+  confirmed. Для проверки токена устройство нужно загрузить из базы.
+
+Снимки удаляются после фиксации изменения пользователя (пароль, роль,
+активность), его профиля (two_factor_enabled) или устройства OTP
+(apps.authentication.signals).
+"""
+from django.apps import apps
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+from apps.authentication.models import UserProfile
+
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_TIMEOUT = 15 * 60
+OTP_DEVICE_TIMEOUT = 15 * 60
+
+
+def user_snapshot_key(user_id):
+    return f'auth:user:v{SNAPSHOT_FORMAT}:{user_id}'
+
+
+def otp_device_key(persistent_id):
+    return f'auth:otp:{persistent_id}'
+
+
+def load_user(request):
+    """Загружает пользователя стандартным способом и сохраняет снимок"""
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        profile = UserProfile.objects.filter(user=user).first()
+        if profile is not None:
+            user.profile = profile
+        cache.set(user_snapshot_key(user.pk), user, timeout=SNAPSHOT_TIMEOUT)
+    return user
+
+
+def get_cached_user(request):
+    """Пользователь запроса из снимка в кэше или из базы"""
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None or request.session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request) if user_id is not None else AnonymousUser()
+    user = cache.get(user_snapshot_key(user_id))
+    if user is None:
+        return load_user(request)
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash, user.get_session_auth_hash()):
+        # Пароль сменен или хэш подписан старым ключом: решение за get_user
+        cache.delete(user_snapshot_key(user_id))
+        return load_user(request)
+    return user
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(user_snapshot_key(user_id))
+
+
+def device_stub(persistent_id, user_id, confirmed):
+    """Несохраненный экземпляр устройства по persistent_id вида <app_label.model>/<pk>"""
+    try:
+        model_label, pk = persistent_id.rsplit('/', 1)
+        model = apps.get_model(model_label)
+    except (ValueError, LookupError):
+        return None
+    return model(pk=pk, user_id=user_id, confirmed=confirmed)
+
+
+def get_cached_device(persistent_id, loader):
+    """Устройство OTP по состоянию из кэша; loader(persistent_id) загружает его из базы"""
+    key = otp_device_key(persistent_id)
+    state = cache.get(key)
+    if state is not None:
+        device = device_stub(persistent_id, *state)
+        if device is not None:
+            return device
+    device = loader(persistent_id)
+    if device is not None:
+        cache.set(key, (device.user_id, device.confirmed), timeout=OTP_DEVICE_TIMEOUT)
+    return device
+
+
+def invalidate_otp_device(persistent_id):
+    cache.delete(otp_device_key(persistent_id))
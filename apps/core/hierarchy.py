@@ -0,0 +1,179 @@
+"""
+Иерархии на таблице замыкания.
+
+Для дерева, заданного ссылкой на родителя, таблица замыкания хранит по строке
+на каждую пару (предок, потомок) с расстоянием depth, включая пару узла с
+самим собой (depth = 0). Поддерево и цепочка предков любого узла выбираются
+одним запросом по индексу, без рекурсивного обхода.
+
+ClosureTree поддерживает таблицу при добавлении, переносе и удалении узла;
+модели подключают его через connect() в сигналах приложения.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, pre_save
+
+
+INSERT_BATCH_SIZE = 5000
+
+
+class ClosureTree:
+    """
+    Таблица замыкания дерева модели model.
+
+    closure_model должна иметь внешние ключи ancestor и descendant на model
+    (on_delete=CASCADE) и целое поле depth.
+    """
+
+    def __init__(self, model, closure_model, parent_field='parent'):
+        self.model = model
+        self.closure = closure_model
+        self.parent_attname = model._meta.get_field(parent_field).attname
+
+    # Запросы
+
+    def descendants(self, node_ids, include_self=True):
+        """Подзапрос ID узлов поддеревьев указанных узлов"""
+        links = self.closure.objects.filter(ancestor_id__in=node_ids)
+        if not include_self:
+            links = links.filter(depth__gt=0)
+        return links.values('descendant_id')
+
+    def ancestors(self, node_ids, include_self=True):
+        """Подзапрос ID предков указанных узлов"""
+        links = self.closure.objects.filter(descendant_id__in=node_ids)
+        if not include_self:
+            links = links.filter(depth__gt=0)
+        return links.values('ancestor_id')
+
+    def descendant_ids(self, node_ids, include_self=True):
+        return set(self.descendants(node_ids, include_self).values_list('descendant_id', flat=True))
+
+    def ancestor_ids(self, node_id, include_self=True):
+        """ID предков узла от корня к узлу"""
+        links = self.closure.objects.filter(descendant_id=node_id)
+        if not include_self:
+            links = links.filter(depth__gt=0)
+        return list(links.order_by('-depth').values_list('ancestor_id', flat=True))
+
+    # Поддержание таблицы
+
+    def node_inserted(self, node_id, parent_id):
+        """Добавляет строки замыкания для нового листа"""
+        links = [self.closure(ancestor_id=node_id, descendant_id=node_id, depth=0)]
+        if parent_id is not None:
+            for ancestor_id, depth in self.closure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'):
+                links.append(self.closure(ancestor_id=ancestor_id, descendant_id=node_id, depth=depth + 1))
+        self.closure.objects.bulk_create(links, ignore_conflicts=True)
+
+    def check_move(self, node_id, parent_id):
+        """Проверяет, что узел не переносится внутрь собственного поддерева"""
+        if parent_id is not None and self.closure.objects.filter(ancestor_id=node_id, descendant_id=parent_id).exists():
+            raise ValidationError('Нельзя перенести узел внутрь его собственного поддерева')
+
+    def node_moved(self, node_id, parent_id):
+        """
+        Переносит поддерево узла под нового родителя: удаляет связи поддерева
+        с прежними предками и добавляет связи с новыми
+        """
+        self.check_move(node_id, parent_id)
+        subtree = list(self.closure.objects.filter(ancestor_id=node_id).values_list('descendant_id', 'depth'))
+        subtree_ids = [descendant_id for descendant_id, _ in subtree]
+        with transaction.atomic():
+            self.closure.objects.filter(descendant_id__in=subtree_ids).exclude(ancestor_id__in=subtree_ids).delete()
+            if parent_id is None:
+                return
+            ancestors = list(self.closure.objects.filter(descendant_id=parent_id).values_list('ancestor_id', 'depth'))
+            links = [
+                self.closure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=ancestor_depth + depth + 1)
+                for ancestor_id, ancestor_depth in ancestors
+                for descendant_id, depth in subtree
+            ]
+            self.closure.objects.bulk_create(links, batch_size=INSERT_BATCH_SIZE)
+
+    def node_deleted(self, node_id):
+        """
+        Отрывает потомков удаляемого узла от его предков. Строки самого узла
+        удаляются каскадом; при on_delete=SET_NULL дети становятся корнями.
+        """
+        descendants = self.descendants([node_id], include_self=False)
+        self.closure.objects.filter(descendant_id__in=descendants).exclude(ancestor_id__in=descendants).delete()
+
+    def rebuild(self, root_ids=None):
+        """
+        Перестраивает таблицу замыкания по ссылкам на родителя; возвращает число строк.
+
+        С root_ids перестраиваются только деревья с этими корнями (узлами без
+        родителя), строки остальных деревьев не затрагиваются.
+        """
+        children = defaultdict(list)
+        roots = []
+        for node_id, parent_id in self.model.objects.values_list('pk', self.parent_attname).order_by().iterator():
+            if parent_id is None:
+                roots.append(node_id)
+            else:
+                children[parent_id].append(node_id)
+        if root_ids is not None:
+            root_ids = set(root_ids)
+            roots = [root for root in roots if root in root_ids]
+
+        created = 0
+        batch = []
+        with transaction.atomic():
+            if root_ids is None:
+                self.closure.objects.all().delete()
+            else:
+                nodes = list(roots)
+                for node_id in nodes:
+                    nodes.extend(children.get(node_id, ()))
+                for start in range(0, len(nodes), INSERT_BATCH_SIZE):
+                    self.closure.objects.filter(descendant_id__in=nodes[start:start + INSERT_BATCH_SIZE]).delete()
+            # Обход в глубину со стеком предков текущей ветви
+            stack = [(root, [root]) for root in roots]
+            while stack:
+                node_id, path = stack.pop()
+                for depth, ancestor_id in enumerate(reversed(path)):
+                    batch.append(self.closure(ancestor_id=ancestor_id, descendant_id=node_id, depth=depth))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    self.closure.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+                for child_id in children.get(node_id, ()):
+                    stack.append((child_id, path + [child_id]))
+            if batch:
+                self.closure.objects.bulk_create(batch)
+                created += len(batch)
+        return created
+
+    # Сигналы
+
+    def connect(self, dispatch_uid):
+        """Подключает поддержание таблицы к сигналам модели"""
+        pre_save.connect(self._remember_parent, sender=self.model, dispatch_uid=f'{dispatch_uid}_pre_save')
+        post_save.connect(self._update_closure, sender=self.model, dispatch_uid=f'{dispatch_uid}_post_save')
+        pre_delete.connect(self._detach_subtree, sender=self.model, dispatch_uid=f'{dispatch_uid}_pre_delete')
+
+    def _remember_parent(self, sender, instance, raw=False, **kwargs):
+        instance._closure_previous_parent = None
+        if raw or instance._state.adding:
+            return
+        previous = self.model.objects.filter(pk=instance.pk).values_list(self.parent_attname, flat=True).first()
+        instance._closure_previous_parent = previous
+        new_parent = getattr(instance, self.parent_attname)
+        if new_parent != previous:
+            self.check_move(instance.pk, new_parent)
+
+    def _update_closure(self, sender, instance, created, raw=False, **kwargs):
+        # Фикстуры загружаются в произвольном порядке: после loaddata нужен rebuild()
+        if raw:
+            return
+        parent_id = getattr(instance, self.parent_attname)
+        if created:
+            self.node_inserted(instance.pk, parent_id)
+        elif parent_id != getattr(instance, '_closure_previous_parent', parent_id):
+            self.node_moved(instance.pk, parent_id)
+
+    def _detach_subtree(self, sender, instance, **kwargs):
+        self.node_deleted(instance.pk)
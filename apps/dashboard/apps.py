@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dashboard'
-    verbose_name = 'Дашборд'
\ No newline at end of file
+    verbose_name = 'Дашборд'
+
+    def ready(self):
+        from apps.dashboard import signals  # noqa: F401
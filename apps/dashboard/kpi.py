@@ -0,0 +1,120 @@
+"""
+Временные ряды ключевых показателей эффективности.
+
+Ряд строится одним сгруппированным запросом по индексу
+(organization, name, period): значения сворачиваются на стороне СУБД до
+месяца, квартала или года, затем дополняются пустыми периодами, чтобы у всех
+рядов были одинаковые метки. Результат отдается столбцами (labels и массивы
+значений), которые Chart.js принимает без преобразований.
+"""
+import uuid
+from datetime import date
+
+from django.db.models import Avg, Max, Min, Sum
+from django.db.models.functions import TruncMonth, TruncQuarter, TruncYear
+
+from apps.dashboard.models import KeyPerformanceIndicator
+from apps.members.models import Organization
+
+
+ROLLUPS = {
+    'month': (TruncMonth, 1),
+    'quarter': (TruncQuarter, 3),
+    'year': (TruncYear, 12),
+}
+
+AGGREGATES = {
+    'avg': Avg,
+    'sum': Sum,
+    'min': Min,
+    'max': Max,
+}
+
+
+class InvalidSeriesRequest(ValueError):
+    """Некорректные параметры ряда"""
+
+
+def bucket_start(day, months):
+    """Начало периода свертки, в который попадает дата"""
+    month = (day.month - 1) // months * months + 1
+    return date(day.year, month, 1)
+
+
+def iter_buckets(start, end, months):
+    """Начала всех периодов свертки от start до end включительно"""
+    current = bucket_start(start, months)
+    while current <= end:
+        yield current
+        month_index = current.year * 12 + current.month - 1 + months
+        current = date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def to_number(value):
+    return float(value) if value is not None else None
+
+
+def get_kpi_series(names, organization_ids, start, end, rollup='month', aggregate='avg'):
+    """
+    Возвращает ряды KPI за период [start, end].
+
+    Ряд строится для каждой пары (организация, название KPI). Результат:
+    {'labels': [...], 'series': [{'organization', 'organization_name', 'name',
+    'unit', 'values', 'targets'}]}, где values и targets выровнены по labels,
+    а пропущенные периоды заполнены None.
+    """
+    if rollup not in ROLLUPS:
+        raise InvalidSeriesRequest(f'Неизвестная свертка: {rollup}')
+    if aggregate not in AGGREGATES:
+        raise InvalidSeriesRequest(f'Неизвестная агрегация: {aggregate}')
+    if start > end:
+        raise InvalidSeriesRequest('Начало периода позже окончания')
+    try:
+        organization_ids = [uuid.UUID(str(pk)) for pk in organization_ids]
+    except ValueError as exc:
+        raise InvalidSeriesRequest('Некорректный идентификатор организации') from exc
+    names = list(names)
+    if not names or not organization_ids:
+        raise InvalidSeriesRequest('Не указаны KPI или организации')
+
+    trunc, months = ROLLUPS[rollup]
+    function = AGGREGATES[aggregate]
+    buckets = list(iter_buckets(start, end, months))
+    position = {bucket: index for index, bucket in enumerate(buckets)}
+
+    rows = (
+        KeyPerformanceIndicator.objects.filter(
+            organization_id__in=organization_ids, name__in=names, period__gte=start, period__lte=end,
+        )
+        .annotate(bucket=trunc('period'))
+        .values('organization_id', 'name', 'bucket')
+        .annotate(value=function('value'), target=function('target_value'), unit=Max('unit'))
+        .order_by()
+        .values_list('organization_id', 'name', 'bucket', 'value', 'target', 'unit')
+    )
+
+    organizations = dict(Organization.objects.filter(pk__in=organization_ids).values_list('id', 'short_name'))
+    series = {}
+    for organization_id in organization_ids:
+        for name in names:
+            series[(organization_id, name)] = {
+                'organization': str(organization_id),
+                'organization_name': organizations.get(organization_id, ''),
+                'name': name,
+                'unit': '',
+                'values': [None] * len(buckets),
+                'targets': [None] * len(buckets),
+            }
+    for organization_id, name, bucket, value, target, unit in rows:
+        item = series.get((organization_id, name))
+        index = position.get(bucket)
+        if item is None or index is None:
+            continue
+        item['values'][index] = to_number(value)
+        item['targets'][index] = to_number(target)
+        item['unit'] = unit
+
+    return {
+        'labels': [bucket.isoformat() for bucket in buckets],
+        'series': list(series.values()),
+    }
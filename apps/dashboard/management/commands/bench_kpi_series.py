@@ -0,0 +1,88 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.dashboard.kpi import get_kpi_series
+from apps.dashboard.models import KeyPerformanceIndicator
+from apps.members.models import Organization
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость построения рядов KPI на синтетических данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=10, help='Глубина истории в годах')
+        parser.add_argument('--organizations', type=int, default=200, help='Количество организаций')
+        parser.add_argument('--kpis', type=int, default=50, help='Количество KPI на организацию')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого запроса')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пакета записи')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        years, kpis = options['years'], options['kpis']
+        end = date.today().replace(day=1)
+        start = date(end.year - years, end.month, 1)
+        names = [f'{prefix} KPI {number}' for number in range(kpis)]
+
+        organizations = [
+            Organization(name=f'{prefix} организация {number}', short_name=f'{prefix}-{number}')
+            for number in range(options['organizations'])
+        ]
+        Organization.objects.bulk_create(organizations)
+        try:
+            self.stdout.write(f"Подготовка данных: {len(organizations)} × {kpis} KPI × {years * 12} месяцев...")
+            started = time.perf_counter()
+            created = self.populate(organizations, names, start, years * 12, options['batch_size'])
+            self.stdout.write(f'Создано {created} строк за {time.perf_counter() - started:.1f} с')
+
+            rng = random.Random(0)
+            scenarios = [
+                ('1 организация, 1 KPI, месяцы', 'month', 1, 1),
+                ('1 организация, 1 KPI, кварталы', 'quarter', 1, 1),
+                ('1 организация, 10 KPI, годы', 'year', 1, 10),
+                ('20 организаций, 1 KPI, месяцы', 'month', 20, 1),
+                ('200 организаций, 1 KPI, годы', 'year', 200, 1),
+            ]
+            for label, rollup, org_count, kpi_count in scenarios:
+                timings = []
+                for _ in range(options['repeat']):
+                    org_ids = [organization.pk for organization in rng.sample(organizations, min(org_count, len(organizations)))]
+                    kpi_names = rng.sample(names, min(kpi_count, len(names)))
+                    began = time.perf_counter()
+                    series = get_kpi_series(kpi_names, org_ids, start, end, rollup=rollup)
+                    timings.append((time.perf_counter() - began) * 1000)
+                self.stdout.write(
+                    f"{label}: {len(series['series'])} рядов × {len(series['labels'])} точек, "
+                    f'медиана {statistics.median(timings):.1f} мс, максимум {max(timings):.1f} мс'
+                )
+        finally:
+            KeyPerformanceIndicator.objects.filter(organization__in=organizations).delete()
+            Organization.objects.filter(pk__in=[organization.pk for organization in organizations]).delete()
+
+    def populate(self, organizations, names, start, months, batch_size):
+        rng = random.Random(1)
+        batch = []
+        created = 0
+        for organization in organizations:
+            for name in names:
+                base = rng.randrange(100, 10_000)
+                for offset in range(months):
+                    month_index = start.year * 12 + start.month - 1 + offset
+                    batch.append(KeyPerformanceIndicator(
+                        name=name, description='', unit='ед.', organization=organization,
+                        period=date(month_index // 12, month_index % 12 + 1, 1),
+                        value=Decimal(base + rng.randrange(-50, 50)), target_value=Decimal(base),
+                    ))
+                    if len(batch) >= batch_size:
+                        KeyPerformanceIndicator.objects.bulk_create(batch)
+                        created += len(batch)
+                        batch = []
+        if batch:
+            KeyPerformanceIndicator.objects.bulk_create(batch)
+            created += len(batch)
+        return created
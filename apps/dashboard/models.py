@@ -96,6 +96,10 @@ class KeyPerformanceIndicator(models.Model):
         verbose_name = 'Ключевой показатель эффективности'
         verbose_name_plural = 'Ключевые показатели эффективности'
         ordering = ['-period', 'name']
+        indexes = [
+            # Временные ряды KPI: организация и название фиксированы, диапазон по периоду
+            models.Index(fields=['organization', 'name', 'period'], name='dashboard_kpi_org_name_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.period.strftime('%m.%Y')}"
@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.dashboard.widgets import invalidate_widgets
+from apps.finance.models import FinancialRecord, FinancialSupportRequest, MembershipFee
+from apps.members.models import Department, Employee
+from apps.members.signals import employees_bulk_changed
+from apps.news.models import NewsPost
+from apps.voting.models import Voting
+
+
+def employee_organization_id(employee):
+    return Department.objects.filter(pk=employee.department_id).values_list('organization_id', flat=True).first()
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+def invalidate_membership_widgets(sender, instance, raw=False, **kwargs):
+    """Сбрасывает виджеты членства и активности организации сотрудника"""
+    if raw:
+        return
+    invalidate_widgets(['membership_stats', 'recent_activity'], [employee_organization_id(instance)])
+
+
+@receiver(employees_bulk_changed)
+def invalidate_membership_widgets_bulk(sender, department_ids=(), **kwargs):
+    """Сбрасывает виджеты членства после массового изменения сотрудников"""
+    organization_ids = set(Department.objects.filter(pk__in=department_ids).values_list('organization_id', flat=True))
+    invalidate_widgets(['membership_stats', 'recent_activity'], organization_ids)
+
+
+@receiver(post_save, sender=MembershipFee)
+@receiver(post_delete, sender=MembershipFee)
+def invalidate_fee_widgets(sender, instance, raw=False, **kwargs):
+    """Сбрасывает финансовый виджет организации плательщика"""
+    if raw:
+        return
+    organization_id = (
+        Employee.objects.filter(pk=instance.employee_id).values_list('department__organization_id', flat=True).first()
+    )
+    invalidate_widgets(['finance_stats'], [organization_id])
+
+
+@receiver(post_save, sender=FinancialSupportRequest)
+@receiver(post_delete, sender=FinancialSupportRequest)
+def invalidate_support_request_widgets(sender, instance, raw=False, **kwargs):
+    """Сбрасывает финансовый виджет и ленту активности организации заявителя"""
+    if raw:
+        return
+    organization_id = (
+        Employee.objects.filter(pk=instance.employee_id).values_list('department__organization_id', flat=True).first()
+    )
+    invalidate_widgets(['finance_stats', 'recent_activity'], [organization_id])
+
+
+@receiver(post_save, sender=FinancialRecord)
+@receiver(post_delete, sender=FinancialRecord)
+def invalidate_fund_widgets(sender, instance, raw=False, **kwargs):
+    """Остаток фонда общий, поэтому сбрасывается финансовый виджет всех организаций"""
+    if not raw:
+        invalidate_widgets(['finance_stats'])
+
+
+@receiver(post_save, sender=Voting)
+@receiver(post_delete, sender=Voting)
+def invalidate_voting_widgets(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_widgets(['voting_stats'])
+
+
+@receiver(m2m_changed, sender=Voting.target_audience.through)
+def invalidate_voting_widgets_on_audience(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_widgets(['voting_stats'])
+
+
+@receiver(post_save, sender=NewsPost)
+@receiver(post_delete, sender=NewsPost)
+def invalidate_news_widgets(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_widgets(['news_feed', 'recent_activity'])
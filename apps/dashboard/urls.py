@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    # Данные виджетов
+    path('widgets/', views.dashboard_widgets_view, name='widgets'),
+    # Ключевые показатели эффективности
+    path('kpi/series/', views.kpi_series_view, name='kpi_series'),
+]
@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, JsonResponse
+
+from apps.authentication.scope import get_user_scope
+from apps.dashboard.kpi import get_kpi_series
+from apps.dashboard.widgets import get_user_dashboard
+
+
+@login_required
+def dashboard_widgets_view(request):
+    """Данные всех видимых виджетов пользователя для отрисовки дашборда"""
+    return JsonResponse({'widgets': [
+        {
+            'id': str(item.widget_id),
+            'type': item.widget.widget_type,
+            'title': item.widget.title,
+            'x': item.position_x,
+            'y': item.position_y,
+            'width': item.width,
+            'height': item.height,
+            'data': data,
+        }
+        for item, data in get_user_dashboard(request.user)
+    ]})
+
+
+@login_required
+def kpi_series_view(request):
+    """
+    Ряды KPI для графика: параметры name и organization (повторяемые),
+    start и end (ГГГГ-ММ-ДД), rollup (month/quarter/year), aggregate (avg/sum/min/max)
+    """
+    organization_ids = request.GET.getlist('organization')
+    scope = get_user_scope(request.user)
+    if not scope.unrestricted:
+        # Пользователь видит показатели своей организации и подчиненных ей
+        allowed = {str(pk) for pk in scope.organization_ids}
+        if organization_ids:
+            organization_ids = [pk for pk in organization_ids if pk in allowed]
+        else:
+            organization_ids = sorted(allowed)
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+        end = date.fromisoformat(request.GET.get('end', ''))
+        series = get_kpi_series(
+            request.GET.getlist('name'),
+            organization_ids,
+            start,
+            end,
+            rollup=request.GET.get('rollup', 'month'),
+            aggregate=request.GET.get('aggregate', 'avg'),
+        )
+    except ValueError as exc:
+        return HttpResponseBadRequest(str(exc))
+    return JsonResponse(series)
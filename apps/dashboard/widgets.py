@@ -0,0 +1,281 @@
+"""
+Данные виджетов дашборда.
+
+На каждый тип виджета (DashboardWidget.widget_type) приходится один
+поставщик данных со своим сроком жизни кэша. Данные считаются по поддереву
+организации пользователя (его область видимости, apps.authentication.scope)
+и кэшируются в общем кэше на организацию, а не на пользователя: все
+пользователи организации видят одни и те же цифры. Страница дашборда
+получает данные всех видимых виджетов пользователя одним запросом get_many;
+недостающие значения вычисляются и записываются обратно.
+
+Ключ данных содержит версию типа виджета. Изменения, затрагивающие все
+организации, увеличивают версию (одна операция с кэшем на тип); изменения
+в одной организации удаляют ключи этой организации, ее вышестоящих
+организаций и сводные данные (apps.dashboard.signals).
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.authentication.scope import get_user_scope
+from apps.dashboard.models import UserDashboardWidget
+from apps.members.hierarchy import organization_tree
+
+
+CACHE_PREFIX = 'dashboard:widget'
+GLOBAL_SCOPE = 'all'
+
+
+def version_key(widget_type):
+    return f'{CACHE_PREFIX}:version:{widget_type}'
+
+
+def cache_key(widget_type, version, organization_id):
+    return f'{CACHE_PREFIX}:{widget_type}:{version}:{organization_id or GLOBAL_SCOPE}'
+
+
+def get_versions(widget_types):
+    """Возвращает словарь {тип виджета: версия} одним запросом к кэшу"""
+    keys = {version_key(widget_type): widget_type for widget_type in widget_types}
+    versions = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+    for key, widget_type in keys.items():
+        if widget_type not in versions:
+            # Версия от текущего времени не совпадет с версией вытесненного ключа
+            cache.add(key, time.time_ns() // 1000, timeout=None)
+            versions[widget_type] = cache.get(key)
+    return versions
+
+
+class WidgetProvider:
+    """
+    Поставщик данных виджета одного типа
+    """
+    widget_type = None
+    ttl = 300
+
+    def compute(self, organization_id):
+        """Возвращает данные виджета для поддерева организации (None - по всем организациям)"""
+        raise NotImplementedError
+
+    def subtree(self, organization_id):
+        """Подзапрос ID организации и всех подчиненных ей"""
+        return organization_tree.descendants([organization_id])
+
+
+class MembershipStatsProvider(WidgetProvider):
+    widget_type = 'membership_stats'
+    ttl = 15 * 60
+
+    def compute(self, organization_id):
+        from apps.members.models import Employee
+
+        employees = Employee.objects.all()
+        if organization_id:
+            employees = employees.filter(department__organization_id__in=self.subtree(organization_id))
+        month_start = timezone.localdate().replace(day=1)
+        figures = employees.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            joined=Count('id', filter=Q(union_join_date__gte=month_start)),
+        )
+        total = figures['total']
+        return {
+            'total_employees': total,
+            'active_members': figures['active'],
+            'joined_this_month': figures['joined'],
+            'membership_rate': round(figures['active'] * 100 / total, 2) if total else 0,
+        }
+
+
+class FinanceStatsProvider(WidgetProvider):
+    widget_type = 'finance_stats'
+    ttl = 10 * 60
+
+    def compute(self, organization_id):
+        from apps.finance.ledger import get_fund_balance
+        from apps.finance.models import FinancialSupportRequest, MembershipFee
+
+        requests = FinancialSupportRequest.objects.filter(status__in=FinancialSupportRequest.OPEN_STATUSES)
+        fees = MembershipFee.objects.filter(period=timezone.localdate().replace(day=1))
+        if organization_id:
+            requests = requests.filter(employee__department__organization_id__in=self.subtree(organization_id))
+            fees = fees.filter(employee__department__organization_id__in=self.subtree(organization_id))
+        by_status = dict(requests.values_list('status').annotate(count=Count('id')).order_by())
+        fee_figures = fees.aggregate(accrued=Count('id'), unpaid=Count('id', filter=Q(paid_at__isnull=True)))
+        return {
+            'fund_balance': str(get_fund_balance()),
+            'open_requests': {status: by_status.get(status, 0) for status in FinancialSupportRequest.OPEN_STATUSES},
+            'fees_accrued': fee_figures['accrued'],
+            'fees_unpaid': fee_figures['unpaid'],
+        }
+
+
+class VotingStatsProvider(WidgetProvider):
+    widget_type = 'voting_stats'
+    # Голоса не сбрасывают кэш: явка обновляется по истечении срока
+    ttl = 60
+    limit = 5
+
+    def compute(self, organization_id):
+        from apps.voting.models import Voting
+        from apps.voting.participants import get_participants_counts
+
+        votings = Voting.objects.filter(status='active')
+        if organization_id:
+            votings = votings.filter(
+                Q(target_audience__isnull=True) | Q(target_audience__organization_id__in=self.subtree(organization_id))
+            ).distinct()
+        votings = list(votings.select_related('tally').order_by('end_date')[:self.limit])
+        participants = get_participants_counts(votings)
+        items = []
+        for voting in votings:
+            votes = voting.get_votes_count()
+            count = participants.get(voting.pk) or 0
+            items.append({
+                'id': str(voting.pk),
+                'title': voting.title,
+                'end_date': voting.end_date.isoformat(),
+                'votes': votes,
+                'participants': count,
+                'turnout': round(votes * 100 / count, 2) if count else 0,
+            })
+        return {'active_votings': items}
+
+
+class NewsFeedProvider(WidgetProvider):
+    widget_type = 'news_feed'
+    ttl = 5 * 60
+    limit = 5
+
+    def compute(self, organization_id):
+        from apps.news.models import NewsPost
+
+        posts = (
+            NewsPost.objects.filter(published_at__lte=timezone.now())
+            .select_related('category')
+            .order_by('-is_pinned', '-published_at')
+            .values_list('id', 'title', 'category__name', 'is_pinned', 'published_at')[:self.limit]
+        )
+        return {'posts': [
+            {'id': str(pk), 'title': title, 'category': category, 'is_pinned': pinned, 'published_at': published_at.isoformat()}
+            for pk, title, category, pinned, published_at in posts
+        ]}
+
+
+class RecentActivityProvider(WidgetProvider):
+    widget_type = 'recent_activity'
+    ttl = 5 * 60
+    limit = 10
+    days = 30
+
+    def compute(self, organization_id):
+        from apps.finance.models import FinancialSupportRequest
+        from apps.members.models import Employee
+        from apps.news.models import NewsPost
+
+        since = timezone.now() - timedelta(days=self.days)
+        employees = Employee.objects.filter(created_at__gte=since)
+        requests = FinancialSupportRequest.objects.filter(created_at__gte=since)
+        if organization_id:
+            employees = employees.filter(department__organization_id__in=self.subtree(organization_id))
+            requests = requests.filter(employee__department__organization_id__in=self.subtree(organization_id))
+
+        events = []
+        for created_at, full_name in employees.order_by('-created_at').values_list('created_at', 'full_name')[:self.limit]:
+            events.append((created_at, 'member', f'Новый сотрудник: {full_name}'))
+        for created_at, full_name in requests.order_by('-created_at').values_list('created_at', 'employee__full_name')[:self.limit]:
+            events.append((created_at, 'support_request', f'Заявка на выплату: {full_name}'))
+        for published_at, title in (
+            NewsPost.objects.filter(published_at__gte=since, published_at__lte=timezone.now())
+            .order_by('-published_at').values_list('published_at', 'title')[:self.limit]
+        ):
+            events.append((published_at, 'news', title))
+        events.sort(key=lambda event: event[0], reverse=True)
+        return {'events': [
+            {'date': date.isoformat(), 'type': event_type, 'text': text}
+            for date, event_type, text in events[:self.limit]
+        ]}
+
+
+PROVIDERS = {
+    provider.widget_type: provider
+    for provider in (
+        MembershipStatsProvider(),
+        FinanceStatsProvider(),
+        VotingStatsProvider(),
+        NewsFeedProvider(),
+        RecentActivityProvider(),
+    )
+}
+
+
+def get_widgets_data(widget_types, organization_id):
+    """
+    Возвращает словарь {тип виджета: данные} для организации.
+
+    Кэш читается одним запросом get_many; недостающие данные вычисляются и
+    записываются с временем жизни своего поставщика.
+    """
+    versions = get_versions([widget_type for widget_type in widget_types if widget_type in PROVIDERS])
+    keys = {cache_key(widget_type, version, organization_id): widget_type for widget_type, version in versions.items()}
+    cached = cache.get_many(list(keys))
+    data = {keys[key]: value for key, value in cached.items()}
+
+    missing = defaultdict(dict)
+    for key, widget_type in keys.items():
+        if widget_type not in data:
+            provider = PROVIDERS[widget_type]
+            data[widget_type] = provider.compute(organization_id)
+            missing[provider.ttl][key] = data[widget_type]
+    for ttl, values in missing.items():
+        cache.set_many(values, timeout=ttl)
+    return data
+
+
+def get_user_dashboard(user):
+    """Возвращает видимые виджеты пользователя в порядке раскладки вместе с данными"""
+    widgets = list(
+        UserDashboardWidget.objects.filter(user=user, is_visible=True, widget__is_active=True)
+        .select_related('widget')
+        .order_by('position_y', 'position_x')
+    )
+    scope = get_user_scope(user)
+    if scope.unrestricted:
+        data = get_widgets_data({item.widget.widget_type for item in widgets}, None)
+    elif user.organization_id:
+        data = get_widgets_data({item.widget.widget_type for item in widgets}, user.organization_id)
+    else:
+        # Пользователь без организации не видит сводных данных
+        data = {}
+    return [(item, data.get(item.widget.widget_type)) for item in widgets]
+
+
+def invalidate_widgets(widget_types, organization_ids=None):
+    """
+    Сбрасывает кэш виджетов указанных организаций.
+
+    Без organization_ids увеличивается версия типов виджетов, что сбрасывает
+    кэш всех организаций. Иначе удаляются данные организаций и их
+    вышестоящих организаций (их поддеревья включают изменение), а также
+    сводные данные по всем организациям.
+    """
+    if organization_ids is None:
+        for widget_type in set(widget_types):
+            try:
+                cache.incr(version_key(widget_type))
+            except ValueError:
+                cache.set(version_key(widget_type), time.time_ns() // 1000, timeout=None)
+        return
+    organization_ids = [organization_id for organization_id in organization_ids if organization_id is not None]
+    scopes = {None, *organization_ids}
+    if organization_ids:
+        scopes.update(organization_tree.ancestors(organization_ids).values_list('ancestor_id', flat=True))
+    versions = get_versions(widget_types)
+    cache.delete_many([
+        cache_key(widget_type, version, scope) for widget_type, version in versions.items() for scope in scopes
+    ])
@@ -0,0 +1,152 @@
+"""
+Ежемесячное начисление членских взносов.
+
+Взносы за период начисляются всем действующим членам организации пакетами
+bulk_create(ignore_conflicts=True): уникальность (employee, period) делает
+повторный запуск безопасным. Суммы считаются в целых копейках и сотых долях
+процента, поэтому округление точное (половина копейки - вверх) и не зависит
+от контекста Decimal.
+"""
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+
+from apps.finance.models import MembershipFee
+from apps.members.importer import parse_decimal, read_rows
+from apps.members.models import Employee
+
+
+ACCRUAL_BATCH_SIZE = 2000
+
+SALARY_COLUMNS = ('оклад', 'зарплата', 'заработная плата', 'salary')
+RATE_COLUMNS = ('процент', 'процент от зарплаты', 'percentage_rate')
+NUMBER_COLUMNS = ('табельный номер', 'employee_number')
+
+
+def get_default_rate():
+    """Процент взноса по умолчанию из settings.MEMBERSHIP_FEE_DEFAULT_RATE"""
+    return Decimal(str(getattr(settings, 'MEMBERSHIP_FEE_DEFAULT_RATE', '1.00')))
+
+
+@dataclass
+class AccrualSummary:
+    organization: object
+    period: date
+    members: int = 0
+    already_accrued: int = 0
+    missing_salary: list = field(default_factory=list)
+    to_create: int = 0
+    created: int = 0
+    total_amount: Decimal = Decimal('0.00')
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.members / self.elapsed if self.elapsed else 0.0
+
+
+def to_cents(value):
+    """Переводит Decimal в целое число сотых (копейки или сотые доли процента)"""
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def compute_amounts(salary_cents, rate_cents):
+    """
+    Считает взносы для списков окладов и процентов в сотых.
+
+    Возвращает суммы в копейках: salary * rate / 100 с округлением половины
+    копейки вверх, в целочисленной арифметике.
+    """
+    return [(salary * rate + 5000) // 10000 for salary, rate in zip(salary_cents, rate_cents)]
+
+
+def read_salaries(path):
+    """
+    Читает файл окладов XLSX/CSV.
+
+    Возвращает словарь {табельный номер: (оклад, процент или None)}.
+    """
+    salaries = {}
+    for _, row in read_rows(path):
+        values = {str(key).strip().lower(): value for key, value in row.items()}
+        number = next((values[column] for column in NUMBER_COLUMNS if values.get(column)), None)
+        salary = next((values[column] for column in SALARY_COLUMNS if values.get(column) not in (None, '')), None)
+        if number is None or salary is None:
+            continue
+        rate = next((values[column] for column in RATE_COLUMNS if values.get(column) not in (None, '')), None)
+        salaries[str(number).strip()] = (parse_decimal(salary), parse_decimal(rate) if rate is not None else None)
+    return salaries
+
+
+def accrue_period(organization, period, salaries, rate=None, dry_run=False, batch_size=ACCRUAL_BATCH_SIZE):
+    """
+    Начисляет взносы организации за месяц period.
+
+    salaries - словарь из read_salaries(). При dry_run ничего не записывается,
+    а сводка показывает, что было бы начислено.
+    """
+    period = period.replace(day=1)
+    default_rate_cents = to_cents(rate if rate is not None else get_default_rate())
+    summary = AccrualSummary(organization=organization, period=period)
+    started = time.perf_counter()
+
+    accrued = set(
+        MembershipFee.objects.filter(period=period, employee__department__organization=organization)
+        .values_list('employee_id', flat=True)
+    )
+    members = (
+        Employee.objects.filter(department__organization=organization, status='active')
+        .order_by()
+        .values_list('id', 'employee_number')
+    )
+
+    total_cents = 0
+    pending = []
+
+    def flush():
+        nonlocal total_cents
+        amounts = compute_amounts([salary for _, salary, _ in pending], [rate for _, _, rate in pending])
+        total_cents += sum(amounts)
+        if not dry_run:
+            fees = [
+                MembershipFee(
+                    employee_id=employee_id,
+                    period=period,
+                    amount=Decimal(amount) / 100,
+                    percentage_rate=Decimal(rate_cents) / 100,
+                )
+                for (employee_id, _, rate_cents), amount in zip(pending, amounts)
+            ]
+            MembershipFee.objects.bulk_create(fees, ignore_conflicts=True)
+        pending.clear()
+
+    for employee_id, employee_number in members.iterator(chunk_size=batch_size):
+        summary.members += 1
+        if employee_id in accrued:
+            summary.already_accrued += 1
+            continue
+        salary = salaries.get(employee_number)
+        if salary is None:
+            summary.missing_salary.append(employee_number)
+            continue
+        salary_value, salary_rate = salary
+        rate_cents = to_cents(salary_rate) if salary_rate is not None else default_rate_cents
+        pending.append((employee_id, to_cents(salary_value), rate_cents))
+        summary.to_create += 1
+        if len(pending) >= batch_size:
+            flush()
+    if pending:
+        flush()
+
+    if not dry_run:
+        # ignore_conflicts не сообщает о пропущенных строках - считаем фактический итог
+        summary.created = (
+            MembershipFee.objects.filter(period=period, employee__department__organization=organization).count()
+            - len(accrued)
+        )
+    summary.total_amount = Decimal(total_cents) / 100
+    summary.elapsed = time.perf_counter() - started
+    return summary
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class FinanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.finance'
-    verbose_name = 'Финансовый модуль'
\ No newline at end of file
+    verbose_name = 'Финансовый модуль'
+
+    def ready(self):
+        from apps.finance import signals  # noqa: F401
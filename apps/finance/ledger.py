@@ -0,0 +1,154 @@
+"""
+Остаток фонда взаимопомощи по снимкам.
+
+BalanceSnapshot хранит нарастающие итоги доходов и расходов на конец
+закрытого дня (и месяца). Текущий остаток - последний снимок плюс сумма
+записей, созданных после его даты, поэтому запрос не растет вместе с
+историей операций. Изменение или удаление записи задним числом удаляет
+снимки начиная с ее даты; verify_snapshots пересчитывает итоги с нуля.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.finance.models import BalanceSnapshot, FinancialRecord
+
+
+ZERO = Decimal('0.00')
+
+
+@dataclass
+class BalanceMismatch:
+    snapshot: BalanceSnapshot
+    income_total: Decimal
+    expense_total: Decimal
+
+
+def day_start(day):
+    """Начало дня в текущем часовом поясе"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def is_month_end(day):
+    return day.day == calendar.monthrange(day.year, day.month)[1]
+
+
+def daily_totals(start_day=None, end_day=None):
+    """Словарь {дата: (доходы, расходы)} за дни с операциями"""
+    records = FinancialRecord.objects.all()
+    if start_day is not None:
+        records = records.filter(created_at__gte=day_start(start_day))
+    if end_day is not None:
+        records = records.filter(created_at__lt=day_start(end_day + timedelta(days=1)))
+    rows = (
+        records.annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(
+            income=Sum('amount', filter=Q(record_type='income')),
+            expense=Sum('amount', filter=Q(record_type='expense')),
+        )
+        .order_by('day')
+    )
+    return {row['day']: (row['income'] or ZERO, row['expense'] or ZERO) for row in rows}
+
+
+def build_snapshots(until=None):
+    """
+    Дописывает снимки остатка с последнего снимка по дату until включительно
+    (по умолчанию - вчерашний день). Снимок дня создается для дней с
+    операциями и для даты until, снимок месяца - на конец каждого месяца.
+    Возвращает число созданных снимков.
+    """
+    if until is None:
+        until = timezone.localdate() - timedelta(days=1)
+    last = BalanceSnapshot.objects.filter(period_type='day').order_by('-date').first()
+    if last is not None and last.date >= until:
+        return 0
+
+    start_day = last.date + timedelta(days=1) if last else None
+    totals = daily_totals(start_day, until)
+    if start_day is None:
+        if not totals:
+            return 0
+        start_day = min(totals)
+
+    income, expense = (last.income_total, last.expense_total) if last else (ZERO, ZERO)
+    snapshots = []
+    day = start_day
+    while day <= until:
+        if day in totals:
+            day_income, day_expense = totals[day]
+            income += day_income
+            expense += day_expense
+        if day in totals or day == until:
+            snapshots.append(BalanceSnapshot(period_type='day', date=day, income_total=income, expense_total=expense))
+        if is_month_end(day):
+            snapshots.append(BalanceSnapshot(period_type='month', date=day, income_total=income, expense_total=expense))
+        day += timedelta(days=1)
+
+    BalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000, ignore_conflicts=True)
+    return len(snapshots)
+
+
+def get_balance_totals():
+    """
+    Возвращает словарь income, expense и balance на текущий момент:
+    последний снимок плюс операции после его даты.
+    """
+    last = BalanceSnapshot.objects.order_by('-date').first()
+    records = FinancialRecord.objects.all()
+    income, expense = ZERO, ZERO
+    if last is not None:
+        income, expense = last.income_total, last.expense_total
+        records = records.filter(created_at__gte=day_start(last.date + timedelta(days=1)))
+    delta = records.aggregate(
+        income=Sum('amount', filter=Q(record_type='income')),
+        expense=Sum('amount', filter=Q(record_type='expense')),
+    )
+    income += delta['income'] or ZERO
+    expense += delta['expense'] or ZERO
+    return {'income': income, 'expense': expense, 'balance': income - expense}
+
+
+def get_fund_balance():
+    """Текущий остаток фонда взаимопомощи"""
+    return get_balance_totals()['balance']
+
+
+def invalidate_from(day):
+    """Удаляет снимки, на которые влияет изменение операций за дату day"""
+    return BalanceSnapshot.objects.filter(date__gte=day).delete()[0]
+
+
+def verify_snapshots(fix=False):
+    """
+    Пересчитывает нарастающие итоги с нуля и сравнивает их со снимками.
+
+    Возвращает список расхождений. С fix=True снимки начиная с первого
+    расхождения удаляются и строятся заново.
+    """
+    totals = daily_totals()
+    days = sorted(totals)
+    mismatches = []
+    income, expense = ZERO, ZERO
+    position = 0
+    for snapshot in BalanceSnapshot.objects.order_by('date', 'period_type').iterator():
+        while position < len(days) and days[position] <= snapshot.date:
+            day_income, day_expense = totals[days[position]]
+            income += day_income
+            expense += day_expense
+            position += 1
+        if snapshot.income_total != income or snapshot.expense_total != expense:
+            mismatches.append(BalanceMismatch(snapshot, income, expense))
+
+    if fix and mismatches:
+        with transaction.atomic():
+            invalidate_from(mismatches[0].snapshot.date)
+            build_snapshots()
+    return mismatches
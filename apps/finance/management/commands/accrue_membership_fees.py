@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.accrual import ACCRUAL_BATCH_SIZE, accrue_period, read_salaries
+from apps.members.importer import parse_decimal
+from apps.members.models import Organization
+
+
+class Command(BaseCommand):
+    help = 'Начисляет членские взносы организации за месяц по файлу окладов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization', help='ID организации')
+        parser.add_argument('period', help='Период в формате ММ.ГГГГ')
+        parser.add_argument('salaries', help='Файл окладов XLSX/CSV (табельный номер, оклад, [процент])')
+        parser.add_argument('--rate', help='Процент взноса по умолчанию')
+        parser.add_argument('--batch-size', type=int, default=ACCRUAL_BATCH_SIZE, help='Размер пакета записи')
+        parser.add_argument('--dry-run', action='store_true', help='Только показать сводку, ничего не записывать')
+
+    def handle(self, *args, **options):
+        try:
+            organization = Organization.objects.get(pk=options['organization'])
+        except (Organization.DoesNotExist, ValueError):
+            raise CommandError('Организация не найдена')
+        try:
+            period = datetime.strptime(options['period'], '%m.%Y').date()
+        except ValueError:
+            raise CommandError('Период должен быть в формате ММ.ГГГГ')
+        rate = parse_decimal(options['rate']) if options['rate'] else None
+
+        salaries = read_salaries(options['salaries'])
+        summary = accrue_period(
+            organization, period, salaries, rate=rate,
+            dry_run=options['dry_run'], batch_size=options['batch_size'],
+        )
+
+        prefix = '[Пробный запуск] ' if options['dry_run'] else ''
+        self.stdout.write(f"{prefix}{organization.short_name}, период {period.strftime('%m.%Y')}")
+        self.stdout.write(f'Действующих членов: {summary.members}')
+        self.stdout.write(f'Уже начислено ранее: {summary.already_accrued}')
+        self.stdout.write(f'К начислению: {summary.to_create} на сумму {summary.total_amount}')
+        if not options['dry_run']:
+            self.stdout.write(f'Создано взносов: {summary.created}')
+        if summary.missing_salary:
+            self.stdout.write(self.style.WARNING(
+                f"Нет оклада в файле: {len(summary.missing_salary)} "
+                f"({', '.join(summary.missing_salary[:10])}{'...' if len(summary.missing_salary) > 10 else ''})"
+            ))
+        self.stdout.write(f'Время: {summary.elapsed:.2f} с, {summary.rows_per_second:.0f} строк/с')
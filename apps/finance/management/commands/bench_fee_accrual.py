@@ -0,0 +1,42 @@
+import random
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from apps.finance.accrual import accrue_period
+from apps.finance.models import MembershipFee
+from apps.members.models import Employee
+from apps.members.synthetic import create_employees, create_organization
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость начисления взносов на синтетической организации'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=20_000, help='Количество членов профсоюза')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Размер пакета записи')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        self.stdout.write(f"Подготовка данных: {options['members']} членов...")
+        organization = create_organization(prefix, departments=20)
+        create_employees(organization, options['members'], prefix)
+        rng = random.Random(0)
+        salaries = {
+            number: (Decimal(rng.randrange(3_000_000, 20_000_000)) / 100, None)
+            for number in Employee.objects.filter(department__organization=organization).values_list('employee_number', flat=True)
+        }
+        period = date.today().replace(day=1)
+        try:
+            for label, dry_run in (('Пробный запуск', True), ('Начисление', False), ('Повторный запуск', False)):
+                summary = accrue_period(organization, period, salaries, dry_run=dry_run, batch_size=options['batch_size'])
+                self.stdout.write(
+                    f'{label}: {summary.members} членов за {summary.elapsed:.2f} с, '
+                    f'{summary.rows_per_second:.0f} строк/с, создано {summary.created}, сумма {summary.total_amount}'
+                )
+        finally:
+            MembershipFee.objects.filter(employee__department__organization=organization).delete()
+            Employee.objects.filter(department__organization=organization).delete()
+            organization.delete()
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.ledger import build_snapshots, get_balance_totals
+
+
+class Command(BaseCommand):
+    help = 'Дописывает снимки остатка фонда взаимопомощи за закрытые дни'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', help='Последняя дата снимка ДД.ММ.ГГГГ (по умолчанию - вчера)')
+
+    def handle(self, *args, **options):
+        until = None
+        if options['until']:
+            try:
+                until = datetime.strptime(options['until'], '%d.%m.%Y').date()
+            except ValueError:
+                raise CommandError('Дата должна быть в формате ДД.ММ.ГГГГ')
+        created = build_snapshots(until)
+        totals = get_balance_totals()
+        self.stdout.write(f'Создано снимков: {created}')
+        self.stdout.write(self.style.SUCCESS(
+            f"Доходы: {totals['income']}, расходы: {totals['expense']}, остаток: {totals['balance']}"
+        ))
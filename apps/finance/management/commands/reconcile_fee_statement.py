@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.finance.reconciliation import reconcile_statement
+
+
+class Command(BaseCommand):
+    help = 'Сверяет выписку удержаний со взносами и отмечает совпавшие взносы оплаченными'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выписки XLSX/CSV (табельный номер, период, сумма)')
+        parser.add_argument('--user', required=True, help='Имя пользователя, от имени которого проводится оплата')
+        parser.add_argument('--apply', action='store_true', help='Провести оплату (без флага - только сверка)')
+        parser.add_argument('--report', help='Путь для CSV-отчета о несопоставленных строках')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь не найден: {options['user']}")
+
+        result = reconcile_statement(options['path'], user, apply=options['apply'])
+        self.stdout.write(f'Сопоставлено: {len(result.matched)}')
+        if options['apply']:
+            self.stdout.write(f'Оплачено взносов: {result.applied} на сумму {result.income_total}')
+        self.stdout.write(f'Не сопоставлено: {len(result.unmatched)}')
+        self.stdout.write(f'Повторы в выписке: {len(result.duplicates)}')
+        self.stdout.write(f'Некорректные строки: {len(result.invalid)}')
+
+        if options['report'] and (result.unmatched or result.duplicates or result.invalid):
+            with open(options['report'], 'w', newline='', encoding='utf-8-sig') as fileobj:
+                result.write_report(fileobj)
+            self.stdout.write(self.style.WARNING(f"Отчет: {options['report']}"))
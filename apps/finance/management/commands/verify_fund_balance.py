@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.finance.ledger import verify_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает остаток фонда с нуля и сверяет его со снимками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Перестроить снимки начиная с первого расхождения')
+
+    def handle(self, *args, **options):
+        mismatches = verify_snapshots(fix=options['fix'])
+        for mismatch in mismatches:
+            snapshot = mismatch.snapshot
+            self.stdout.write(self.style.WARNING(
+                f"{snapshot.get_period_type_display()} {snapshot.date.strftime('%d.%m.%Y')}: "
+                f"доходы {snapshot.income_total} (ожидается {mismatch.income_total}), "
+                f"расходы {snapshot.expense_total} (ожидается {mismatch.expense_total})"
+            ))
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Снимки перестроены, расхождений было: {len(mismatches)}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Расхождений: {len(mismatches)}'))
@@ -66,6 +66,8 @@ class FinancialSupportRequest(models.Model):
         ('cancelled', 'Отменена'),
     ]
 
+    OPEN_STATUSES = ('created', 'reviewing', 'approved')
+
     SUPPORT_REASON_CHOICES = [
         ('material_aid', 'Материальная помощь'),
         ('child_birth', 'Рождение ребенка'),
@@ -82,6 +84,8 @@ class FinancialSupportRequest(models.Model):
     description = models.TextField(verbose_name='Описание')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='created', verbose_name='Статус')
     supporting_documents = models.FileField(upload_to='support_docs/', null=True, blank=True, verbose_name='Документы-основания')
+    reviewer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_requests', verbose_name='Рассматривает')
+    review_started_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата начала рассмотрения')
     approved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='approved_requests', verbose_name='Одобрено кем')
     approved_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата одобрения')
     payment_document = models.FileField(upload_to='payment_docs/', null=True, blank=True, verbose_name='Платежное поручение')
@@ -93,6 +97,18 @@ class FinancialSupportRequest(models.Model):
         verbose_name = 'Заявка на выплату'
         verbose_name_plural = 'Заявки на выплаты'
         ordering = ['-created_at']
+        indexes = [
+            # Очереди открытых заявок: фильтр по статусу, порядок (created_at, id)
+            models.Index(
+                fields=['status', 'created_at', 'id'], name='finance_support_open_idx',
+                condition=models.Q(status__in=['created', 'reviewing', 'approved']),
+            ),
+            models.Index(
+                fields=['reviewer', 'review_started_at'], name='finance_support_review_idx',
+                condition=models.Q(status='reviewing'),
+            ),
+            models.Index(fields=['status', '-created_at'], name='finance_support_status_idx'),
+        ]
 
     def __str__(self):
         return f"Заявка {self.employee.full_name} - {self.get_reason_display()} ({self.amount})"
@@ -119,6 +135,9 @@ class FinancialRecord(models.Model):
         verbose_name = 'Финансовая запись'
         verbose_name_plural = 'Финансовые записи'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['record_type', 'created_at'], name='finance_record_type_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_record_type_display()} {self.amount} - {self.description}"
@@ -143,4 +162,38 @@ class FinancialReport(models.Model):
         ordering = ['-generated_at']
 
     def __str__(self):
-        return f"{self.title} ({self.period_start.strftime('%d.%m.%Y')} - {self.period_end.strftime('%d.%m.%Y')})"
\ No newline at end of file
+        return f"{self.title} ({self.period_start.strftime('%d.%m.%Y')} - {self.period_end.strftime('%d.%m.%Y')})"
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Модель снимка остатка фонда на конец дня или месяца
+
+    Хранит нарастающие итоги доходов и расходов по всем финансовым записям,
+    созданным не позже конца даты снимка.
+    """
+    PERIOD_TYPE_CHOICES = [
+        ('day', 'День'),
+        ('month', 'Месяц'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    period_type = models.CharField(max_length=10, choices=PERIOD_TYPE_CHOICES, verbose_name='Тип периода')
+    date = models.DateField(verbose_name='Дата закрытия периода')
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Доходы нарастающим итогом')
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Расходы нарастающим итогом')
+    computed_at = models.DateTimeField(auto_now=True, verbose_name='Дата расчета')
+
+    class Meta:
+        verbose_name = 'Снимок остатка фонда'
+        verbose_name_plural = 'Снимки остатка фонда'
+        ordering = ['-date']
+        unique_together = ['period_type', 'date']
+
+    def __str__(self):
+        return f"Остаток на {self.date.strftime('%d.%m.%Y')}: {self.balance}"
+
+    @property
+    def balance(self):
+        """Остаток фонда на конец периода"""
+        return self.income_total - self.expense_total
@@ -0,0 +1,139 @@
+"""
+Очереди заявок на выплату из фонда взаимопомощи.
+
+Очередь - заявки одного или нескольких статусов в порядке поступления
+(created_at, id). Страницы выбираются по ключу, а не через OFFSET, и
+загружаются одним запросом вместе с сотрудником, подразделением, заявителем,
+одобрившим и рассматривающим пользователем. Взятие заявок в работу
+блокирует строки с SKIP LOCKED, поэтому несколько бухгалтеров разбирают
+очередь параллельно, не получая одни и те же заявки.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.finance.models import FinancialSupportRequest
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+MAX_CLAIM = 50
+CLAIM_TIMEOUT = timedelta(hours=4)
+
+
+class InvalidCursor(ValueError):
+    """Некорректный курсор страницы"""
+
+
+def queue_queryset(statuses=None, queryset=None):
+    """Возвращает заявки указанных статусов с подгруженными связанными данными"""
+    if queryset is None:
+        queryset = FinancialSupportRequest.objects.all()
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    return (
+        queryset.select_related('employee__department__organization', 'requestor', 'approved_by', 'reviewer')
+        .defer('employee__search_vector')
+        .order_by('created_at', 'id')
+    )
+
+
+def encode_cursor(support_request):
+    """Кодирует позицию заявки в очереди в строку курсора"""
+    payload = json.dumps([support_request.created_at.isoformat(), str(support_request.pk)])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Декодирует строку курсора в пару (created_at, id)"""
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        return datetime.fromisoformat(created_at), uuid.UUID(pk)
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise InvalidCursor('Некорректный курсор страницы') from exc
+
+
+class QueuePage:
+    """
+    Страница очереди заявок
+    """
+
+    def __init__(self, requests, next_cursor, page_size):
+        self.requests = requests
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(self.requests)
+
+    def __len__(self):
+        return len(self.requests)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def get_queue_page(statuses=None, cursor=None, page_size=DEFAULT_PAGE_SIZE, queryset=None):
+    """Возвращает страницу очереди после позиции cursor за один запрос"""
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    queryset = queue_queryset(statuses or FinancialSupportRequest.OPEN_STATUSES, queryset)
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    requests = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(requests) > page_size:
+        requests = requests[:page_size]
+        next_cursor = encode_cursor(requests[-1])
+    return QueuePage(requests, next_cursor, page_size)
+
+
+def claim_next(user, count=1, queryset=None):
+    """
+    Берет в работу до count самых старых новых заявок (из queryset,
+    если он передан).
+
+    Заблокированные другой транзакцией заявки пропускаются, поэтому
+    параллельные вызовы получают разные заявки. Возвращает список
+    заявок, перешедших в статус «На рассмотрении».
+    """
+    count = max(1, min(int(count), MAX_CLAIM))
+    now = timezone.now()
+    with transaction.atomic():
+        # Блокируем только строки заявок, не строки сотрудников из JOIN области видимости
+        if queryset is None:
+            queryset = FinancialSupportRequest.objects.all()
+        ids = list(
+            queryset.select_for_update(skip_locked=True, of=('self',))
+            .filter(status='created')
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)[:count]
+        )
+        if not ids:
+            return []
+        FinancialSupportRequest.objects.filter(pk__in=ids).update(
+            status='reviewing', reviewer=user, review_started_at=now, updated_at=now,
+        )
+    return list(queue_queryset(queryset=FinancialSupportRequest.objects.filter(pk__in=ids)))
+
+
+def release_claim(request_id, user):
+    """Возвращает заявку, взятую пользователем в работу, в очередь новых"""
+    return FinancialSupportRequest.objects.filter(pk=request_id, status='reviewing', reviewer=user).update(
+        status='created', reviewer=None, review_started_at=None, updated_at=timezone.now(),
+    )
+
+
+def release_stale_claims(timeout=CLAIM_TIMEOUT):
+    """Возвращает в очередь заявки, рассмотрение которых не завершено за timeout"""
+    now = timezone.now()
+    return FinancialSupportRequest.objects.filter(
+        status='reviewing', review_started_at__lt=now - timeout,
+    ).update(status='created', reviewer=None, review_started_at=None, updated_at=now)
@@ -0,0 +1,181 @@
+"""
+Сверка банковских выписок (удержаний из зарплаты) с членскими взносами.
+
+Строки выписки сопоставляются с неоплаченными взносами по табельному номеру
+и периоду через словарь в памяти, загруженный одним запросом. Совпадения
+отмечаются оплаченными одним bulk_update на порцию, а по каждому оплаченному
+взносу пакетно создается доходная финансовая запись.
+"""
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.finance.models import FinancialRecord, MembershipFee
+from apps.members.importer import parse_date, parse_decimal, read_rows
+
+
+RECONCILIATION_CHUNK_SIZE = 1000
+
+NUMBER_COLUMNS = ('табельный номер', 'employee_number')
+PERIOD_COLUMNS = ('период', 'period')
+AMOUNT_COLUMNS = ('сумма', 'amount')
+
+
+@dataclass
+class StatementLine:
+    row: int
+    employee_number: str
+    period: object
+    amount: Decimal
+
+    @property
+    def key(self):
+        return self.employee_number, self.period
+
+
+@dataclass
+class ReconciliationResult:
+    matched: list = field(default_factory=list)
+    unmatched: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+    invalid: list = field(default_factory=list)
+    applied: int = 0
+    income_total: Decimal = Decimal('0.00')
+
+    def write_report(self, fileobj):
+        """Записывает несопоставленные, повторяющиеся и некорректные строки в CSV"""
+        writer = csv.writer(fileobj, delimiter=';')
+        writer.writerow(['Строка', 'Табельный номер', 'Период', 'Сумма', 'Причина'])
+        for line, reason in self.unmatched:
+            writer.writerow([line.row, line.employee_number, line.period.strftime('%m.%Y'), line.amount, reason])
+        for line in self.duplicates:
+            writer.writerow([line.row, line.employee_number, line.period.strftime('%m.%Y'), line.amount, 'Повтор строки в выписке'])
+        for row, message in self.invalid:
+            writer.writerow([row, '', '', '', message])
+
+
+def parse_period(value):
+    """Период выписки: ММ.ГГГГ или дата; приводится к первому числу месяца"""
+    if isinstance(value, str) and len(value.strip()) == 7:
+        return datetime.strptime(value.strip(), '%m.%Y').date()
+    return parse_date(value).replace(day=1)
+
+
+def pick(values, columns):
+    return next((values[column] for column in columns if values.get(column) not in (None, '')), None)
+
+
+def read_statement(path, result):
+    """Читает выписку; некорректные строки попадают в result.invalid"""
+    lines = []
+    for row, raw in read_rows(path):
+        values = {str(key).strip().lower(): value for key, value in raw.items()}
+        number, period, amount = pick(values, NUMBER_COLUMNS), pick(values, PERIOD_COLUMNS), pick(values, AMOUNT_COLUMNS)
+        if number is None or period is None or amount is None:
+            result.invalid.append((row, 'Не заполнены табельный номер, период или сумма'))
+            continue
+        try:
+            lines.append(StatementLine(row, str(number).strip(), parse_period(period), parse_decimal(amount)))
+        except ValueError as exc:
+            result.invalid.append((row, str(exc)))
+    return lines
+
+
+def build_fee_index(periods):
+    """
+    Словарь неоплаченных взносов {(табельный номер, период): взнос} и
+    множество ключей уже оплаченных взносов за указанные периоды.
+    """
+    fees = (
+        MembershipFee.objects.filter(period__in=periods)
+        .select_related('employee')
+        .only('id', 'amount', 'period', 'paid_at', 'paid_by', 'updated_at', 'employee__employee_number', 'employee__full_name')
+        .order_by()
+    )
+    open_fees = {}
+    paid = set()
+    for fee in fees.iterator(chunk_size=RECONCILIATION_CHUNK_SIZE):
+        key = (fee.employee.employee_number, fee.period)
+        if fee.paid_at is None:
+            open_fees[key] = fee
+        else:
+            paid.add(key)
+    return open_fees, paid
+
+
+def match_lines(lines, result):
+    """Сопоставляет строки выписки со взносами; возвращает пары (строка, взнос)"""
+    open_fees, paid = build_fee_index({line.period for line in lines})
+    seen = set()
+    for line in lines:
+        if line.key in seen:
+            result.duplicates.append(line)
+            continue
+        seen.add(line.key)
+        fee = open_fees.get(line.key)
+        if fee is None:
+            reason = 'Взнос уже оплачен' if line.key in paid else 'Взнос не найден'
+            result.unmatched.append((line, reason))
+        elif fee.amount != line.amount:
+            result.unmatched.append((line, f'Сумма не совпадает с начислением ({fee.amount})'))
+        else:
+            result.matched.append((line, fee))
+    return result.matched
+
+
+def apply_matches(matches, user, result, chunk_size=RECONCILIATION_CHUNK_SIZE):
+    """Отмечает взносы оплаченными и создает доходные записи порциями"""
+    now = timezone.now()
+    already_paid = set()
+    for start in range(0, len(matches), chunk_size):
+        chunk = matches[start:start + chunk_size]
+        with transaction.atomic():
+            # Взнос могли оплатить вручную после загрузки выписки
+            still_open = set(
+                MembershipFee.objects.select_for_update()
+                .filter(pk__in=[fee.pk for _, fee in chunk], paid_at__isnull=True)
+                .values_list('pk', flat=True)
+            )
+            fees = []
+            records = []
+            for line, fee in chunk:
+                if fee.pk not in still_open:
+                    already_paid.add(fee.pk)
+                    result.unmatched.append((line, 'Взнос уже оплачен'))
+                    continue
+                fee.paid_at = now
+                fee.paid_by = user
+                fee.updated_at = now
+                fees.append(fee)
+                records.append(FinancialRecord(
+                    record_type='income',
+                    amount=fee.amount,
+                    description=f"Членский взнос {fee.employee.full_name} ({line.employee_number}) за {fee.period.strftime('%m.%Y')}",
+                    created_by=user,
+                ))
+            MembershipFee.objects.bulk_update(fees, ['paid_at', 'paid_by', 'updated_at'])
+            FinancialRecord.objects.bulk_create(records)
+        result.applied += len(fees)
+        result.income_total += sum((fee.amount for fee in fees), Decimal('0.00'))
+    if already_paid:
+        # Строка, взнос которой оплатили после сопоставления, остается только среди несопоставленных
+        result.matched = [(line, fee) for line, fee in result.matched if fee.pk not in already_paid]
+
+
+def reconcile_statement(path, user, apply=False):
+    """
+    Сверяет выписку со взносами.
+
+    Без apply только сопоставляет строки; с apply отмечает взносы оплаченными
+    и создает доходные финансовые записи.
+    """
+    result = ReconciliationResult()
+    lines = read_statement(path, result)
+    matches = match_lines(lines, result)
+    if apply and matches:
+        apply_matches(matches, user, result)
+    return result
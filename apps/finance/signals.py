@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.finance.ledger import invalidate_from
+from apps.finance.models import FinancialRecord
+
+
+@receiver(post_save, sender=FinancialRecord)
+def invalidate_balance_on_save(sender, instance, raw=False, **kwargs):
+    """Сбрасывает снимки остатка, если запись относится к закрытому дню"""
+    if raw or instance.created_at is None:
+        return
+    invalidate_from(timezone.localdate(instance.created_at))
+
+
+@receiver(post_delete, sender=FinancialRecord)
+def invalidate_balance_on_delete(sender, instance, **kwargs):
+    """Сбрасывает снимки остатка после удаления записи"""
+    if instance.created_at is not None:
+        invalidate_from(timezone.localdate(instance.created_at))
@@ -0,0 +1,16 @@
+from celery import shared_task
+
+from apps.finance.ledger import build_snapshots
+from apps.finance.queues import release_stale_claims
+
+
+@shared_task(ignore_result=True)
+def build_balance_snapshots():
+    """Дописывает снимки остатка фонда за закрытые дни"""
+    build_snapshots()
+
+
+@shared_task(ignore_result=True)
+def release_stale_support_claims():
+    """Возвращает в очередь заявки, зависшие на рассмотрении"""
+    release_stale_claims()
@@ -10,6 +10,9 @@ urlpatterns = [
     path('membership-fees/<uuid:fee_id>/pay/', views.pay_membership_fee_view, name='pay_membership_fee'),
     # Заявки на выплаты
     path('support-requests/', views.support_requests_list_view, name='support_requests_list'),
+    path('support-requests/queue/', views.support_request_queue_view, name='support_request_queue'),
+    path('support-requests/queue/claim/', views.claim_support_requests_view, name='claim_support_requests'),
+    path('support-requests/<uuid:request_id>/release/', views.release_support_request_view, name='release_support_request'),
     path('support-requests/create/', views.create_support_request_view, name='create_support_request'),
     path('support-requests/<uuid:request_id>/', views.support_request_detail_view, name='support_request_detail'),
     path('support-requests/<uuid:request_id>/approve/', views.approve_support_request_view, name='approve_support_request'),
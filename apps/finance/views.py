@@ -0,0 +1,88 @@
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from apps.authentication.scope import filter_by_scope
+from apps.finance.models import FinancialSupportRequest
+from apps.finance.queues import InvalidCursor, claim_next, get_queue_page, release_claim
+from apps.reports.views import create_report_job_response
+
+
+QUEUE_ROLES = ('admin', 'chairman', 'accountant')
+
+
+def support_request_payload(support_request):
+    employee = support_request.employee
+    return {
+        'id': str(support_request.pk),
+        'status': support_request.status,
+        'status_display': support_request.get_status_display(),
+        'reason': support_request.get_reason_display(),
+        'amount': str(support_request.amount),
+        'created_at': support_request.created_at.isoformat(),
+        'employee': employee.full_name,
+        'employee_number': employee.employee_number,
+        'department': employee.department.name,
+        'organization': employee.department.organization.short_name,
+        'requestor': support_request.requestor.get_full_name() or support_request.requestor.username,
+        'reviewer': support_request.reviewer.username if support_request.reviewer_id else None,
+        'approved_by': support_request.approved_by.username if support_request.approved_by_id else None,
+    }
+
+
+def check_queue_access(user):
+    if user.role not in QUEUE_ROLES:
+        raise PermissionDenied
+
+
+def scoped_requests(user):
+    """Заявки сотрудников организаций из области пользователя"""
+    return filter_by_scope(FinancialSupportRequest.objects.all(), user, department_field='employee__department')
+
+
+@login_required
+@require_GET
+def support_request_queue_view(request):
+    """Страница очереди заявок (статусы через запятую в параметре status)"""
+    check_queue_access(request.user)
+    valid = dict(FinancialSupportRequest.STATUS_CHOICES)
+    statuses = [status for status in request.GET.get('status', '').split(',') if status in valid]
+    try:
+        page = get_queue_page(
+            statuses, request.GET.get('cursor'), request.GET.get('page_size', 50),
+            queryset=scoped_requests(request.user),
+        )
+    except (InvalidCursor, ValueError):
+        return HttpResponseBadRequest('Некорректные параметры страницы')
+    return JsonResponse({
+        'results': [support_request_payload(item) for item in page],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+@require_POST
+def claim_support_requests_view(request):
+    """Взять в работу следующие заявки из очереди"""
+    check_queue_access(request.user)
+    try:
+        claimed = claim_next(request.user, request.POST.get('count', 1), queryset=scoped_requests(request.user))
+    except ValueError:
+        return HttpResponseBadRequest('Некорректное количество заявок')
+    return JsonResponse({'results': [support_request_payload(item) for item in claimed]})
+
+
+@login_required
+@require_POST
+def release_support_request_view(request, request_id):
+    """Вернуть взятую в работу заявку в очередь"""
+    check_queue_access(request.user)
+    return JsonResponse({'released': bool(release_claim(request_id, request.user))})
+
+
+@login_required
+@require_POST
+def create_financial_report_view(request):
+    """Поставить финансовый отчет в очередь (формируется воркером Celery)"""
+    return create_report_job_response(request, 'financial')
@@ -0,0 +1,32 @@
+from django.contrib import admin, messages
+
+from apps.mailing.models import Mailing, MailingDelivery
+from apps.mailing.sending import queue_mailing
+
+
+@admin.register(Mailing)
+class MailingAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'audience', 'status', 'recipients_count', 'sent_count', 'failed_count', 'created_at']
+    list_filter = ['status', 'audience']
+    filter_horizontal = ['departments']
+    readonly_fields = ['status', 'recipients_count', 'sent_count', 'failed_count', 'created_by', 'started_at', 'finished_at']
+    actions = ['send_mailings']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description='Отправить выбранные рассылки')
+    def send_mailings(self, request, queryset):
+        queued = sum(queue_mailing(mailing) for mailing in queryset.filter(status='draft'))
+        self.message_user(request, f'Поставлено в очередь рассылок: {queued}', messages.SUCCESS)
+
+
+@admin.register(MailingDelivery)
+class MailingDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['email', 'mailing', 'status', 'attempts', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['email', 'recipient_name']
+    list_select_related = ['mailing']
+    readonly_fields = [field.name for field in MailingDelivery._meta.fields]
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.mailing.models import Mailing
+from apps.mailing.sending import finalize_mailing, pending_chunks, prepare_deliveries, send_chunk
+
+
+class Command(BaseCommand):
+    help = 'Отправляет рассылку в текущем процессе (без воркеров Celery)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mailing_id', help='ID рассылки')
+
+    def handle(self, *args, **options):
+        try:
+            mailing = Mailing.objects.select_related('news_post', 'voting').get(pk=options['mailing_id'])
+        except (Mailing.DoesNotExist, ValueError):
+            raise CommandError('Рассылка не найдена')
+        if mailing.status in ('sent', 'cancelled'):
+            raise CommandError(f'Рассылка уже в статусе «{mailing.get_status_display()}»')
+
+        Mailing.objects.filter(pk=mailing.pk).update(status='sending')
+        recipients = prepare_deliveries(mailing)
+        self.stdout.write(f'Получателей: {recipients}')
+        sent = failed = retry = 0
+        for delivery_ids in pending_chunks(mailing):
+            result = send_chunk(mailing, delivery_ids)
+            sent += result.sent
+            failed += result.failed
+            retry += len(result.retry_ids)
+            self.stdout.write(f'Отправлено: {sent}, не доставлено: {failed}, к повтору: {retry}')
+        finalize_mailing(mailing.pk)
+        if retry:
+            self.stdout.write(self.style.WARNING('Часть писем будет отправлена при следующем запуске'))
@@ -0,0 +1,90 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from apps.members.models import Department, Employee, Organization
+import uuid
+
+
+User = get_user_model()
+
+
+class Mailing(models.Model):
+    """
+    Модель рассылки
+    """
+    AUDIENCE_CHOICES = [
+        ('all', 'Все члены профсоюза'),
+        ('organization', 'Организация'),
+        ('departments', 'Подразделения'),
+        ('voting', 'Участники голосования'),
+    ]
+
+    STATUS_CHOICES = [
+        ('draft', 'Черновик'),
+        ('queued', 'В очереди'),
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлена'),
+        ('failed', 'Ошибка'),
+        ('cancelled', 'Отменена'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body_template = models.TextField(verbose_name='Шаблон текста', help_text='Шаблон Django; доступны recipient_name, organization, news_post, voting')
+    html_template = models.TextField(blank=True, verbose_name='Шаблон HTML')
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default='all', verbose_name='Получатели')
+    organization = models.ForeignKey(Organization, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Организация')
+    departments = models.ManyToManyField(Department, blank=True, verbose_name='Подразделения')
+    voting = models.ForeignKey('voting.Voting', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Голосование')
+    news_post = models.ForeignKey('news.NewsPost', on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Новость')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name='Статус')
+    recipients_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Получателей')
+    sent_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Отправлено')
+    failed_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Не доставлено')
+    error = models.TextField(blank=True, editable=False, verbose_name='Ошибка')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Создано кем')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начало отправки')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание отправки')
+
+    class Meta:
+        verbose_name = 'Рассылка'
+        verbose_name_plural = 'Рассылки'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.subject
+
+
+class MailingDelivery(models.Model):
+    """
+    Модель доставки рассылки одному получателю
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Ожидает отправки'),
+        ('sending', 'Отправляется'),
+        ('sent', 'Отправлено'),
+        ('failed', 'Не доставлено'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    mailing = models.ForeignKey(Mailing, on_delete=models.CASCADE, related_name='deliveries', verbose_name='Рассылка')
+    employee = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Сотрудник')
+    email = models.EmailField(verbose_name='Email')
+    recipient_name = models.CharField(max_length=255, blank=True, verbose_name='Имя получателя')
+    variant = models.CharField(max_length=64, blank=True, verbose_name='Вариант письма')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name='Следующая попытка')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата отправки')
+
+    class Meta:
+        verbose_name = 'Доставка рассылки'
+        verbose_name_plural = 'Доставки рассылок'
+        unique_together = ['mailing', 'email']
+        indexes = [
+            models.Index(fields=['mailing', 'status', 'next_attempt_at'], name='mailing_delivery_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.email} - {self.get_status_display()}"
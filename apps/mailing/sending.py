@@ -0,0 +1,291 @@
+"""
+Отправка рассылок.
+
+Получатели выбираются одним запросом и записываются в MailingDelivery
+пакетами. Текст письма отрисовывается один раз на вариант (организацию
+получателя) и кэшируется; имя получателя подставляется в готовый текст.
+Воркеры Celery отправляют порции доставок через одно SMTP-соединение на
+порцию, соблюдая общий для всех воркеров лимит писем в секунду. Временные
+ошибки повторяются с экспоненциальной задержкой, у каждой доставки хранится
+свой статус.
+"""
+import logging
+import smtplib
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, Exists, F, Q
+from django.template import Context, Template
+from django.utils import timezone
+from django.utils.html import escape
+
+from apps.mailing.models import Mailing, MailingDelivery
+from apps.members.models import Employee, Organization
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': None,
+    'FROM_EMAIL': None,
+    'CHUNK_SIZE': 200,
+    'RATE_PER_SECOND': 10,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 60,
+    'LEASE': 15 * 60,
+}
+
+VARIANT_TTL = 60 * 60
+RECIPIENT_NAME = '\x00recipient_name\x00'
+INSERT_BATCH_SIZE = 2000
+
+
+def get_mailing_setting(name):
+    """Возвращает параметр рассылок из settings.MAILING"""
+    return getattr(settings, 'MAILING', {}).get(name, DEFAULTS[name])
+
+
+def get_mail_connection():
+    """SMTP-соединение (или соединение бэкенда из настроек) для порции писем"""
+    return get_connection(backend=get_mailing_setting('BACKEND'), fail_silently=False)
+
+
+def recipients_queryset(mailing):
+    """Действующие члены профсоюза с адресом электронной почты из аудитории рассылки"""
+    employees = Employee.objects.filter(status='active').exclude(email='')
+    if mailing.audience == 'organization':
+        employees = employees.filter(department__organization_id=mailing.organization_id)
+    elif mailing.audience == 'departments':
+        employees = employees.filter(
+            department_id__in=Mailing.departments.through.objects.filter(mailing_id=mailing.pk).values('department_id')
+        )
+    elif mailing.audience == 'voting':
+        from apps.voting.models import Voting
+
+        audience = Voting.target_audience.through.objects.filter(voting_id=mailing.voting_id)
+        # Голосование без целевой аудитории проводится среди всех членов профсоюза
+        employees = employees.filter(Q(department_id__in=audience.values('department_id')) | ~Exists(audience))
+    return employees.order_by()
+
+
+def prepare_deliveries(mailing):
+    """
+    Создает доставки для всех получателей рассылки.
+    Повторный вызов не создает дублей. Возвращает число получателей.
+    """
+    rows = recipients_queryset(mailing).values_list('id', 'email', 'full_name', 'department__organization_id')
+    seen = set()
+    batch = []
+    for employee_id, email, full_name, organization_id in rows.iterator(chunk_size=INSERT_BATCH_SIZE):
+        email = email.strip().lower()
+        if email in seen:
+            continue
+        seen.add(email)
+        batch.append(MailingDelivery(
+            mailing=mailing, employee_id=employee_id, email=email, recipient_name=full_name,
+            variant=str(organization_id),
+        ))
+        if len(batch) >= INSERT_BATCH_SIZE:
+            MailingDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        MailingDelivery.objects.bulk_create(batch, ignore_conflicts=True)
+    Mailing.objects.filter(pk=mailing.pk).update(recipients_count=len(seen))
+    return len(seen)
+
+
+def render_variant(mailing, variant):
+    """
+    Возвращает тройку (тема, текст, HTML) для варианта письма.
+
+    Шаблоны отрисовываются один раз на вариант, вместо имени получателя
+    подставляется метка RECIPIENT_NAME.
+    """
+    key = f'mailing:{mailing.pk}:variant:{variant}'
+    rendered = cache.get(key)
+    if rendered is not None:
+        return rendered
+    organization = Organization.objects.filter(pk=variant).first() if variant else None
+    context = Context({
+        'recipient_name': RECIPIENT_NAME,
+        'organization': organization,
+        'news_post': mailing.news_post,
+        'voting': mailing.voting,
+    }, autoescape=False)
+    text = Template(mailing.body_template).render(context)
+    html = ''
+    if mailing.html_template:
+        context.autoescape = True
+        html = Template(mailing.html_template).render(context)
+    rendered = (mailing.subject, text, html)
+    cache.set(key, rendered, timeout=VARIANT_TTL)
+    return rendered
+
+
+def build_message(mailing, delivery, connection):
+    """Письмо одному получателю из отрисованного варианта"""
+    subject, text, html = render_variant(mailing, delivery.variant)
+    message = EmailMultiAlternatives(
+        subject=subject,
+        body=text.replace(RECIPIENT_NAME, delivery.recipient_name),
+        from_email=get_mailing_setting('FROM_EMAIL') or settings.DEFAULT_FROM_EMAIL,
+        to=[delivery.email],
+        connection=connection,
+    )
+    if html:
+        message.attach_alternative(html.replace(RECIPIENT_NAME, escape(delivery.recipient_name)), 'text/html')
+    return message
+
+
+class RateLimiter:
+    """
+    Ограничение числа писем в секунду, общее для всех воркеров (счетчик в кэше)
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate or get_mailing_setting('RATE_PER_SECOND')
+
+    def acquire(self):
+        while True:
+            now = time.time()
+            key = f'mailing:rate:{int(now)}'
+            cache.add(key, 0, timeout=5)
+            try:
+                sent = cache.incr(key)
+            except ValueError:
+                continue
+            if sent <= self.rate:
+                return
+            time.sleep(int(now) + 1 - now)
+
+
+@dataclass
+class ChunkResult:
+    sent: int = 0
+    failed: int = 0
+    retry_ids: list = None
+    retry_delay: int = 0
+
+
+def claim_deliveries(delivery_ids):
+    """
+    Забирает доставки в отправку. Доставки, которые взял другой воркер,
+    пропускаются; зависшие дольше LEASE (воркер упал) забираются повторно.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            MailingDelivery.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=delivery_ids)
+            .filter(
+                Q(status='pending', next_attempt_at__isnull=True)
+                | Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', next_attempt_at__lt=now)
+            )
+            .values_list('id', flat=True)
+        )
+        MailingDelivery.objects.filter(pk__in=ids).update(
+            status='sending', attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=get_mailing_setting('LEASE')),
+        )
+    return list(MailingDelivery.objects.filter(pk__in=ids))
+
+
+def send_chunk(mailing, delivery_ids, limiter=None):
+    """Отправляет порцию доставок через одно соединение"""
+    limiter = limiter or RateLimiter()
+    deliveries = claim_deliveries(delivery_ids)
+    result = ChunkResult(retry_ids=[])
+    if not deliveries:
+        return result
+
+    max_attempts = get_mailing_setting('MAX_ATTEMPTS')
+    backoff = get_mailing_setting('RETRY_BACKOFF')
+    connection = get_mail_connection()
+    connection.open()
+    try:
+        for delivery in deliveries:
+            limiter.acquire()
+            try:
+                build_message(mailing, delivery, connection).send()
+            except smtplib.SMTPRecipientsRefused as exc:
+                # Адрес отклонен сервером: повтор не поможет
+                delivery.status = 'failed'
+                delivery.last_error = str(exc)
+                delivery.next_attempt_at = None
+                result.failed += 1
+            except (smtplib.SMTPException, OSError) as exc:
+                delivery.last_error = str(exc)
+                if delivery.attempts >= max_attempts:
+                    delivery.status = 'failed'
+                    delivery.next_attempt_at = None
+                    result.failed += 1
+                else:
+                    delay = backoff * 2 ** (delivery.attempts - 1)
+                    delivery.status = 'pending'
+                    delivery.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                    result.retry_ids.append(delivery.pk)
+                    result.retry_delay = max(result.retry_delay, delay)
+                # После ошибки соединение может быть разорвано
+                connection.close()
+                connection.open()
+            except Exception as exc:
+                # Ошибка шаблона или данных: повтор даст тот же результат
+                logger.exception('Не удалось сформировать письмо доставки %s', delivery.pk)
+                delivery.status = 'failed'
+                delivery.last_error = str(exc)
+                delivery.next_attempt_at = None
+                result.failed += 1
+            else:
+                delivery.status = 'sent'
+                delivery.sent_at = timezone.now()
+                delivery.last_error = ''
+                delivery.next_attempt_at = None
+                result.sent += 1
+    finally:
+        connection.close()
+        MailingDelivery.objects.bulk_update(deliveries, ['status', 'sent_at', 'last_error', 'next_attempt_at'])
+    return result
+
+
+def pending_chunks(mailing, chunk_size=None):
+    """Списки ID доставок, ожидающих отправки или брошенных упавшим воркером, порциями"""
+    chunk_size = chunk_size or get_mailing_setting('CHUNK_SIZE')
+    ids = list(
+        MailingDelivery.objects.filter(mailing=mailing)
+        .filter(Q(status='pending') | Q(status='sending', next_attempt_at__lt=timezone.now()))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    return [ids[start:start + chunk_size] for start in range(0, len(ids), chunk_size)]
+
+
+def finalize_mailing(mailing_id):
+    """Завершает рассылку, если не осталось неотправленных доставок"""
+    counts = dict(
+        MailingDelivery.objects.filter(mailing_id=mailing_id)
+        .values_list('status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    update = {'sent_count': counts.get('sent', 0), 'failed_count': counts.get('failed', 0)}
+    if counts.get('pending') or counts.get('sending'):
+        Mailing.objects.filter(pk=mailing_id).update(**update)
+        return False
+    Mailing.objects.filter(pk=mailing_id, status='sending').update(status='sent', finished_at=timezone.now(), **update)
+    return True
+
+
+def queue_mailing(mailing):
+    """Ставит рассылку в очередь отправки"""
+    from apps.mailing.tasks import start_mailing
+
+    updated = Mailing.objects.filter(pk=mailing.pk, status='draft').update(status='queued')
+    if updated:
+        transaction.on_commit(lambda: start_mailing.delay(str(mailing.pk)))
+    return bool(updated)
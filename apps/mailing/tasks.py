@@ -0,0 +1,59 @@
+import logging
+import smtplib
+
+from celery import shared_task
+from django.utils import timezone
+
+from apps.mailing.models import Mailing
+from apps.mailing.sending import finalize_mailing, get_mailing_setting, pending_chunks, prepare_deliveries, send_chunk
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def start_mailing(mailing_id):
+    """
+    Готовит доставки рассылки и распределяет их порциями по воркерам.
+
+    Задача идемпотентна: доставки готовятся, пока рассылка в очереди, и
+    повторная доставка сообщения подготовит их снова без дублей; для
+    отправляемой рассылки заново распределяются неотправленные доставки.
+    """
+    mailing = Mailing.objects.filter(pk=mailing_id, status__in=['queued', 'sending']).first()
+    if mailing is None:
+        return
+    try:
+        if mailing.status == 'queued':
+            prepare_deliveries(mailing)
+            Mailing.objects.filter(pk=mailing_id, status='queued').update(status='sending', started_at=timezone.now())
+        chunks = pending_chunks(mailing)
+        for delivery_ids in chunks:
+            send_mailing_chunk.delay(mailing_id, [str(pk) for pk in delivery_ids])
+    except Exception as exc:
+        logger.exception('Не удалось запустить рассылку %s', mailing_id)
+        Mailing.objects.filter(pk=mailing_id, status__in=['queued', 'sending']).update(
+            status='failed', error=str(exc), finished_at=timezone.now(),
+        )
+        return
+    if not chunks:
+        finalize_mailing(mailing_id)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=None)
+def send_mailing_chunk(self, mailing_id, delivery_ids):
+    """Отправляет порцию писем через одно соединение"""
+    mailing = Mailing.objects.select_related('news_post', 'voting').get(pk=mailing_id)
+    if mailing.status != 'sending':
+        return
+    try:
+        result = send_chunk(mailing, delivery_ids)
+    except (smtplib.SMTPException, OSError) as exc:
+        # Сервер недоступен: доставки вернутся в работу по истечении аренды
+        logger.warning('Не удалось отправить порцию рассылки %s: %s', mailing_id, exc)
+        raise self.retry(exc=exc, countdown=get_mailing_setting('LEASE'))
+    if result.retry_ids:
+        send_mailing_chunk.apply_async(
+            (mailing_id, [str(pk) for pk in result.retry_ids]), countdown=result.retry_delay,
+        )
+    finalize_mailing(mailing_id)
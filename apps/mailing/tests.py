@@ -0,0 +1,166 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.mailing import tasks
+from apps.mailing.models import Mailing, MailingDelivery
+from apps.mailing.sending import RateLimiter, pending_chunks, prepare_deliveries, send_chunk
+from apps.members.synthetic import build_employee, create_organization
+
+
+MAILING_SETTINGS = {
+    'BACKEND': 'apps.mailing.tests.FlakyEmailBackend',
+    'CHUNK_SIZE': 2,
+    'RATE_PER_SECOND': 1000,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 60,
+}
+
+
+class FlakyEmailBackend(EmailBackend):
+    """Бэкенд locmem, отклоняющий письма на адреса из refused и failing"""
+
+    refused = set()
+    failing = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.refused:
+                raise smtplib.SMTPRecipientsRefused({address: (550, b'No such user') for address in message.to})
+            if set(message.to) & self.failing:
+                raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+@override_settings(MAILING=MAILING_SETTINGS)
+class MailingSendingTests(TestCase):
+    """
+    Отправка рассылки порциями, повторы временных ошибок и статусы доставок
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = create_organization('mail')
+        department = organization.departments.get()
+        for number in range(5):
+            employee = build_employee(department, number, 'mail')
+            employee.email = f'member{number}@example.com'
+            employee.save()
+        author = get_user_model().objects.create(username='mail-author')
+        cls.mailing = Mailing.objects.create(
+            subject='Собрание', body_template='Уважаемый(ая) {{ recipient_name }}!', created_by=author,
+            status='sending',
+        )
+
+    def setUp(self):
+        FlakyEmailBackend.refused = set()
+        FlakyEmailBackend.failing = set()
+        self.limiter = RateLimiter(rate=1000)
+
+    def delivery(self, email):
+        return MailingDelivery.objects.get(mailing=self.mailing, email=email)
+
+    def test_sends_in_chunks_with_one_message_per_recipient(self):
+        self.assertEqual(prepare_deliveries(self.mailing), 5)
+        chunks = pending_chunks(self.mailing)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+
+        for chunk in chunks:
+            result = send_chunk(self.mailing, chunk, self.limiter)
+            self.assertEqual(result.sent, len(chunk))
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertTrue(all(len(message.to) == 1 for message in mail.outbox))
+        self.assertTrue(all(message.body.startswith('Уважаемый(ая) ') for message in mail.outbox))
+        self.assertFalse(MailingDelivery.objects.exclude(status='sent').exists())
+        self.assertEqual(pending_chunks(self.mailing), [])
+
+    def test_temporary_error_is_retried_with_backoff(self):
+        prepare_deliveries(self.mailing)
+        FlakyEmailBackend.failing = {'member0@example.com'}
+        delivery_ids = list(MailingDelivery.objects.filter(mailing=self.mailing).values_list('id', flat=True))
+
+        result = send_chunk(self.mailing, delivery_ids, self.limiter)
+        delivery = self.delivery('member0@example.com')
+        self.assertEqual(result.sent, 4)
+        self.assertEqual(result.retry_ids, [delivery.pk])
+        self.assertEqual(result.retry_delay, 60)
+        self.assertEqual(delivery.status, 'pending')
+        self.assertEqual(delivery.attempts, 1)
+        self.assertIn('Connection unexpectedly closed', delivery.last_error)
+
+        # До следующей попытки доставка не забирается
+        self.assertEqual(send_chunk(self.mailing, [delivery.pk], self.limiter).retry_ids, [])
+
+        MailingDelivery.objects.filter(pk=delivery.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        result = send_chunk(self.mailing, [delivery.pk], self.limiter)
+        self.assertEqual(result.retry_delay, 120)
+
+        MailingDelivery.objects.filter(pk=delivery.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        result = send_chunk(self.mailing, [delivery.pk], self.limiter)
+        delivery.refresh_from_db()
+        self.assertEqual(result.failed, 1)
+        self.assertEqual(delivery.status, 'failed')
+        self.assertEqual(delivery.attempts, 3)
+        self.assertIsNone(delivery.next_attempt_at)
+
+    def test_refused_recipient_fails_without_retry(self):
+        prepare_deliveries(self.mailing)
+        FlakyEmailBackend.refused = {'member1@example.com'}
+        delivery_ids = list(MailingDelivery.objects.filter(mailing=self.mailing).values_list('id', flat=True))
+
+        result = send_chunk(self.mailing, delivery_ids, self.limiter)
+
+        self.assertEqual((result.sent, result.failed, result.retry_ids), (4, 1, []))
+        self.assertEqual(self.delivery('member1@example.com').status, 'failed')
+        self.assertEqual(
+            set(MailingDelivery.objects.filter(status='sent').values_list('email', flat=True)),
+            {f'member{number}@example.com' for number in (0, 2, 3, 4)},
+        )
+
+
+@override_settings(MAILING=MAILING_SETTINGS)
+class StartMailingTests(TestCase):
+    """
+    Повторная доставка задачи start_mailing не создает дублей
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = create_organization('start')
+        department = organization.departments.get()
+        for number in range(3):
+            employee = build_employee(department, number, 'start')
+            employee.email = f'start{number}@example.com'
+            employee.save()
+        cls.author = get_user_model().objects.create(username='start-author')
+
+    def test_start_mailing_is_idempotent(self):
+        mailing = Mailing.objects.create(
+            subject='Новости', body_template='{{ recipient_name }}', created_by=self.author, status='queued',
+        )
+        with mock.patch.object(tasks.send_mailing_chunk, 'delay') as delay:
+            tasks.start_mailing(str(mailing.pk))
+            tasks.start_mailing(str(mailing.pk))
+
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, 'sending')
+        self.assertEqual(mailing.recipients_count, 3)
+        self.assertEqual(MailingDelivery.objects.filter(mailing=mailing).count(), 3)
+        # Оба запуска распределяют одни и те же неотправленные доставки
+        first, second = delay.call_args_list[:2], delay.call_args_list[2:]
+        self.assertEqual(first, second)
+
+        MailingDelivery.objects.filter(mailing=mailing).update(status='sent', sent_at=timezone.now())
+        with mock.patch.object(tasks.send_mailing_chunk, 'delay') as delay:
+            tasks.start_mailing(str(mailing.pk))
+        delay.assert_not_called()
+        mailing.refresh_from_db()
+        self.assertEqual(mailing.status, 'sent')
+        self.assertEqual(mailing.sent_count, 3)
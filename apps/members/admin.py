@@ -0,0 +1,40 @@
+from django.contrib import admin, messages
+from django.db.models import Q
+
+from apps.members.models import Employee, MemberImport
+from apps.members.tasks import dispatch_import, stale_imports
+
+
+@admin.register(Employee)
+class EmployeeAdmin(admin.ModelAdmin):
+    list_display = ['full_name', 'employee_number', 'department', 'email', 'status']
+    list_filter = ['status', 'department__organization']
+    search_fields = ['full_name', 'employee_number', 'union_ticket_number', 'email']
+    list_select_related = ['department']
+    raw_id_fields = ['department']
+
+
+@admin.register(MemberImport)
+class MemberImportAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'kind', 'status', 'total_rows', 'created_rows', 'updated_rows', 'error_rows', 'imported_at']
+    list_filter = ['kind', 'status']
+    readonly_fields = [
+        'status', 'total_rows', 'created_rows', 'updated_rows', 'error_rows', 'committed_row', 'heartbeat_at', 'error',
+        'error_report', 'uploaded_by', 'imported_at',
+    ]
+    actions = ['run_import']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.uploaded_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description='Импортировать выбранные файлы')
+    def run_import(self, request, queryset):
+        # Импорт выполняется воркером Celery; упавший или брошенный импорт продолжается с последней записанной строки
+        restartable = Q(status__in=['uploaded', 'failed']) | Q(pk__in=stale_imports().values('pk'))
+        import_ids = list(queryset.filter(restartable).values_list('id', flat=True))
+        MemberImport.objects.filter(pk__in=import_ids).update(status='queued')
+        for import_id in import_ids:
+            dispatch_import(import_id)
+        self.message_user(request, f'Поставлено в очередь файлов: {len(import_ids)}', messages.SUCCESS)
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class MembersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.members'
-    verbose_name = 'Справочник членов профсоюза'
\ No newline at end of file
+    verbose_name = 'Справочник членов профсоюза'
+
+    def ready(self):
+        from apps.members import signals  # noqa: F401
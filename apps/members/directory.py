@@ -0,0 +1,90 @@
+"""
+Справочник сотрудников с фиксированным числом запросов.
+
+Список строится одним запросом по сотрудникам: подразделение, организация и
+текущая должность подтягиваются через JOIN независимо от размера страницы.
+Постраничный вывод - по ключу (full_name, id) вместо OFFSET, поэтому
+глубокие страницы не дороже первой.
+"""
+import base64
+import json
+import uuid
+
+from django.db.models import Q
+
+from apps.members.models import Employee
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Некорректный курсор страницы"""
+
+
+def directory_queryset(queryset=None):
+    """Возвращает queryset сотрудников с подгруженными связанными данными"""
+    if queryset is None:
+        queryset = Employee.objects.all()
+    return queryset.defer('search_vector').select_related(
+        'department__organization', 'education_level', 'current_employment__position'
+    )
+
+
+def encode_cursor(employee):
+    """Кодирует позицию сотрудника в списке в строку курсора"""
+    payload = json.dumps([employee.full_name, str(employee.pk)], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Декодирует строку курсора в пару (full_name, id)"""
+    try:
+        full_name, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        return full_name, uuid.UUID(pk)
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise InvalidCursor('Некорректный курсор страницы') from exc
+
+
+class DirectoryPage:
+    """
+    Страница справочника сотрудников
+    """
+
+    def __init__(self, employees, next_cursor, page_size):
+        self.employees = employees
+        self.next_cursor = next_cursor
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(self.employees)
+
+    def __len__(self):
+        return len(self.employees)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def get_directory_page(queryset=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Возвращает страницу справочника после позиции cursor.
+
+    Выполняет ровно один запрос: сотрудники с подразделением, организацией,
+    уровнем образования и текущей должностью.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    queryset = directory_queryset(queryset).order_by('full_name', 'id')
+    if cursor:
+        full_name, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(full_name__gt=full_name) | Q(full_name=full_name, id__gt=pk))
+
+    # Берем на одну запись больше, чтобы узнать, есть ли следующая страница
+    employees = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(employees) > page_size:
+        employees = employees[:page_size]
+        next_cursor = encode_cursor(employees[-1])
+    return DirectoryPage(employees, next_cursor, page_size)
@@ -0,0 +1,56 @@
+"""
+Текущее место работы сотрудника.
+
+Employee.current_employment - денормализованная ссылка на открытую запись
+трудовой истории (без даты увольнения, с самой поздней датой назначения).
+Она обновляется сигналами EmploymentHistory; для queryset'ов, которым нельзя
+полагаться на столбец, есть аннотация with_current_position().
+"""
+from django.db.models import OuterRef, Subquery
+
+from apps.members.models import Employee, EmploymentHistory
+
+
+def current_employment_subquery(field='id'):
+    """Подзапрос поля открытой записи трудовой истории сотрудника"""
+    return Subquery(
+        EmploymentHistory.objects.filter(employee=OuterRef('pk'), employment_end_date__isnull=True)
+        .order_by('-appointment_date')
+        .values(field)[:1]
+    )
+
+
+def refresh_current_employment(employee_ids):
+    """Пересчитывает текущее место работы сотрудников одним запросом"""
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return 0
+    return Employee.objects.filter(pk__in=employee_ids).update(current_employment=current_employment_subquery())
+
+
+def with_current_position(queryset):
+    """
+    Добавляет к queryset сотрудников аннотации current_position_id и
+    current_position_name, вычисляемые подзапросом по трудовой истории.
+    """
+    return queryset.annotate(
+        current_position_id=current_employment_subquery('position_id'),
+        current_position_name=current_employment_subquery('position__name'),
+    )
+
+
+def find_inconsistent_employees(queryset=None, chunk_size=2000):
+    """
+    Возвращает генератор (id сотрудника, сохраненная запись, ожидаемая запись)
+    для сотрудников, у которых current_employment не совпадает с трудовой историей.
+    """
+    if queryset is None:
+        queryset = Employee.objects.all()
+    rows = (
+        queryset.order_by()
+        .annotate(expected_employment_id=current_employment_subquery())
+        .values_list('id', 'current_employment_id', 'expected_employment_id')
+    )
+    for pk, stored, expected in rows.iterator(chunk_size=chunk_size):
+        if stored != expected:
+            yield pk, stored, expected
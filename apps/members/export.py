@@ -0,0 +1,128 @@
+"""
+Потоковая выгрузка реестра членов профсоюза.
+
+Сотрудники читаются курсором порциями (iterator(chunk_size=...)), дети и
+трудовая история подгружаются на каждую порцию. CSV отдается клиенту по мере
+формирования, XLSX пишется openpyxl в режиме write-only во временный файл и
+отдается с диска. Потребление памяти не зависит от числа строк.
+"""
+import csv
+import tempfile
+
+from django.db.models import Prefetch
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from apps.members.models import Employee, EmploymentHistory
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+HEADER = [
+    'Табельный номер', 'ФИО', 'Дата рождения', 'Организация', 'Подразделение', 'Статус',
+    'Номер профсоюзного билета', 'Дата вступления', 'Семейное положение', 'Образование',
+    'Серия паспорта', 'Номер паспорта', 'Дата выдачи', 'Кем выдан', 'Адрес регистрации', 'Email',
+    'Дети', 'Трудовая история',
+]
+
+
+def export_queryset(queryset=None):
+    """Возвращает queryset сотрудников с данными, необходимыми для выгрузки"""
+    if queryset is None:
+        queryset = Employee.objects.all()
+    history = EmploymentHistory.objects.select_related('position')
+    return (
+        queryset.defer('search_vector')
+        .select_related('department__organization', 'education_level')
+        .prefetch_related('children', Prefetch('employment_history', queryset=history))
+        .order_by('full_name', 'id')
+    )
+
+
+def format_date(value):
+    return value.strftime('%d.%m.%Y') if value else ''
+
+
+def employee_row(employee):
+    """Преобразует сотрудника в строку выгрузки"""
+    children = '; '.join(
+        f'{child.full_name} ({format_date(child.date_of_birth)})' for child in employee.children.all()
+    )
+    history = '; '.join(
+        f'{record.position.name}, {format_date(record.employment_start_date)}'
+        f' - {format_date(record.employment_end_date) or "н.в."}, {record.rate}%'
+        for record in employee.employment_history.all()
+    )
+    return [
+        employee.employee_number,
+        employee.full_name,
+        format_date(employee.date_of_birth),
+        employee.department.organization.short_name,
+        employee.department.name,
+        employee.get_status_display(),
+        employee.union_ticket_number,
+        format_date(employee.union_join_date),
+        employee.get_marital_status_display(),
+        employee.education_level.name if employee.education_level_id else '',
+        employee.passport_series,
+        employee.passport_number,
+        format_date(employee.passport_issue_date),
+        employee.passport_issued_by,
+        employee.registration_address,
+        employee.email,
+        children,
+        history,
+    ]
+
+
+def iter_employee_rows(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Генератор строк выгрузки, читающий сотрудников порциями"""
+    for employee in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield employee_row(employee)
+
+
+class Echo:
+    """Объект с интерфейсом файла, возвращающий записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Генератор фрагментов CSV (с BOM для корректного открытия в Excel)"""
+    writer = csv.writer(Echo(), delimiter=';')
+    yield '\ufeff'
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows, fileobj):
+    """Записывает строки в XLSX в режиме write-only"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Реестр')
+    sheet.append(HEADER)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(fileobj)
+
+
+def csv_response(rows, filename='members.csv'):
+    response = StreamingHttpResponse(iter_csv(rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def xlsx_response(rows, filename='members.xlsx'):
+    # Временный файл удаляется при закрытии ответа
+    fileobj = tempfile.TemporaryFile()
+    write_xlsx(rows, fileobj)
+    fileobj.seek(0)
+    return FileResponse(
+        fileobj,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
@@ -0,0 +1,67 @@
+"""
+Иерархия организаций профсоюза (территориальная → предприятие → первичная).
+
+Таблица замыкания OrganizationClosure поддерживается сигналами
+(apps.members.signals) через apps.core.hierarchy.ClosureTree. Поддерево,
+цепочка вышестоящих организаций и сводные показатели по поддеревьям
+выбираются одним запросом каждый: строки замыкания соединяются с
+подразделениями, сотрудниками и взносами и группируются по предку.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum
+
+from apps.core.hierarchy import ClosureTree
+from apps.members.models import Organization, OrganizationClosure
+
+
+organization_tree = ClosureTree(Organization, OrganizationClosure)
+
+
+def get_subtree(organization_id, include_self=True):
+    """Организация и все подчиненные ей организации"""
+    return Organization.objects.filter(pk__in=organization_tree.descendants([organization_id], include_self))
+
+
+def get_ancestors(organization_id, include_self=False):
+    """Вышестоящие организации от корня дерева к указанной"""
+    queryset = Organization.objects.filter(descendant_links__descendant_id=organization_id)
+    if not include_self:
+        queryset = queryset.filter(descendant_links__depth__gt=0)
+    return list(queryset.order_by('-descendant_links__depth'))
+
+
+def rollup_links(organization_ids=None):
+    links = OrganizationClosure.objects.all()
+    if organization_ids is not None:
+        links = links.filter(ancestor_id__in=organization_ids)
+    return links.values('ancestor_id').order_by()
+
+
+def subtree_employee_counts(organization_ids=None, status='active'):
+    """
+    Численность сотрудников по поддеревьям: {id организации: число
+    сотрудников в ней и во всех подчиненных}. Без organization_ids -
+    для всех организаций. status=None учитывает сотрудников в любом статусе.
+    """
+    employees = 'descendant__departments__employees'
+    condition = Q(**{f'{employees}__status': status}) if status else Q(**{f'{employees}__isnull': False})
+    rows = rollup_links(organization_ids).annotate(total=Count(employees, filter=condition))
+    return {row['ancestor_id']: row['total'] for row in rows}
+
+
+def subtree_fee_totals(organization_ids=None, period_start=None, period_end=None, paid_only=False):
+    """
+    Суммы членских взносов по поддеревьям за период (даты включительно):
+    {id организации: сумма}
+    """
+    fees = 'descendant__departments__employees__membership_fees'
+    condition = Q()
+    if period_start:
+        condition &= Q(**{f'{fees}__period__gte': period_start})
+    if period_end:
+        condition &= Q(**{f'{fees}__period__lte': period_end})
+    if paid_only:
+        condition &= Q(**{f'{fees}__paid_at__isnull': False})
+    rows = rollup_links(organization_ids).annotate(total=Sum(f'{fees}__amount', filter=condition or None))
+    return {row['ancestor_id']: row['total'] or Decimal('0.00') for row in rows}
@@ -0,0 +1,496 @@
+"""
+Массовый импорт сотрудников, детей и трудовой истории из XLSX/CSV.
+
+Файл читается построчно, справочники (подразделения, должности, уровни
+образования) разрешаются по названию через кэш в памяти, проверенные строки
+записываются порциями: сотрудники - bulk_create(update_conflicts=True) по
+табельному номеру, дети и трудовая история - bulk_create/bulk_update с
+проверкой существующих записей одним запросом на порцию. Ошибки собираются
+в построчный отчет.
+
+После записи каждой порции вызывается обратный вызов progress с номером
+последней записанной строки. Повторный запуск с resume_after пропускает
+запись уже сохраненных строк, но проверяет их заново, чтобы сохранить
+проверки повторов внутри файла и построчный отчет об ошибках.
+
+bulk_create не вызывает сигналы моделей, поэтому поисковый индекс и текущее
+место работы обновляются на каждую порцию, а по окончании импорта
+отправляется сигнал employees_bulk_changed, по которому остальные приложения
+обновляют свои производные данные.
+"""
+import csv
+import io
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from apps.members.employment import refresh_current_employment
+from apps.members.models import Child, Department, EducationLevel, Employee, EmploymentHistory, Position
+from apps.members.search import reindex_employees
+from apps.members.signals import employees_bulk_changed
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+EMPLOYEE_UPDATE_FIELDS = [
+    'department', 'full_name', 'short_name', 'date_of_birth', 'marital_status', 'education_level',
+    'education_institution', 'education_graduation_year', 'passport_series', 'passport_number',
+    'passport_issue_date', 'passport_issued_by', 'registration_address', 'email', 'union_ticket_number',
+    'union_join_date', 'status', 'updated_at',
+]
+
+
+@dataclass
+class RowError:
+    row: int
+    column: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    kind: str
+    total: int = 0
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def write_error_report(self, fileobj):
+        """Записывает построчный отчет об ошибках в CSV"""
+        writer = csv.writer(fileobj, delimiter=';')
+        writer.writerow(['Строка', 'Столбец', 'Ошибка'])
+        for error in self.errors:
+            writer.writerow([error.row, error.column, error.message])
+
+
+class RowInvalid(Exception):
+    def __init__(self, column, message):
+        super().__init__(message)
+        self.column = column
+        self.message = message
+
+
+def column_map(model, extra_columns):
+    """Сопоставляет заголовки столбцов (подпись поля или имя поля) полям модели"""
+    mapping = {}
+    for model_field in model._meta.concrete_fields:
+        mapping[str(model_field.verbose_name).lower()] = model_field.name
+        mapping[model_field.name.lower()] = model_field.name
+    mapping.update(extra_columns)
+    return mapping
+
+
+def read_rows(source):
+    """Генератор (номер строки, словарь значений) для файла XLSX или CSV по пути или открытому файлу"""
+    name = source if isinstance(source, str) else source.name
+    extension = os.path.splitext(name)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(value or '').strip() for value in next(rows, [])]
+            for number, values in enumerate(rows, start=2):
+                if any(value not in (None, '') for value in values):
+                    yield number, dict(zip(header, values))
+        finally:
+            workbook.close()
+        return
+
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8-sig') as fileobj:
+            yield from read_csv_rows(fileobj)
+        return
+
+    # Файл из хранилища открыт в двоичном режиме и закрывается вызывающим кодом
+    fileobj = io.TextIOWrapper(source, newline='', encoding='utf-8-sig')
+    try:
+        yield from read_csv_rows(fileobj)
+    finally:
+        fileobj.detach()
+
+
+def read_csv_rows(fileobj):
+    sample = fileobj.read(4096)
+    fileobj.seek(0)
+    delimiter = ';' if sample.count(';') >= sample.count(',') else ','
+    for number, row in enumerate(csv.DictReader(fileobj, delimiter=delimiter), start=2):
+        if any(value for value in row.values()):
+            yield number, {key.strip(): value for key, value in row.items() if key}
+
+
+def parse_date(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    for fmt in ('%d.%m.%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'Некорректная дата: {value}')
+
+
+def parse_decimal(value):
+    try:
+        return Decimal(str(value).replace(',', '.').replace('%', '').strip())
+    except InvalidOperation:
+        raise ValueError(f'Некорректное число: {value}')
+
+
+def parse_bool(value):
+    return str(value or '').strip().lower() in ('1', 'да', 'true', 'yes', '+')
+
+
+def parse_choice(model, field_name, value):
+    """Принимает как значение, так и подпись варианта выбора"""
+    choices = model._meta.get_field(field_name).choices
+    value = str(value or '').strip()
+    for key, label in choices:
+        if value.lower() in (key.lower(), str(label).lower()):
+            return key
+    raise ValueError(f'Недопустимое значение: {value}')
+
+
+class LookupCache:
+    """
+    Справочники, загруженные в память одним запросом на модель
+    """
+
+    def __init__(self):
+        self.departments = {}
+        self.ambiguous_departments = set()
+        for pk, name, org_short in Department.objects.values_list('id', 'name', 'organization__short_name'):
+            key = name.strip().lower()
+            if key in self.departments:
+                self.ambiguous_departments.add(key)
+            self.departments[key] = pk
+            self.departments[(org_short.strip().lower(), key)] = pk
+        self.positions = {name.strip().lower(): pk for pk, name in Position.objects.values_list('id', 'name')}
+        self.education_levels = {
+            name.strip().lower(): pk for pk, name in EducationLevel.objects.values_list('id', 'name')
+        }
+
+    def department(self, name, organization=None):
+        key = str(name or '').strip().lower()
+        if organization:
+            pk = self.departments.get((str(organization).strip().lower(), key))
+        elif key in self.ambiguous_departments:
+            raise ValueError('Подразделение с таким названием есть в нескольких организациях, укажите организацию')
+        else:
+            pk = self.departments.get(key)
+        if pk is None:
+            raise ValueError(f'Подразделение не найдено: {name}')
+        return pk
+
+    def position(self, name):
+        pk = self.positions.get(str(name or '').strip().lower())
+        if pk is None:
+            raise ValueError(f'Должность не найдена: {name}')
+        return pk
+
+    def education_level(self, name):
+        if not name:
+            return None
+        pk = self.education_levels.get(str(name).strip().lower())
+        if pk is None:
+            raise ValueError(f'Уровень образования не найден: {name}')
+        return pk
+
+
+class BaseImporter:
+    model = None
+    kind = None
+    clean_exclude = ['id']
+    extra_columns = {}
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.lookups = LookupCache()
+        self.columns = column_map(self.model, self.extra_columns)
+        self.changed_employee_ids = set()
+        self.changed_department_ids = set()
+
+    def normalize(self, raw):
+        """Переводит заголовки строки в имена полей"""
+        values = {}
+        for header, value in raw.items():
+            name = self.columns.get(str(header).strip().lower())
+            if name:
+                values[name] = value.strip() if isinstance(value, str) else value
+        return values
+
+    def convert(self, values, column, parser, required=True):
+        value = values.get(column)
+        if value in (None, ''):
+            if required:
+                raise RowInvalid(column, 'Обязательное поле не заполнено')
+            return None
+        try:
+            return parser(value)
+        except ValueError as exc:
+            raise RowInvalid(column, str(exc))
+
+    def validate(self, instance):
+        try:
+            instance.clean_fields(exclude=self.clean_exclude)
+        except ValidationError as exc:
+            column, messages = next(iter(exc.message_dict.items()))
+            raise RowInvalid(column, '; '.join(messages))
+
+    def run(self, source, resume_after=0, progress=None):
+        result = ImportResult(kind=self.kind)
+        started = time.perf_counter()
+        chunk, committed = [], []
+        for number, raw in read_rows(source):
+            result.total += 1
+            try:
+                item = (number, self.build(self.normalize(raw)))
+            except RowInvalid as exc:
+                result.errors.append(RowError(number, exc.column, exc.message))
+                continue
+            if number <= resume_after:
+                committed.append(item)
+                if len(committed) >= self.chunk_size:
+                    self.mark_committed(committed)
+                    committed = []
+                continue
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                self.write(chunk, result, progress)
+                chunk = []
+        if committed:
+            self.mark_committed(committed)
+        if chunk:
+            self.write(chunk, result, progress)
+        if self.changed_employee_ids:
+            employees_bulk_changed.send(
+                sender=self.model,
+                employee_ids=self.changed_employee_ids,
+                department_ids=self.changed_department_ids,
+            )
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def write(self, chunk, result, progress):
+        self.write_chunk(chunk, result)
+        if progress is not None:
+            progress(chunk[-1][0], result)
+
+    def mark_committed(self, chunk):
+        """Учитывает строки, записанные прерванным ранее запуском"""
+
+    def employee_ids(self, numbers):
+        return dict(Employee.objects.filter(employee_number__in=numbers).values_list('employee_number', 'id'))
+
+
+class EmployeeImporter(BaseImporter):
+    model = Employee
+    kind = 'employees'
+    clean_exclude = ['id', 'department', 'education_level', 'passport_scan', 'search_vector', 'current_employment']
+    extra_columns = {'организация': 'organization', 'электронная почта': 'email'}
+
+    def __init__(self, chunk_size=IMPORT_CHUNK_SIZE):
+        super().__init__(chunk_size)
+        # Номер билета уникален: конфликт с другим сотрудником - ошибка строки, а не обновление
+        self.tickets = dict(Employee.objects.values_list('union_ticket_number', 'employee_number'))
+        self.seen_numbers = set()
+
+    def build(self, values):
+        employee_number = self.convert(values, 'employee_number', str)
+        if employee_number in self.seen_numbers:
+            raise RowInvalid('employee_number', 'Табельный номер повторяется в файле')
+        ticket = self.convert(values, 'union_ticket_number', str)
+        owner = self.tickets.get(ticket)
+        if owner is not None and owner != employee_number:
+            raise RowInvalid('union_ticket_number', f'Номер билета уже принадлежит сотруднику {owner}')
+
+        organization = values.get('organization')
+        employee = Employee(
+            employee_number=employee_number,
+            full_name=self.convert(values, 'full_name', str),
+            short_name=values.get('short_name') or '',
+            date_of_birth=self.convert(values, 'date_of_birth', parse_date),
+            marital_status=self.convert(values, 'marital_status', lambda v: parse_choice(Employee, 'marital_status', v)),
+            education_institution=values.get('education_institution') or '',
+            education_graduation_year=self.convert(values, 'education_graduation_year', int, required=False),
+            passport_series=self.convert(values, 'passport_series', str),
+            passport_number=self.convert(values, 'passport_number', str),
+            passport_issue_date=self.convert(values, 'passport_issue_date', parse_date),
+            passport_issued_by=self.convert(values, 'passport_issued_by', str),
+            registration_address=self.convert(values, 'registration_address', str),
+            email=values.get('email') or '',
+            union_ticket_number=ticket,
+            union_join_date=self.convert(values, 'union_join_date', parse_date),
+            status=self.convert(values, 'status', lambda v: parse_choice(Employee, 'status', v), required=False) or 'active',
+            department_id=self.convert(values, 'department', lambda v: self.lookups.department(v, organization)),
+            education_level_id=self.convert(values, 'education_level', self.lookups.education_level, required=False),
+        )
+        if not employee.short_name:
+            parts = employee.full_name.split()
+            employee.short_name = ' '.join(parts[:1] + [f'{part[0]}.' for part in parts[1:3]])
+        self.validate(employee)
+        self.seen_numbers.add(employee_number)
+        self.tickets[ticket] = employee_number
+        return employee
+
+    def write_chunk(self, chunk, result):
+        employees = [employee for _, employee in chunk]
+        numbers = [employee.employee_number for employee in employees]
+        with transaction.atomic():
+            existing = dict(
+                Employee.objects.filter(employee_number__in=numbers).values_list('employee_number', 'department_id')
+            )
+            Employee.objects.bulk_create(
+                employees,
+                update_conflicts=True,
+                unique_fields=['employee_number'],
+                update_fields=EMPLOYEE_UPDATE_FIELDS,
+            )
+            # Для обновленных строк pk в объектах не совпадает с базой - перечитываем
+            employee_ids = list(self.employee_ids(numbers).values())
+            reindex_employees(employee_ids)
+        self.changed_employee_ids.update(employee_ids)
+        self.changed_department_ids.update(employee.department_id for employee in employees)
+        # Переведенные сотрудники меняют и прежнее подразделение
+        self.changed_department_ids.update(existing.values())
+        result.created += len(employees) - len(existing)
+        result.updated += len(existing)
+
+    def mark_committed(self, chunk):
+        employees = [employee for _, employee in chunk]
+        self.changed_employee_ids.update(self.employee_ids([employee.employee_number for employee in employees]).values())
+        self.changed_department_ids.update(employee.department_id for employee in employees)
+
+
+class ChildImporter(BaseImporter):
+    model = Child
+    kind = 'children'
+    clean_exclude = ['id', 'employee']
+    extra_columns = {'табельный номер': 'employee'}
+
+    def build(self, values):
+        employee_number = self.convert(values, 'employee', str)
+        child = Child(
+            full_name=self.convert(values, 'full_name', str),
+            date_of_birth=self.convert(values, 'date_of_birth', parse_date),
+            disability_status=self.convert(
+                values, 'disability_status', lambda v: parse_choice(Child, 'disability_status', v), required=False,
+            ) or 'none',
+        )
+        self.validate(child)
+        return employee_number, child
+
+    def write_chunk(self, chunk, result):
+        employee_ids = self.employee_ids({number for _, (number, _) in chunk})
+        to_create, to_update = [], []
+        existing = {
+            (employee_id, full_name.lower(), date_of_birth): pk
+            for pk, employee_id, full_name, date_of_birth in Child.objects.filter(
+                employee_id__in=employee_ids.values(),
+            ).values_list('id', 'employee_id', 'full_name', 'date_of_birth')
+        }
+        for row, (number, child) in chunk:
+            if number not in employee_ids:
+                result.errors.append(RowError(row, 'employee', f'Сотрудник не найден: {number}'))
+                continue
+            child.employee_id = employee_ids[number]
+            pk = existing.get((child.employee_id, child.full_name.lower(), child.date_of_birth))
+            if pk is None:
+                to_create.append(child)
+            else:
+                child.pk = pk
+                to_update.append(child)
+        with transaction.atomic():
+            Child.objects.bulk_create(to_create)
+            Child.objects.bulk_update(to_update, ['disability_status'])
+            reindex_employees({child.employee_id for child in to_create})
+        result.created += len(to_create)
+        result.updated += len(to_update)
+
+
+class EmploymentHistoryImporter(BaseImporter):
+    model = EmploymentHistory
+    kind = 'history'
+    clean_exclude = ['id', 'employee', 'position']
+    extra_columns = {'табельный номер': 'employee', 'ставка': 'rate'}
+
+    def build(self, values):
+        employee_number = self.convert(values, 'employee', str)
+        record = EmploymentHistory(
+            position_id=self.convert(values, 'position', self.lookups.position),
+            appointment_date=self.convert(values, 'appointment_date', parse_date),
+            rate=self.convert(values, 'rate', parse_decimal),
+            is_main_position=parse_bool(values.get('is_main_position')),
+            employment_start_date=self.convert(values, 'employment_start_date', parse_date),
+            employment_end_date=self.convert(values, 'employment_end_date', parse_date, required=False),
+        )
+        self.validate(record)
+        return employee_number, record
+
+    def write_chunk(self, chunk, result):
+        employee_ids = self.employee_ids({number for _, (number, _) in chunk})
+        existing = {
+            (employee_id, position_id, appointment_date): pk
+            for pk, employee_id, position_id, appointment_date in EmploymentHistory.objects.filter(
+                employee_id__in=employee_ids.values(),
+            ).values_list('id', 'employee_id', 'position_id', 'appointment_date')
+        }
+        to_create, to_update = [], []
+        for row, (number, record) in chunk:
+            if number not in employee_ids:
+                result.errors.append(RowError(row, 'employee', f'Сотрудник не найден: {number}'))
+                continue
+            record.employee_id = employee_ids[number]
+            pk = existing.get((record.employee_id, record.position_id, record.appointment_date))
+            if pk is None:
+                to_create.append(record)
+            else:
+                record.pk = pk
+                to_update.append(record)
+        with transaction.atomic():
+            EmploymentHistory.objects.bulk_create(to_create)
+            EmploymentHistory.objects.bulk_update(
+                to_update, ['rate', 'is_main_position', 'employment_start_date', 'employment_end_date'],
+            )
+            refresh_current_employment({record.employee_id for record in to_create + to_update})
+        self.changed_employee_ids.update(record.employee_id for record in to_create + to_update)
+        result.created += len(to_create)
+        result.updated += len(to_update)
+
+    def mark_committed(self, chunk):
+        self.changed_employee_ids.update(self.employee_ids({number for _, (number, _) in chunk}).values())
+
+
+IMPORTERS = {
+    'employees': EmployeeImporter,
+    'children': ChildImporter,
+    'history': EmploymentHistoryImporter,
+}
+
+
+def import_file(source, kind, chunk_size=IMPORT_CHUNK_SIZE, resume_after=0, progress=None):
+    """Импортирует файл указанного вида и возвращает ImportResult"""
+    return IMPORTERS[kind](chunk_size=chunk_size).run(source, resume_after=resume_after, progress=progress)
+
+
+def error_report_content(result):
+    """Возвращает отчет об ошибках в виде байтов CSV"""
+    buffer = io.StringIO()
+    result.write_error_report(buffer)
+    return buffer.getvalue().encode('utf-8-sig')
@@ -0,0 +1,109 @@
+import multiprocessing
+import random
+import resource
+import tempfile
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from apps.members.export import EXPORT_CHUNK_SIZE, iter_csv, iter_employee_rows, write_xlsx
+from apps.members.models import Child, Employee, EmploymentHistory, Position
+from apps.members.synthetic import build_employee, create_organization
+
+
+def run_export(fmt, organization_id, chunk_size, queue):
+    # Процесс открывает собственное соединение с базой: соединение родителя закрыто перед fork
+    queryset = Employee.objects.filter(department__organization_id=organization_id)
+    started = time.perf_counter()
+    written = 0
+    with tempfile.TemporaryFile() as fileobj, CaptureQueriesContext(connection) as queries:
+        rows = iter_employee_rows(queryset, chunk_size=chunk_size)
+        if fmt == 'csv':
+            for chunk in iter_csv(rows):
+                fileobj.write(chunk.encode('utf-8'))
+                written += 1
+            written -= 2  # BOM и заголовок
+        else:
+            def counted():
+                nonlocal written
+                for row in rows:
+                    written += 1
+                    yield row
+            write_xlsx(counted(), fileobj)
+    elapsed = time.perf_counter() - started
+    connection.close()
+    # ru_maxrss в Linux - килобайты
+    queue.put((written, elapsed, len(queries), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость и пиковое потребление памяти потоковой выгрузки реестра на синтетических сотрудниках'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help='Количество синтетических сотрудников (создаются в базе, 1 млн - десятки минут)')
+        parser.add_argument('--formats', nargs='+', choices=['csv', 'xlsx'], default=['csv', 'xlsx'])
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Размер порции курсора')
+        parser.add_argument('--keep', action='store_true', help='Не удалять созданные данные')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        organization = create_organization(prefix, departments=10)
+        position = Position.objects.create(name=f'{prefix} слесарь')
+        context = multiprocessing.get_context('fork')
+        seeded = 0
+        try:
+            for count in sorted(options['sizes']):
+                started = time.perf_counter()
+                self.seed(organization, position, prefix, seeded, count)
+                self.stdout.write(f'Создано сотрудников: {count - seeded} за {time.perf_counter() - started:.1f} с')
+                seeded = count
+                for fmt in options['formats']:
+                    # Дочерний процесс не должен унаследовать открытое соединение родителя
+                    connections.close_all()
+                    # Каждый прогон - в отдельном процессе, чтобы пиковый RSS не накапливался
+                    queue = context.Queue()
+                    process = context.Process(
+                        target=run_export, args=(fmt, organization.pk, options['chunk_size'], queue),
+                    )
+                    process.start()
+                    written, elapsed, queries, peak_rss = queue.get()
+                    process.join()
+                    self.stdout.write(
+                        f'{fmt.upper()} {written} строк: {elapsed:.1f} с, {written / elapsed:.0f} строк/с, '
+                        f'{queries} запросов, пиковый RSS {peak_rss:.0f} МБ'
+                    )
+        finally:
+            if not options['keep']:
+                Employee.objects.filter(department__organization=organization).delete()
+                organization.delete()
+                position.delete()
+
+    def seed(self, organization, position, prefix, start, stop, batch_size=2000):
+        """Создает сотрудников с номерами [start, stop), у каждого ребенок и запись трудовой истории"""
+        departments = list(organization.departments.order_by('name'))
+        rng = random.Random(start)
+        for offset in range(start, stop, batch_size):
+            employees = [
+                build_employee(departments[number % len(departments)], number, prefix, rng)
+                for number in range(offset, min(offset + batch_size, stop))
+            ]
+            Employee.objects.bulk_create(employees)
+            Child.objects.bulk_create([
+                Child(
+                    employee=employee, full_name=f'{employee.full_name.split()[0]} Ребенок',
+                    date_of_birth=date(2010, 1, 1) + timedelta(days=rng.randrange(365 * 10)),
+                )
+                for employee in employees
+            ])
+            EmploymentHistory.objects.bulk_create([
+                EmploymentHistory(
+                    employee=employee, position=position, appointment_date=employee.union_join_date,
+                    rate=100, is_main_position=True, employment_start_date=employee.union_join_date,
+                )
+                for employee in employees
+            ])
@@ -0,0 +1,54 @@
+import csv
+import os
+import tempfile
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from apps.members.importer import import_file
+from apps.members.models import Employee
+from apps.members.synthetic import build_employee, create_organization
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость импорта сотрудников на синтетическом файле'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50_000, help='Количество строк в файле')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Размер порции записи')
+        parser.add_argument('--keep', action='store_true', help='Не удалять созданные данные')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        organization = create_organization(prefix, departments=10)
+        departments = list(organization.departments.all())
+        header = ['Табельный номер', 'ФИО (полное)', 'Дата рождения', 'Семейное положение', 'Серия паспорта',
+                  'Номер паспорта', 'Дата выдачи паспорта', 'Кем выдан', 'Адрес регистрации',
+                  'Номер профсоюзного билета', 'Дата вступления в профсоюз', 'Организация', 'Подразделение']
+        path = os.path.join(tempfile.gettempdir(), f'{prefix}.csv')
+        try:
+            with open(path, 'w', newline='', encoding='utf-8') as fileobj:
+                writer = csv.writer(fileobj, delimiter=';')
+                writer.writerow(header)
+                for number in range(options['rows']):
+                    department = departments[number % len(departments)]
+                    employee = build_employee(department, number, prefix)
+                    writer.writerow([
+                        employee.employee_number, employee.full_name, employee.date_of_birth.strftime('%d.%m.%Y'),
+                        'Не женат/Не замужем', employee.passport_series, employee.passport_number,
+                        employee.passport_issue_date.strftime('%d.%m.%Y'), employee.passport_issued_by,
+                        employee.registration_address, employee.union_ticket_number,
+                        employee.union_join_date.strftime('%d.%m.%Y'), organization.short_name, department.name,
+                    ])
+
+            for label in ('Первичная загрузка', 'Повторная загрузка (обновление)'):
+                result = import_file(path, 'employees', chunk_size=options['chunk_size'])
+                self.stdout.write(
+                    f'{label}: {result.total} строк за {result.elapsed:.1f} с, {result.rows_per_second:.0f} строк/с '
+                    f'(создано {result.created}, обновлено {result.updated}, ошибок {len(result.errors)})'
+                )
+        finally:
+            os.remove(path)
+            if not options['keep']:
+                Employee.objects.filter(department__organization=organization).delete()
+                organization.delete()
@@ -0,0 +1,117 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.finance.models import MembershipFee
+from apps.members.hierarchy import (
+    get_ancestors, get_subtree, organization_tree, subtree_employee_counts, subtree_fee_totals,
+)
+from apps.members.models import Department, Employee, Organization, OrganizationClosure
+from apps.members.synthetic import build_employee, create_organization_tree
+
+
+def walk_subtree(organization_id):
+    """Обход поддерева по ссылкам на родителя: запрос на каждый уровень"""
+    found = [organization_id]
+    level = [organization_id]
+    while level:
+        level = list(Organization.objects.filter(parent_id__in=level).values_list('pk', flat=True))
+        found.extend(level)
+    return found
+
+
+def walk_employee_count(organization_id):
+    return Employee.objects.filter(department__organization_id__in=walk_subtree(organization_id), status='active').count()
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает запросы по поддеревьям организаций через таблицу замыкания и рекурсивный обход'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nodes', type=int, default=10_000, help='Количество организаций в дереве')
+        parser.add_argument('--fanout', type=int, default=10, help='Подчиненных организаций у узла')
+        parser.add_argument('--employees', type=int, default=50_000, help='Количество сотрудников')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого запроса')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        started = time.perf_counter()
+        organizations = create_organization_tree(prefix, options['nodes'], options['fanout'])
+        ids = [organization.pk for organization in organizations]
+        try:
+            self.populate(prefix, ids, options['employees'])
+            self.stdout.write(
+                f"Создано {len(organizations)} организаций и {options['employees']} сотрудников "
+                f'за {time.perf_counter() - started:.1f} с'
+            )
+            began = time.perf_counter()
+            # Перестраиваются только связи созданного дерева: таблица замыкания остальных организаций не меняется
+            links = organization_tree.rebuild(root_ids=[ids[0]])
+            self.stdout.write(f'Перестроение таблицы замыкания: {links} связей за {time.perf_counter() - began:.1f} с')
+
+            rng = random.Random(0)
+            # Корень, узел второго уровня и случайные узлы
+            samples = [ids[0], ids[1]] + rng.sample(ids, max(options['repeat'] - 2, 0))
+            scenarios = [
+                ('Поддерево, рекурсивный обход', walk_subtree),
+                ('Поддерево, таблица замыкания', lambda pk: list(get_subtree(pk).values_list('pk', flat=True))),
+                ('Вышестоящие организации', get_ancestors),
+                ('Численность поддерева, рекурсивный обход', walk_employee_count),
+                ('Численность поддерева, таблица замыкания', lambda pk: subtree_employee_counts([pk])),
+                ('Взносы поддерева, таблица замыкания', lambda pk: subtree_fee_totals([pk])),
+            ]
+            for label, function in scenarios:
+                self.measure(label, function, samples)
+            self.measure('Численность всех поддеревьев', lambda _: subtree_employee_counts(), [None])
+            self.measure('Взносы всех поддеревьев', lambda _: subtree_fee_totals(), [None])
+
+            # Перенос поддерева второго уровня под другой узел второго уровня
+            moved = Organization.objects.get(pk=ids[1])
+            moved.parent_id = ids[2]
+            self.measure('Перенос поддерева', lambda _: moved.save(update_fields=['parent']), [None])
+        finally:
+            OrganizationClosure.objects.filter(descendant_id__in=ids).delete()
+            MembershipFee.objects.filter(employee__department__organization_id__in=ids).delete()
+            Employee.objects.filter(department__organization_id__in=ids).delete()
+            Department.objects.filter(organization_id__in=ids).delete()
+            Organization.objects.filter(pk__in=ids).update(parent=None)
+            Organization.objects.filter(pk__in=ids).delete()
+
+    def measure(self, label, function, samples):
+        timings = []
+        with CaptureQueriesContext(connection) as queries:
+            for sample in samples:
+                began = time.perf_counter()
+                function(sample)
+                timings.append((time.perf_counter() - began) * 1000)
+        self.stdout.write(
+            f'{label}: медиана {statistics.median(timings):.1f} мс, максимум {max(timings):.1f} мс, '
+            f'{len(queries) / len(samples):.0f} запросов'
+        )
+
+    def populate(self, prefix, organization_ids, count, batch_size=5000):
+        departments = list(Department.objects.filter(organization_id__in=organization_ids).order_by())
+        period = date.today().replace(day=1)
+        rng = random.Random(1)
+        employees = []
+        for number in range(count):
+            employees.append(build_employee(departments[number % len(departments)], number, prefix, rng))
+            if len(employees) >= batch_size:
+                self.save_employees(employees, period)
+                employees = []
+        if employees:
+            self.save_employees(employees, period)
+
+    def save_employees(self, employees, period):
+        Employee.objects.bulk_create(employees)
+        MembershipFee.objects.bulk_create([
+            MembershipFee(employee=employee, amount=Decimal('500.00'), percentage_rate=Decimal('1.00'), period=period)
+            for employee in employees
+        ])
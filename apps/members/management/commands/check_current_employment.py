@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.members.employment import find_inconsistent_employees, refresh_current_employment
+
+
+class Command(BaseCommand):
+    help = 'Проверяет соответствие текущего места работы сотрудников их трудовой истории'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Исправить найденные расхождения')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Размер пакета при исправлении')
+
+    def handle(self, *args, **options):
+        inconsistent = []
+        for pk, stored, expected in find_inconsistent_employees():
+            inconsistent.append(pk)
+            self.stdout.write(self.style.WARNING(f'Сотрудник {pk}: сохранено {stored}, ожидается {expected}'))
+
+        if not inconsistent:
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено'))
+            return
+        if not options['fix']:
+            self.stdout.write(self.style.ERROR(f'Найдено расхождений: {len(inconsistent)} (используйте --fix для исправления)'))
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(inconsistent), batch_size):
+            refresh_current_employment(inconsistent[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Исправлено сотрудников: {len(inconsistent)}'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.members.importer import IMPORT_CHUNK_SIZE, IMPORTERS, import_file
+
+
+class Command(BaseCommand):
+    help = 'Импортирует сотрудников, детей или трудовую историю из файла XLSX/CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к файлу XLSX или CSV')
+        parser.add_argument('--kind', choices=list(IMPORTERS), default='employees', help='Вид данных в файле')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Размер порции записи')
+        parser.add_argument('--errors', help='Путь для отчета об ошибках (CSV)')
+
+    def handle(self, *args, **options):
+        try:
+            result = import_file(options['path'], options['kind'], chunk_size=options['chunk_size'])
+        except FileNotFoundError:
+            raise CommandError(f"Файл не найден: {options['path']}")
+
+        self.stdout.write(
+            f'Строк: {result.total}, создано: {result.created}, обновлено: {result.updated}, '
+            f'ошибок: {len(result.errors)}'
+        )
+        self.stdout.write(f'Время: {result.elapsed:.1f} с, {result.rows_per_second:.0f} строк/с')
+
+        if result.errors:
+            if options['errors']:
+                with open(options['errors'], 'w', newline='', encoding='utf-8-sig') as fileobj:
+                    result.write_error_report(fileobj)
+                self.stdout.write(self.style.WARNING(f"Отчет об ошибках: {options['errors']}"))
+            else:
+                for error in result.errors[:20]:
+                    self.stdout.write(self.style.WARNING(f'Строка {error.row}, {error.column}: {error.message}'))
+                if len(result.errors) > 20:
+                    self.stdout.write(self.style.WARNING('... используйте --errors для полного отчета'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.members.models import Employee
+from apps.members.search import INDEX_BATCH_SIZE, ensure_search_indexes, get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Полностью перестраивает поисковый индекс сотрудников'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=INDEX_BATCH_SIZE, help='Размер пакета сотрудников')
+
+    def handle(self, *args, **options):
+        ensure_search_indexes()
+        backend = get_search_backend()
+        batch_size = options['batch_size']
+        batch = []
+        indexed = 0
+        for pk in Employee.objects.order_by().values_list('id', flat=True).iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                backend.index(batch)
+                indexed += len(batch)
+                batch = []
+                self.stdout.write(f'Проиндексировано: {indexed}')
+        if batch:
+            backend.index(batch)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Индекс перестроен, сотрудников: {indexed}'))
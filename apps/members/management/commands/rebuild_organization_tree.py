@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.members.hierarchy import organization_tree
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает таблицу замыкания иерархии организаций по ссылкам на вышестоящую организацию'
+
+    def handle(self, *args, **options):
+        created = organization_tree.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Связей организаций: {created}'))
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from datetime import date
 import uuid
@@ -13,6 +14,7 @@ class Organization(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255, verbose_name='Название организации')
     short_name = models.CharField(max_length=100, verbose_name='Краткое название')
+    parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='children', verbose_name='Вышестоящая организация')
     description = models.TextField(blank=True, verbose_name='Описание')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
 
@@ -25,6 +27,27 @@ class Organization(models.Model):
         return self.name
 
 
+class OrganizationClosure(models.Model):
+    """
+    Модель связи организации с ее вышестоящими организациями (таблица замыкания)
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    ancestor = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='descendant_links', verbose_name='Вышестоящая организация')
+    descendant = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='ancestor_links', verbose_name='Подчиненная организация')
+    depth = models.PositiveIntegerField(verbose_name='Уровень вложенности')
+
+    class Meta:
+        verbose_name = 'Связь организаций'
+        verbose_name_plural = 'Иерархия организаций'
+        unique_together = ['ancestor', 'descendant']
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='members_orgclosure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor} → {self.descendant} ({self.depth})"
+
+
 class Department(models.Model):
     """
     Модель подразделения/цеха
@@ -132,10 +155,13 @@ class Employee(models.Model):
     passport_issue_date = models.DateField(verbose_name='Дата выдачи паспорта')
     passport_issued_by = models.CharField(max_length=255, verbose_name='Кем выдан')
     registration_address = models.TextField(verbose_name='Адрес регистрации')
+    email = models.EmailField(blank=True, verbose_name='Email')
     passport_scan = models.FileField(upload_to='passports/', null=True, blank=True, verbose_name='Скан паспорта')
     union_ticket_number = models.CharField(max_length=50, unique=True, verbose_name='Номер профсоюзного билета')
     union_join_date = models.DateField(verbose_name='Дата вступления в профсоюз')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active', verbose_name='Статус')
+    current_employment = models.ForeignKey(EmploymentHistory, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+', verbose_name='Текущее место работы')
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name='Поисковый вектор')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
@@ -147,6 +173,16 @@ class Employee(models.Model):
     def __str__(self):
         return f"{self.full_name} ({self.employee_number})"
 
+    def save(self, *args, **kwargs):
+        # Текущее место работы обновляется только запросом update() (apps.members.employment),
+        # поэтому сохранение загруженного ранее сотрудника не возвращает прежнее значение
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'current_employment'
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def age(self):
         """Вычисляет возраст сотрудника"""
@@ -156,10 +192,10 @@ class Employee(models.Model):
     @property
     def current_position(self):
         """Возвращает текущую должность сотрудника"""
-        current_history = self.employment_history.filter(employment_end_date__isnull=True).first()
-        if current_history:
-            return current_history.position
-        return None
+        # current_employment поддерживается сигналами EmploymentHistory (см. apps.members.employment)
+        if self.current_employment_id is None:
+            return None
+        return self.current_employment.position
 
 
 class Child(models.Model):
@@ -191,4 +227,47 @@ class Child(models.Model):
     def age(self):
         """Вычисляет возраст ребенка"""
         today = date.today()
-        return today.year - self.date_of_birth.year - ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
\ No newline at end of file
+        return today.year - self.date_of_birth.year - ((today.month, today.day) < (self.date_of_birth.month, self.date_of_birth.day))
+
+
+class MemberImport(models.Model):
+    """
+    Модель загрузки файла для массового импорта
+    """
+    KIND_CHOICES = [
+        ('employees', 'Сотрудники'),
+        ('children', 'Дети сотрудников'),
+        ('history', 'Трудовая история'),
+    ]
+
+    STATUS_CHOICES = [
+        ('uploaded', 'Загружен'),
+        ('queued', 'В очереди'),
+        ('running', 'Импортируется'),
+        ('done', 'Импортирован'),
+        ('failed', 'Ошибка'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Вид данных')
+    file = models.FileField(upload_to='imports/', verbose_name='Файл (XLSX/CSV)')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploaded', editable=False, verbose_name='Статус')
+    total_rows = models.PositiveIntegerField(default=0, editable=False, verbose_name='Строк в файле')
+    created_rows = models.PositiveIntegerField(default=0, editable=False, verbose_name='Создано')
+    updated_rows = models.PositiveIntegerField(default=0, editable=False, verbose_name='Обновлено')
+    error_rows = models.PositiveIntegerField(default=0, editable=False, verbose_name='Строк с ошибками')
+    committed_row = models.PositiveIntegerField(default=0, editable=False, verbose_name='Записано до строки')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Последняя отметка импорта')
+    error = models.TextField(blank=True, editable=False, verbose_name='Ошибка импорта')
+    error_report = models.FileField(upload_to='imports/errors/', null=True, blank=True, editable=False, verbose_name='Отчет об ошибках')
+    uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, editable=False, verbose_name='Загружено кем')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')
+    imported_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Дата импорта')
+
+    class Meta:
+        verbose_name = 'Импорт данных'
+        verbose_name_plural = 'Импорт данных'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.created_at.strftime('%d.%m.%Y %H:%M')}"
@@ -0,0 +1,215 @@
+"""
+Поиск сотрудников.
+
+На PostgreSQL поиск идет по поддерживаемому столбцу Employee.search_vector
+(GIN-индекс, русская конфигурация полнотекстового поиска) и по триграммному
+индексу на ФИО для поиска с опечатками. На других СУБД (SQLite в тестах)
+используется бэкенд на чистом Python с той же моделью ранжирования.
+
+В поисковый документ входят ФИО, табельный номер, номер профсоюзного
+билета, подразделение с организацией и ФИО детей сотрудника.
+"""
+import difflib
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils.module_loading import import_string
+
+from apps.members.models import Child, Employee
+
+
+INDEX_BATCH_SIZE = 1000
+DEFAULT_LIMIT = 50
+TRIGRAM_THRESHOLD = 0.3
+
+RUSSIAN_ENDINGS = sorted([
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ович', 'евич', 'овна', 'евна',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ов', 'ев', 'ом', 'ем', 'ах', 'ях',
+    'ам', 'ям', 'ую', 'юю', 'ин', 'ина', 'а', 'я', 'ы', 'и', 'о', 'е', 'у', 'ю', 'ь',
+], key=len, reverse=True)
+
+TOKEN_RE = re.compile(r'[\w-]+', re.UNICODE)
+
+
+def tokenize(text):
+    """Разбивает строку на нормализованные слова"""
+    return [token.lower().replace('ё', 'е') for token in TOKEN_RE.findall(text or '')]
+
+
+def stem(word):
+    """Упрощенный стеммер для русских слов"""
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+
+def build_documents(employee_ids):
+    """
+    Собирает поисковые документы сотрудников.
+
+    Возвращает словарь {id сотрудника: (ФИО, номера, подразделение, дети)}.
+    Выполняет два запроса независимо от числа сотрудников.
+    """
+    documents = {}
+    employees = (
+        Employee.objects.filter(pk__in=employee_ids)
+        .values_list(
+            'id', 'full_name', 'short_name', 'employee_number', 'union_ticket_number',
+            'department__name', 'department__short_name', 'department__organization__short_name',
+        )
+        .order_by()
+    )
+    for pk, full_name, short_name, employee_number, ticket, dept_name, dept_short, org_short in employees:
+        documents[pk] = [
+            f'{full_name} {short_name}',
+            f'{employee_number} {ticket}',
+            f'{dept_name} {dept_short} {org_short}',
+            [],
+        ]
+    for employee_id, child_name in Child.objects.filter(employee_id__in=employee_ids).values_list('employee_id', 'full_name').order_by():
+        if employee_id in documents:
+            documents[employee_id][3].append(child_name)
+    return {pk: (names, numbers, department, ' '.join(children)) for pk, (names, numbers, department, children) in documents.items()}
+
+
+class PostgresSearchBackend:
+    """
+    Полнотекстовый и триграммный поиск средствами PostgreSQL
+    """
+    config = 'russian'
+
+    def index(self, employee_ids):
+        """Обновляет поисковый вектор сотрудников одним запросом на пакет"""
+        employee_ids = list(employee_ids)
+        for start in range(0, len(employee_ids), INDEX_BATCH_SIZE):
+            documents = build_documents(employee_ids[start:start + INDEX_BATCH_SIZE])
+            if not documents:
+                continue
+            rows = ', '.join(['(%s::uuid, %s, %s, %s, %s)'] * len(documents))
+            params = []
+            for pk, document in documents.items():
+                params.extend([str(pk), *document])
+            table = connection.ops.quote_name(Employee._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    UPDATE {table} AS e SET search_vector =
+                        setweight(to_tsvector(%s, v.names), 'A') ||
+                        setweight(to_tsvector('simple', v.numbers), 'B') ||
+                        setweight(to_tsvector(%s, v.department), 'C') ||
+                        setweight(to_tsvector(%s, v.children), 'D')
+                    FROM (VALUES {rows}) AS v(id, names, numbers, department, children)
+                    WHERE e.id = v.id
+                    """,
+                    [self.config, self.config, self.config, *params],
+                )
+
+    def search(self, text, queryset=None, limit=DEFAULT_LIMIT):
+        """Возвращает список сотрудников, упорядоченный по релевантности"""
+        from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+        text = (text or '').strip()
+        if not text:
+            return []
+        if queryset is None:
+            queryset = Employee.objects.all()
+        query = SearchQuery(text, config=self.config, search_type='websearch')
+        queryset = (
+            queryset.annotate(
+                rank=SearchRank('search_vector', query),
+                similarity=TrigramSimilarity('full_name', text),
+            )
+            .filter(
+                Q(search_vector=query)
+                | Q(full_name__trigram_similar=text)
+                | Q(employee_number=text)
+                | Q(union_ticket_number=text)
+            )
+            .select_related('department__organization')
+            .order_by('-rank', '-similarity', 'full_name')
+        )
+        return list(queryset[:limit])
+
+
+class SimpleSearchBackend:
+    """
+    Поиск на чистом Python для СУБД без полнотекстового поиска.
+    Подходит для тестов и небольших баз: документы строятся при каждом поиске.
+    """
+    weights = (8, 4, 2, 1)
+
+    def index(self, employee_ids):
+        """Отдельный индекс не ведется"""
+
+    def score(self, tokens, document):
+        total = 0
+        for weight, field in zip(self.weights, document):
+            words = tokenize(field)
+            stems = {stem(word) for word in words}
+            for token in tokens:
+                if token in words or stem(token) in stems:
+                    total += weight * 2
+                elif weight == self.weights[0] and difflib.get_close_matches(token, words, n=1, cutoff=0.75):
+                    # Поиск по ФИО с опечатками
+                    total += weight
+        return total
+
+    def search(self, text, queryset=None, limit=DEFAULT_LIMIT):
+        """Возвращает список сотрудников, упорядоченный по релевантности"""
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+        if queryset is None:
+            queryset = Employee.objects.all()
+        documents = build_documents(queryset.values_list('id', flat=True))
+        scored = []
+        for pk, document in documents.items():
+            score = self.score(tokens, document)
+            if score:
+                scored.append((-score, document[0], pk))
+        scored.sort()
+        ids = [pk for _, _, pk in scored[:limit]]
+        order = Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)], output_field=IntegerField())
+        return list(Employee.objects.filter(pk__in=ids).select_related('department__organization').order_by(order)) if ids else []
+
+
+def get_search_backend():
+    """Возвращает бэкенд поиска из settings.MEMBERS_SEARCH_BACKEND или по типу СУБД"""
+    backend_path = getattr(settings, 'MEMBERS_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SimpleSearchBackend()
+
+
+def search_employees(text, queryset=None, limit=DEFAULT_LIMIT):
+    """Ищет сотрудников по ФИО, номерам, подразделению и ФИО детей"""
+    return get_search_backend().search(text, queryset=queryset, limit=limit)
+
+
+def reindex_employees(employee_ids):
+    """Обновляет поисковый индекс указанных сотрудников"""
+    get_search_backend().index(employee_ids)
+
+
+def ensure_search_indexes(using='default'):
+    """
+    Создает расширение pg_trgm и индексы поиска на PostgreSQL.
+
+    Индексы создаются не через Meta.indexes, чтобы схема оставалась
+    совместимой с SQLite, на которой запускаются тесты.
+    """
+    from django.db import connections
+
+    target = connections[using]
+    if target.vendor != 'postgresql':
+        return
+    table = target.ops.quote_name(Employee._meta.db_table)
+    with target.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS members_employee_search_gin ON {table} USING gin (search_vector)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS members_employee_full_name_trgm ON {table} USING gin (full_name gin_trgm_ops)')
@@ -0,0 +1,58 @@
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import Signal, receiver
+
+from apps.members.employment import refresh_current_employment
+from apps.members.hierarchy import organization_tree
+from apps.members.models import Organization, Department, Employee, Child, EmploymentHistory
+from apps.members.search import reindex_employees, ensure_search_indexes
+
+
+# Отправляется после массовых изменений сотрудников в обход сигналов моделей
+# (импорт через bulk_create). Аргументы: employee_ids, department_ids.
+employees_bulk_changed = Signal()
+
+organization_tree.connect(dispatch_uid='members_organization_tree')
+
+
+@receiver(post_save, sender=Employee)
+def index_employee(sender, instance, raw=False, **kwargs):
+    """Обновляет поисковый индекс сотрудника"""
+    if not raw:
+        reindex_employees([instance.pk])
+
+
+@receiver(post_save, sender=EmploymentHistory)
+@receiver(post_delete, sender=EmploymentHistory)
+def refresh_employee_position(sender, instance, raw=False, **kwargs):
+    """Обновляет текущее место работы сотрудника при изменении трудовой истории"""
+    if not raw:
+        refresh_current_employment([instance.employee_id])
+
+
+@receiver(post_save, sender=Child)
+@receiver(post_delete, sender=Child)
+def index_child_parent(sender, instance, raw=False, **kwargs):
+    """Обновляет поисковый индекс сотрудника при изменении данных ребенка"""
+    if not raw:
+        reindex_employees([instance.employee_id])
+
+
+@receiver(post_save, sender=Department)
+def index_department_employees(sender, instance, created, raw=False, **kwargs):
+    """Обновляет поисковый индекс сотрудников подразделения"""
+    if not raw and not created:
+        reindex_employees(Employee.objects.filter(department=instance).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Organization)
+def index_organization_employees(sender, instance, created, raw=False, **kwargs):
+    """Обновляет поисковый индекс сотрудников организации"""
+    if not raw and not created:
+        reindex_employees(Employee.objects.filter(department__organization=instance).values_list('id', flat=True))
+
+
+@receiver(post_migrate)
+def create_search_indexes(sender, using='default', **kwargs):
+    """Создает индексы поиска после миграций приложения members"""
+    if sender.name == 'apps.members':
+        ensure_search_indexes(using)
@@ -0,0 +1,78 @@
+"""
+Генерация синтетических данных для нагрузочных тестов и бенчмарков
+"""
+import random
+from datetime import date, timedelta
+
+from apps.members.models import Organization, Department, Employee
+
+
+LAST_NAMES = ['Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов', 'Михайлов', 'Новиков', 'Федоров']
+FIRST_NAMES = ['Александр', 'Сергей', 'Дмитрий', 'Андрей', 'Алексей', 'Максим', 'Евгений', 'Иван', 'Михаил', 'Николай']
+MIDDLE_NAMES = ['Александрович', 'Сергеевич', 'Дмитриевич', 'Андреевич', 'Алексеевич', 'Иванович', 'Петрович']
+
+
+def create_organization(prefix, departments=1):
+    """Создает организацию с указанным количеством подразделений"""
+    organization = Organization.objects.create(name=f'{prefix} организация', short_name=prefix)
+    Department.objects.bulk_create([
+        Department(organization=organization, name=f'{prefix} цех {number}', short_name=f'{prefix}-{number}')
+        for number in range(1, departments + 1)
+    ])
+    return organization
+
+
+def build_employee(department, number, prefix, rng=random):
+    """Возвращает несохраненного сотрудника с правдоподобными данными"""
+    last_name, first_name, middle_name = rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES), rng.choice(MIDDLE_NAMES)
+    return Employee(
+        department=department,
+        employee_number=f'{prefix}-{number:07d}',
+        full_name=f'{last_name} {first_name} {middle_name}',
+        short_name=f'{last_name} {first_name[0]}.{middle_name[0]}.',
+        date_of_birth=date(1960, 1, 1) + timedelta(days=rng.randrange(365 * 40)),
+        marital_status='single',
+        passport_series=f'{rng.randrange(10000):04d}',
+        passport_number=f'{rng.randrange(1000000):06d}',
+        passport_issue_date=date(2010, 1, 1) + timedelta(days=rng.randrange(365 * 10)),
+        passport_issued_by='ОУФМС России',
+        registration_address='г. Москва',
+        union_ticket_number=f'{prefix}-T{number:07d}',
+        union_join_date=date(2000, 1, 1) + timedelta(days=rng.randrange(365 * 20)),
+    )
+
+
+def create_employees(organization, count, prefix, batch_size=2000):
+    """Создает сотрудников, равномерно распределяя их по подразделениям организации"""
+    departments = list(organization.departments.all())
+    batch = []
+    for number in range(count):
+        batch.append(build_employee(departments[number % len(departments)], number, prefix))
+        if len(batch) >= batch_size:
+            Employee.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Employee.objects.bulk_create(batch)
+
+
+def create_organization_tree(prefix, nodes, fanout=10, departments=1, batch_size=2000):
+    """
+    Создает дерево из nodes организаций, у каждой не более fanout подчиненных
+    (узел с номером n подчинен узлу (n - 1) // fanout), и по departments
+    подразделений в каждой. Сигналы не вызываются: таблицу замыкания
+    нужно перестроить. Возвращает список организаций в порядке номеров.
+    """
+    organizations = []
+    for number in range(nodes):
+        parent = organizations[(number - 1) // fanout] if number else None
+        organizations.append(Organization(name=f'{prefix} организация {number}', short_name=f'{prefix}-{number}', parent=parent))
+    Organization.objects.bulk_create(organizations, batch_size=batch_size)
+    Department.objects.bulk_create(
+        [
+            Department(organization=organization, name=f'{organization.short_name} цех {number}', short_name=f'{organization.short_name}-{number}')
+            for organization in organizations
+            for number in range(1, departments + 1)
+        ],
+        batch_size=batch_size,
+    )
+    return organizations
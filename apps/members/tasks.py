@@ -0,0 +1,94 @@
+"""
+Фоновый импорт файлов MemberImport.
+
+Импорт в статусе «Импортируется» отмечает heartbeat_at при захвате и после
+каждой записанной порции. Если отметки нет дольше IMPORT_LEASE, воркер
+считается упавшим: повторно доставленная задача (CELERY_TASK_ACKS_LATE) или
+requeue_stale_imports() по расписанию забирает импорт снова, и он
+продолжается после committed_row.
+"""
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.members.importer import error_report_content, import_file
+from apps.members.models import MemberImport
+
+
+logger = logging.getLogger(__name__)
+
+IMPORT_LEASE = timedelta(minutes=15)
+
+
+def stale_imports(now=None):
+    """Импорты, брошенные упавшими воркерами"""
+    cutoff = (now or timezone.now()) - IMPORT_LEASE
+    return MemberImport.objects.filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True), status='running')
+
+
+def claimable_imports(now=None):
+    """Импорты, которые может забрать воркер: в очереди или брошенные"""
+    return MemberImport.objects.filter(Q(status='queued') | Q(pk__in=stale_imports(now).values('pk')))
+
+
+def dispatch_import(import_id):
+    transaction.on_commit(lambda: run_member_import.delay(str(import_id)))
+
+
+def requeue_stale_imports():
+    """Возвращает в очередь брошенные импорты; возвращает их число"""
+    with transaction.atomic():
+        ids = list(stale_imports().select_for_update(skip_locked=True).values_list('id', flat=True))
+        MemberImport.objects.filter(pk__in=ids).update(status='queued')
+        for import_id in ids:
+            dispatch_import(import_id)
+    return len(ids)
+
+
+@shared_task(ignore_result=True)
+def run_member_import(import_id):
+    """Импортирует загруженный файл; прерванный импорт продолжается с последней записанной строки"""
+    claimed = claimable_imports().filter(pk=import_id).update(status='running', error='', heartbeat_at=timezone.now())
+    if not claimed:
+        return
+    member_import = MemberImport.objects.get(pk=import_id)
+    resume_after = member_import.committed_row
+    created_before, updated_before = member_import.created_rows, member_import.updated_rows
+
+    def save_progress(row, result):
+        MemberImport.objects.filter(pk=import_id).update(
+            committed_row=row,
+            heartbeat_at=timezone.now(),
+            created_rows=created_before + result.created,
+            updated_rows=updated_before + result.updated,
+        )
+
+    try:
+        with member_import.file.open('rb') as fileobj:
+            result = import_file(fileobj, member_import.kind, resume_after=resume_after, progress=save_progress)
+    except Exception as exc:
+        logger.exception('Не удалось импортировать файл %s', import_id)
+        MemberImport.objects.filter(pk=import_id).update(status='failed', error=str(exc))
+        return
+
+    member_import.refresh_from_db()
+    member_import.status = 'done'
+    member_import.total_rows = result.total
+    member_import.error_rows = len(result.errors)
+    member_import.imported_at = timezone.now()
+    if result.errors:
+        member_import.error_report.save(
+            f'errors_{member_import.pk}.csv', ContentFile(error_report_content(result)), save=False,
+        )
+    member_import.save()
+
+
+@shared_task(ignore_result=True)
+def requeue_stale_member_imports():
+    """Возвращает в очередь импорты, брошенные упавшими воркерами"""
+    requeue_stale_imports()
@@ -0,0 +1,155 @@
+import csv
+import io
+import shutil
+import tempfile
+from datetime import date, timedelta
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.members.directory import get_directory_page
+from apps.members.employment import refresh_current_employment
+from apps.members.models import Employee, EmploymentHistory, MemberImport, Position
+from apps.members.synthetic import build_employee, create_employees, create_organization
+from apps.members.tasks import IMPORT_LEASE, run_member_import
+
+
+class DirectoryQueryCountTests(TestCase):
+    """
+    Страница справочника строится фиксированным числом запросов
+    независимо от размера
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = create_organization('dir', departments=5)
+        create_employees(organization, 600, 'dir')
+        position = Position.objects.create(name='Слесарь')
+        EmploymentHistory.objects.bulk_create([
+            EmploymentHistory(
+                employee_id=employee_id, position=position, appointment_date=date(2020, 1, 1),
+                rate=100, is_main_position=True, employment_start_date=date(2020, 1, 1),
+            )
+            for employee_id in Employee.objects.values_list('id', flat=True)
+        ])
+        refresh_current_employment(Employee.objects.values_list('id', flat=True))
+
+    def render_page(self, page_size):
+        page = get_directory_page(page_size=page_size)
+        return [
+            (employee.department.name, employee.department.organization.short_name, employee.current_position.name)
+            for employee in page
+        ]
+
+    def test_page_of_20(self):
+        with self.assertNumQueries(1):
+            rows = self.render_page(20)
+        self.assertEqual(len(rows), 20)
+        self.assertTrue(all(position == 'Слесарь' for _, _, position in rows))
+
+    def test_page_of_500(self):
+        with self.assertNumQueries(1):
+            rows = self.render_page(500)
+        self.assertEqual(len(rows), 500)
+        self.assertTrue(all(position == 'Слесарь' for _, _, position in rows))
+
+    def test_next_page_after_cursor(self):
+        first = get_directory_page(page_size=20)
+        with self.assertNumQueries(1):
+            second = get_directory_page(cursor=first.next_cursor, page_size=20)
+        self.assertTrue({employee.pk for employee in first}.isdisjoint(employee.pk for employee in second))
+
+
+class CurrentEmploymentTests(TestCase):
+    """
+    Текущее место работы не перезаписывается сохранением сотрудника,
+    загруженного до изменения трудовой истории
+    """
+
+    def test_save_keeps_current_employment(self):
+        organization = create_organization('cur')
+        create_employees(organization, 1, 'cur')
+        employee = Employee.objects.get()
+        record = EmploymentHistory.objects.create(
+            employee=employee, position=Position.objects.create(name='Токарь'), appointment_date=date(2020, 1, 1),
+            rate=100, is_main_position=True, employment_start_date=date(2020, 1, 1),
+        )
+        self.assertIsNone(employee.current_employment_id)
+
+        employee.status = 'inactive'
+        employee.save()
+
+        employee.refresh_from_db()
+        self.assertEqual(employee.status, 'inactive')
+        self.assertEqual(employee.current_employment_id, record.pk)
+
+
+class MemberImportResumeTests(TestCase):
+    """
+    Импорт, брошенный упавшим воркером, забирается повторно и
+    продолжается после последней записанной строки
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        organization = create_organization('imp')
+        department = organization.departments.get()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';')
+        writer.writerow([
+            'Табельный номер', 'ФИО (полное)', 'Дата рождения', 'Семейное положение', 'Серия паспорта',
+            'Номер паспорта', 'Дата выдачи паспорта', 'Кем выдан', 'Адрес регистрации',
+            'Номер профсоюзного билета', 'Дата вступления в профсоюз', 'Организация', 'Подразделение',
+        ])
+        for number in range(10):
+            employee = build_employee(department, number, 'imp')
+            writer.writerow([
+                employee.employee_number, employee.full_name, employee.date_of_birth.strftime('%d.%m.%Y'),
+                'Не женат/Не замужем', employee.passport_series, employee.passport_number,
+                employee.passport_issue_date.strftime('%d.%m.%Y'), employee.passport_issued_by,
+                employee.registration_address, employee.union_ticket_number,
+                employee.union_join_date.strftime('%d.%m.%Y'), organization.short_name, department.name,
+            ])
+        self.member_import = MemberImport(kind='employees')
+        self.member_import.file.save('employees.csv', ContentFile(buffer.getvalue().encode('utf-8')), save=False)
+        # Воркер упал после записи строк 2-5 (первые четыре сотрудника)
+        self.member_import.status = 'running'
+        self.member_import.committed_row = 5
+        self.member_import.created_rows = 4
+        self.member_import.save()
+
+    def test_fresh_running_import_is_not_claimed(self):
+        MemberImport.objects.filter(pk=self.member_import.pk).update(heartbeat_at=timezone.now())
+        run_member_import(self.member_import.pk)
+        self.member_import.refresh_from_db()
+        self.assertEqual(self.member_import.status, 'running')
+        self.assertFalse(Employee.objects.exists())
+
+    def test_stale_import_resumes_after_committed_row(self):
+        MemberImport.objects.filter(pk=self.member_import.pk).update(
+            heartbeat_at=timezone.now() - IMPORT_LEASE - timedelta(minutes=1),
+        )
+        run_member_import(self.member_import.pk)
+        self.member_import.refresh_from_db()
+        self.assertEqual(self.member_import.status, 'done')
+        self.assertEqual(self.member_import.committed_row, 11)
+        self.assertEqual(self.member_import.total_rows, 10)
+        self.assertEqual(self.member_import.created_rows, 10)
+        # Строки, записанные до падения, повторно не пишутся
+        self.assertEqual(
+            sorted(Employee.objects.values_list('employee_number', flat=True)),
+            [f'imp-{number:07d}' for number in range(4, 10)],
+        )
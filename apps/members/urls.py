@@ -15,6 +15,7 @@ urlpatterns = [
     # Сотрудники
     path('employees/', views.employee_list_view, name='employee_list'),
     path('employees/create/', views.create_employee_view, name='create_employee'),
+    path('employees/export/', views.employee_export_view, name='employee_export'),
     path('employees/<uuid:emp_id>/', views.employee_detail_view, name='employee_detail'),
     path('employees/<uuid:emp_id>/edit/', views.edit_employee_view, name='edit_employee'),
     path('employees/<uuid:emp_id>/delete/', views.delete_employee_view, name='delete_employee'),
@@ -0,0 +1,49 @@
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, JsonResponse
+
+from apps.authentication.scope import filter_by_scope
+from apps.members.directory import InvalidCursor, get_directory_page
+from apps.members.export import csv_response, iter_employee_rows, xlsx_response
+from apps.members.models import Employee
+
+
+EXPORT_ROLES = ('admin', 'chairman')
+
+
+def directory_payload(employee):
+    position = employee.current_position
+    return {
+        'id': str(employee.pk),
+        'full_name': employee.full_name,
+        'employee_number': employee.employee_number,
+        'status': employee.get_status_display(),
+        'department': employee.department.name,
+        'organization': employee.department.organization.short_name,
+        'position': position.name if position else None,
+    }
+
+
+@login_required
+def employee_list_view(request):
+    """Справочник сотрудников: страница после курсора cursor размером page_size"""
+    queryset = filter_by_scope(Employee.objects.all(), request.user, department_field='department')
+    try:
+        page = get_directory_page(queryset, request.GET.get('cursor'), request.GET.get('page_size', 20))
+    except (InvalidCursor, ValueError):
+        return HttpResponseBadRequest('Некорректные параметры страницы')
+    return JsonResponse({
+        'results': [directory_payload(employee) for employee in page],
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+def employee_export_view(request):
+    """Выгрузка реестра членов профсоюза в CSV или XLSX"""
+    if request.user.role not in EXPORT_ROLES:
+        raise PermissionDenied
+    rows = iter_employee_rows(filter_by_scope(Employee.objects.all(), request.user, department_field='department'))
+    if request.GET.get('format') == 'xlsx':
+        return xlsx_response(rows)
+    return csv_response(rows)
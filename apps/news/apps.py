@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.news'
-    verbose_name = 'Новости и лента'
\ No newline at end of file
+    verbose_name = 'Новости и лента'
+
+    def ready(self):
+        from apps.news import signals  # noqa: F401
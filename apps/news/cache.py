@@ -0,0 +1,155 @@
+"""
+Кэширование ленты новостей.
+
+Первая страница ленты (общей и каждой категории) кэшируется в виде
+отрисованного фрагмента HTML. Ключ фрагмента содержит версию списка новостей
+и версию комментариев области (вся лента или категория): сохранение и
+удаление NewsPost увеличивает версию новостей, Comment - версию комментариев,
+после чего старые фрагменты перестают читаться и вытесняются по сроку жизни.
+Количество комментариев берется из NewsPost.comment_count (apps.news.comments).
+
+Версии областей используются и в ETag страницы, поэтому повторный запрос
+без изменений получает 304 без обращения к базе данных. Отложенная новость
+становится видимой без сохранения, поэтому вместе с версиями хранится время
+ближайшей публикации области: когда оно наступает, версия новостей области
+увеличивается, и ETag и ключ фрагмента меняются.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Min
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.news.models import NewsPost
+
+
+CACHE_PREFIX = 'news'
+PAGE_SIZE = 20
+FRAGMENT_TTL = 10 * 60
+ALL_SCOPE = 'all'
+
+
+def category_scope(category_id):
+    return f'category:{category_id}'
+
+
+def scopes_for_post(category_id):
+    """Области ленты, в которые попадает новость категории"""
+    return [ALL_SCOPE, category_scope(category_id)]
+
+
+def version_key(kind, scope):
+    return f'{CACHE_PREFIX}:version:{kind}:{scope}'
+
+
+def initial_version():
+    # Версия от текущего времени не совпадет с версией вытесненного ключа
+    return time.time_ns() // 1000
+
+
+def get_versions(scope):
+    """Возвращает пару (версия новостей, версия комментариев) области"""
+    keys = [version_key('posts', scope), version_key('comments', scope)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, initial_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return versions[keys[0]], versions[keys[1]]
+
+
+def publication_key(scope):
+    return f'{CACHE_PREFIX}:next_publication:{scope}'
+
+
+def next_publication(category_id=None):
+    """Время публикации ближайшей отложенной новости области или None"""
+    upcoming = NewsPost.objects.filter(published_at__gt=timezone.now())
+    if category_id is not None:
+        upcoming = upcoming.filter(category_id=category_id)
+    return upcoming.aggregate(next=Min('published_at'))['next']
+
+
+def get_feed_versions(scope, category_id=None):
+    """
+    Версии области с учетом отложенных публикаций. База данных читается
+    только после изменения версии новостей или наступления публикации.
+    """
+    posts_version, comments_version = get_versions(scope)
+    boundary = cache.get(publication_key(scope))
+    if boundary is not None and boundary[0] == posts_version:
+        if boundary[1] is None or boundary[1] > timezone.now():
+            return posts_version, comments_version
+        # Отложенная новость опубликовалась: страница изменилась
+        bump_versions('posts', [scope])
+        posts_version, comments_version = get_versions(scope)
+    cache.set(publication_key(scope), (posts_version, next_publication(category_id)), timeout=None)
+    return posts_version, comments_version
+
+
+def bump_versions(kind, scopes):
+    """Увеличивает версию новостей или комментариев указанных областей"""
+    for scope in set(scopes):
+        key = version_key(kind, scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, initial_version(), timeout=None)
+
+
+def published_posts(category_id=None):
+    """Опубликованные новости в порядке ленты: закрепленные, затем по дате"""
+    posts = NewsPost.objects.filter(published_at__lte=timezone.now())
+    if category_id is not None:
+        posts = posts.filter(category_id=category_id)
+    return posts.select_related('category', 'author').order_by('-is_pinned', '-published_at', 'id')
+
+
+def render_post_list(posts):
+    """Отрисовывает фрагмент списка новостей"""
+    return render_to_string('news/includes/post_list.html', {'posts': posts})
+
+
+def fragment_timeout(category_id):
+    """
+    Срок жизни фрагмента: не дольше FRAGMENT_TTL и не позже публикации
+    ближайшей отложенной новости, которая должна появиться в ленте.
+    """
+    upcoming = next_publication(category_id)
+    if upcoming is None:
+        return FRAGMENT_TTL
+    return max(1, min(FRAGMENT_TTL, int((upcoming - timezone.now()).total_seconds()) + 1))
+
+
+class FeedState:
+    """
+    Версии области ленты и производные от них ключ фрагмента и ETag
+    """
+
+    def __init__(self, category_id=None):
+        self.category_id = category_id
+        self.scope = ALL_SCOPE if category_id is None else category_scope(category_id)
+        self.posts_version, self.comments_version = get_feed_versions(self.scope, category_id)
+
+    @property
+    def fragment_key(self):
+        return f'{CACHE_PREFIX}:fragment:{self.scope}:{self.posts_version}:{self.comments_version}'
+
+    def etag(self, user):
+        """ETag первой страницы для пользователя (страница содержит его данные)"""
+        raw = f'{self.scope}:{self.posts_version}:{self.comments_version}:{user.pk if user.is_authenticated else "-"}'
+        return '"' + hashlib.md5(raw.encode('utf-8')).hexdigest() + '"'
+
+    def get_fragment(self):
+        """Возвращает тройку (HTML первой страницы, есть ли следующая, время формирования)"""
+        cached = cache.get(self.fragment_key)
+        if cached is not None:
+            return cached
+        posts = list(published_posts(self.category_id)[:PAGE_SIZE + 1])
+        has_next = len(posts) > PAGE_SIZE
+        # Last-Modified передается с точностью до секунды
+        value = (render_post_list(posts[:PAGE_SIZE]), has_next, timezone.now().replace(microsecond=0))
+        cache.set(self.fragment_key, value, timeout=fragment_timeout(self.category_id))
+        return value
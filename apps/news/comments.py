@@ -0,0 +1,103 @@
+"""
+Комментарии к новостям.
+
+NewsPost.comment_count и last_comment_at поддерживаются при добавлении и
+удалении комментария UPDATE с F-выражениями, поэтому параллельные вставки
+не теряют приращений, а ленте не нужен подсчет комментариев. Ветка
+комментариев отдается страницами по ключу (created_at, id) вместе с
+авторами одним запросом.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.news.models import Comment, NewsPost
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Некорректный курсор страницы"""
+
+
+def comment_added(comment):
+    """Учитывает новый комментарий в счетчиках новости"""
+    NewsPost.objects.filter(pk=comment.news_post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=Greatest(Coalesce('last_comment_at', Value(comment.created_at)), Value(comment.created_at)),
+    )
+
+
+def comment_removed(comment):
+    """Учитывает удаление комментария в счетчиках новости"""
+    last_comment = Subquery(
+        Comment.objects.filter(news_post=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+    NewsPost.objects.filter(pk=comment.news_post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1,
+        last_comment_at=last_comment,
+    )
+
+
+def recount_comments(post_ids=None):
+    """
+    Пересчитывает счетчики комментариев по таблице Comment.
+    Возвращает число новостей, у которых счетчики расходились.
+    """
+    posts = NewsPost.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    rows = (
+        posts.annotate(actual_count=Count('comments'), actual_last=Max('comments__created_at'))
+        .values_list('pk', 'comment_count', 'last_comment_at', 'actual_count', 'actual_last')
+        .order_by()
+    )
+    fixed = 0
+    for pk, comment_count, last_comment_at, actual_count, actual_last in rows.iterator():
+        if (comment_count, last_comment_at) != (actual_count, actual_last):
+            NewsPost.objects.filter(pk=pk).update(comment_count=actual_count, last_comment_at=actual_last)
+            fixed += 1
+    return fixed
+
+
+def encode_cursor(comment):
+    """Кодирует позицию комментария в ветке в строку курсора"""
+    payload = json.dumps([comment.created_at.isoformat(), str(comment.pk)])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Декодирует строку курсора в пару (created_at, id)"""
+    try:
+        created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        return datetime.fromisoformat(created_at), uuid.UUID(pk)
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise InvalidCursor('Некорректный курсор страницы') from exc
+
+
+def get_comment_page(news_post_id, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Возвращает пару (комментарии, курсор следующей страницы).
+    Выполняет один запрос: комментарии вместе с авторами.
+    """
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    comments = (
+        Comment.objects.filter(news_post_id=news_post_id)
+        .select_related('author')
+        .order_by('created_at', 'id')
+    )
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        comments = comments.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+    comments = list(comments[:page_size + 1])
+    next_cursor = None
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        next_cursor = encode_cursor(comments[-1])
+    return comments, next_cursor
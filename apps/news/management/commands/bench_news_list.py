@@ -0,0 +1,102 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.news.cache import PAGE_SIZE, published_posts
+from apps.news.comments import get_comment_page, recount_comments
+from apps.news.models import Comment, NewsCategory, NewsPost
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает построение ленты новостей с подсчетом комментариев и со счетчиками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000, help='Количество новостей')
+        parser.add_argument('--comments', type=int, default=200, help='Комментариев на новость')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов каждого замера')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Размер пакета записи')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        author = get_user_model().objects.create_user(username=prefix)
+        category = NewsCategory.objects.create(name=prefix)
+        try:
+            self.populate(author, category, options['posts'], options['comments'], options['batch_size'])
+            posts = NewsPost.objects.filter(category=category)
+            scenarios = [
+                ('До: N+1 (post.comments.count())', lambda: [
+                    post.comments.count() for post in published_posts(category.pk)[:PAGE_SIZE]
+                ]),
+                ('До: первая страница с Count', lambda: list(
+                    posts.annotate(comments_total=Count('comments')).order_by('-is_pinned', '-published_at')[:PAGE_SIZE]
+                )),
+                ('До: все новости с Count', lambda: list(
+                    posts.annotate(comments_total=Count('comments')).order_by('-is_pinned', '-published_at')
+                )),
+                ('После: первая страница со счетчиком', lambda: [
+                    post.comment_count for post in published_posts(category.pk)[:PAGE_SIZE]
+                ]),
+                ('После: все новости со счетчиком', lambda: [
+                    post.comment_count for post in published_posts(category.pk)
+                ]),
+                ('Ветка комментариев, страница 50', lambda: [
+                    comment.author.username for comment in get_comment_page(posts.first().pk)[0]
+                ]),
+            ]
+            for label, scenario in scenarios:
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        scenario()
+                        timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f'{label}: медиана {statistics.median(timings):.1f} мс, '
+                    f'максимум {max(timings):.1f} мс, запросов {len(queries)}'
+                )
+
+            # Удаление новости каскадом проходит через сигналы комментариев
+            post = posts.first()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                post.delete()
+                elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(
+                f"Удаление новости с {options['comments']} комментариями: {elapsed:.1f} мс, запросов {len(queries)}"
+            )
+        finally:
+            NewsPost.objects.filter(category=category).delete()
+            category.delete()
+            author.delete()
+
+    def populate(self, author, category, post_count, comments_per_post, batch_size):
+        self.stdout.write(f'Подготовка данных: {post_count} новостей × {comments_per_post} комментариев...')
+        started = time.perf_counter()
+        now = timezone.now()
+        posts = NewsPost.objects.bulk_create([
+            NewsPost(
+                title=f'Новость {number}', content='Текст новости ' * 50, author=author, category=category,
+                is_pinned=number < 3, published_at=now - timedelta(hours=number),
+            )
+            for number in range(post_count)
+        ], batch_size=batch_size)
+        batch = []
+        for post in posts:
+            for number in range(comments_per_post):
+                batch.append(Comment(news_post=post, author=author, content=f'Комментарий {number}'))
+                if len(batch) >= batch_size:
+                    Comment.objects.bulk_create(batch)
+                    batch = []
+        if batch:
+            Comment.objects.bulk_create(batch)
+        # bulk_create не отправляет сигналы, счетчики выставляются пересчетом
+        recount_comments([post.pk for post in posts])
+        self.stdout.write(f'Данные подготовлены за {time.perf_counter() - started:.1f} с')
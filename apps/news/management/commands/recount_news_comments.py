@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.news.comments import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики комментариев новостей по таблице комментариев'
+
+    def handle(self, *args, **options):
+        fixed = recount_comments()
+        self.stdout.write(self.style.SUCCESS(f'Исправлено новостей: {fixed}'))
@@ -35,6 +35,8 @@ class NewsPost(models.Model):
     category = models.ForeignKey(NewsCategory, on_delete=models.CASCADE, verbose_name='Категория')
     is_pinned = models.BooleanField(default=False, verbose_name='Закреплена')
     published_at = models.DateTimeField(default=timezone.now, verbose_name='Дата публикации')
+    comment_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество комментариев')
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Дата последнего комментария')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
@@ -46,6 +48,16 @@ class NewsPost(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Счетчики комментариев меняются только F-выражениями (apps.news.comments),
+        # поэтому сохранение загруженной ранее новости их не перезаписывает
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('comment_count', 'last_comment_at')
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """
@@ -62,6 +74,9 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['news_post', 'created_at', 'id'], name='news_comment_thread_idx'),
+        ]
 
     def __str__(self):
         return f'Комментарий от {self.author.username} к {self.news_post.title}'
\ No newline at end of file
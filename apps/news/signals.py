@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.news.cache import bump_versions, scopes_for_post
+from apps.news.comments import comment_added, comment_removed, recount_comments
+from apps.news.models import Comment, NewsCategory, NewsPost
+
+
+@receiver(pre_save, sender=NewsPost)
+def remember_post_category(sender, instance, raw=False, **kwargs):
+    """Запоминает прежнюю категорию новости, чтобы сбросить и ее ленту"""
+    instance._previous_category_id = None
+    if not raw and not instance._state.adding:
+        instance._previous_category_id = (
+            NewsPost.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=NewsPost)
+def invalidate_feed_on_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = scopes_for_post(instance.category_id)
+    previous = getattr(instance, '_previous_category_id', None)
+    if previous and previous != instance.category_id:
+        scopes += scopes_for_post(previous)
+    bump_versions('posts', scopes)
+
+
+@receiver(post_delete, sender=NewsPost)
+def invalidate_feed_on_post_delete(sender, instance, **kwargs):
+    bump_versions('posts', scopes_for_post(instance.category_id))
+
+
+@receiver(post_save, sender=NewsCategory)
+@receiver(post_delete, sender=NewsCategory)
+def invalidate_feed_on_category_change(sender, instance, raw=False, **kwargs):
+    """Фрагменты ленты содержат название категории: сбрасывает ленту категории и общую"""
+    if not raw:
+        bump_versions('posts', scopes_for_post(instance.pk))
+
+
+def bump_comment_versions(news_post_id):
+    category_id = NewsPost.objects.filter(pk=news_post_id).values_list('category_id', flat=True).first()
+    if category_id:
+        bump_versions('comments', scopes_for_post(category_id))
+
+
+def refresh_comment_counters(post_ids):
+    """Пересчитывает счетчики новостей и сбрасывает версии комментариев их лент один раз"""
+    recount_comments(post_ids)
+    category_ids = NewsPost.objects.filter(pk__in=post_ids).values_list('category_id', flat=True).distinct()
+    bump_versions('comments', [scope for category_id in category_ids for scope in scopes_for_post(category_id)])
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_on_save(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый комментарий в счетчиках новости и сбрасывает версию комментариев лент"""
+    if raw or not created:
+        return
+    comment_added(instance)
+    bump_comment_versions(instance.news_post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def count_comment_on_delete(sender, instance, origin=None, **kwargs):
+    """Учитывает удаление комментария в счетчиках новости"""
+    if origin is None or origin is instance:
+        comment_removed(instance)
+        bump_comment_versions(instance.news_post_id)
+        return
+    if getattr(origin, 'model', type(origin)) in (NewsPost, NewsCategory):
+        # Комментарии удаляются вместе с новостью: ее удаление само сбрасывает ленты
+        return
+    # Каскад (удаление пользователя, набора комментариев): новости собираются
+    # и пересчитываются одним проходом после фиксации удаления
+    post_ids = getattr(origin, '_removed_comment_post_ids', None)
+    if post_ids is None:
+        post_ids = origin._removed_comment_post_ids = set()
+        transaction.on_commit(lambda: refresh_comment_counters(post_ids))
+    post_ids.add(instance.news_post_id)
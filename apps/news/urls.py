@@ -13,4 +13,5 @@ urlpatterns = [
     path('<uuid:news_id>/delete/', views.delete_news_view, name='delete_news'),
     # Комментарии
     path('<uuid:news_id>/comment/', views.add_comment_view, name='add_comment'),
+    path('<uuid:news_id>/comments/', views.news_comments_view, name='news_comments'),
 ]
\ No newline at end of file
@@ -0,0 +1,92 @@
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+
+from apps.news.cache import PAGE_SIZE, FeedState, published_posts, render_post_list
+from apps.news.comments import DEFAULT_PAGE_SIZE, InvalidCursor, get_comment_page
+from apps.news.models import NewsCategory
+
+
+def get_page_number(request):
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        raise Http404
+    if page < 1:
+        raise Http404
+    return page
+
+
+def render_feed(request, category_id=None):
+    """
+    Страница ленты. Первая страница берется из кэша и отдается с ETag и
+    Last-Modified; остальные страницы строятся из базы данных.
+    """
+    page = get_page_number(request)
+
+    if page > 1:
+        category = get_object_or_404(NewsCategory, pk=category_id) if category_id else None
+        offset = (page - 1) * PAGE_SIZE
+        posts = list(published_posts(category_id)[offset:offset + PAGE_SIZE + 1])
+        if not posts:
+            raise Http404
+        return render(request, 'news/news_list.html', {
+            'category': category,
+            'page': page,
+            'has_next': len(posts) > PAGE_SIZE,
+            'posts_html': mark_safe(render_post_list(posts[:PAGE_SIZE])),
+        })
+
+    state = FeedState(category_id)
+    etag = state.etag(request.user)
+    # ETag проверяется до обращения к базе данных и к кэшу фрагмента
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+
+    category = get_object_or_404(NewsCategory, pk=category_id) if category_id else None
+    html, has_next, last_modified = state.get_fragment()
+    response = render(request, 'news/news_list.html', {
+        'category': category,
+        'page': page,
+        'has_next': has_next,
+        'posts_html': mark_safe(html),
+    })
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()), response=response,
+    )
+
+
+def news_list_view(request):
+    """Лента новостей"""
+    return render_feed(request)
+
+
+def news_by_category_view(request, category_id):
+    """Лента новостей категории"""
+    return render_feed(request, category_id)
+
+
+def news_comments_view(request, news_id):
+    """Страница ветки комментариев новости (JSON, параметры cursor и page_size)"""
+    try:
+        comments, next_cursor = get_comment_page(news_id, request.GET.get('cursor'), request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except (InvalidCursor, ValueError):
+        return HttpResponseBadRequest('Некорректные параметры страницы')
+    return JsonResponse({
+        'results': [
+            {
+                'id': str(comment.pk),
+                'author': comment.author.get_full_name() or comment.author.username,
+                'content': comment.content,
+                'created_at': comment.created_at.isoformat(),
+            }
+            for comment in comments
+        ],
+        'next_cursor': next_cursor,
+    })
@@ -0,0 +1,253 @@
+"""
+Формирование протоколов собраний в DOCX.
+
+Шаблон протокола - документ DOCX с подстановками вида {{ title }}. Шаблон
+компилируется один раз на процесс: содержимое читается в память, и в нем
+заранее находятся абзацы с подстановками, абзацы-блоки {{ agenda }} и
+{{ protocol }} (заменяются абзацем на каждую строку текста) и таблица
+участников, последняя строка которой - прототип строки участника с
+подстановками {{ attendee.<поле> }}. Для каждого протокола документ
+открывается из байтов шаблона, и заполняются только найденные места.
+
+Путь к шаблону задается settings.PROTOCOLS_DOCX_TEMPLATE; без него
+используется шаблон по умолчанию, собранный python-docx.
+
+Данные собраний читаются пакетно: собрания - одним запросом, участники всех
+собраний пакета - одним запросом к промежуточной таблице. Протоколы за
+период отдаются ZIP-архивом, который пишется в поток по мере формирования.
+"""
+import io
+import os
+import re
+import zipfile
+from collections import defaultdict
+from copy import deepcopy
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.protocols.models import Meeting
+
+
+PLACEHOLDER_RE = re.compile(r'\{\{\s*([\w.]+)\s*\}\}')
+BLOCK_FIELDS = ('agenda', 'protocol')
+ATTENDEE_HEADER = ['№', 'ФИО', 'Табельный номер', 'Подразделение']
+ATTENDEE_FIELDS = ['number', 'full_name', 'employee_number', 'department']
+BATCH_SIZE = 100
+
+
+@dataclass
+class ProtocolContext:
+    meeting: Meeting
+    values: dict
+    attendees: list = field(default_factory=list)
+
+
+def build_default_template():
+    """Возвращает содержимое шаблона протокола по умолчанию"""
+    from docx import Document
+
+    document = Document()
+    document.add_heading('Протокол собрания', level=1)
+    document.add_paragraph('{{ title }}')
+    for label, name in (
+        ('Тип собрания', 'meeting_type'), ('Дата и время', 'date'),
+        ('Место проведения', 'location'), ('Организатор', 'organizer'),
+    ):
+        document.add_paragraph(f'{label}: {{{{ {name} }}}}')
+    document.add_heading('Повестка дня', level=2)
+    document.add_paragraph('{{ agenda }}')
+    document.add_heading('Присутствовали: {{ attendee_count }}', level=2)
+    table = document.add_table(rows=2, cols=len(ATTENDEE_HEADER))
+    table.style = 'Table Grid'
+    for cell, value in zip(table.rows[0].cells, ATTENDEE_HEADER):
+        cell.text = value
+    for cell, name in zip(table.rows[1].cells, ATTENDEE_FIELDS):
+        cell.text = f'{{{{ attendee.{name} }}}}'
+    document.add_heading('Ход собрания и принятые решения', level=2)
+    document.add_paragraph('{{ protocol }}')
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def fill_paragraph(element, values):
+    """
+    Заменяет подстановки в абзаце (элемент w:p). Текст собирается из всех
+    фрагментов, так как Word может разбить подстановку на несколько;
+    результат записывается в первый фрагмент с форматированием его run.
+    """
+    from docx.oxml.ns import qn
+
+    texts = list(element.iter(qn('w:t')))
+    if not texts:
+        return
+    text = ''.join(node.text or '' for node in texts)
+    texts[0].text = PLACEHOLDER_RE.sub(lambda match: str(values.get(match.group(1), '')), text)
+    texts[0].set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+    for node in texts[1:]:
+        node.text = ''
+
+
+class ProtocolTemplate:
+    """
+    Скомпилированный шаблон протокола: байты документа и позиции подстановок
+    """
+
+    def __init__(self, content):
+        from docx import Document
+
+        self.content = content
+        document = Document(io.BytesIO(content))
+        self.paragraphs = []
+        self.blocks = []
+        for index, paragraph in enumerate(document.paragraphs):
+            names = PLACEHOLDER_RE.findall(paragraph.text)
+            if len(names) == 1 and names[0] in BLOCK_FIELDS and paragraph.text.strip() == f'{{{{ {names[0]} }}}}':
+                self.blocks.append((index, names[0]))
+            elif names:
+                self.paragraphs.append(index)
+        self.table_index = None
+        for index, table in enumerate(document.tables):
+            if 'attendee.' in ''.join(cell.text for cell in table.rows[-1].cells):
+                self.table_index = index
+                break
+
+    def render(self, context):
+        """Возвращает содержимое DOCX протокола"""
+        from docx import Document
+
+        document = Document(io.BytesIO(self.content))
+        paragraphs = document.paragraphs
+        for index in self.paragraphs:
+            fill_paragraph(paragraphs[index]._p, context.values)
+        for index, name in self.blocks:
+            paragraph = paragraphs[index]
+            for line in (context.values.get(name) or '').splitlines() or ['']:
+                paragraph.insert_paragraph_before(line, style=paragraph.style)
+            paragraph._p.getparent().remove(paragraph._p)
+        if self.table_index is not None:
+            self.fill_attendees(document.tables[self.table_index], context.attendees)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+
+    def fill_attendees(self, table, attendees):
+        """Размножает строку-прототип таблицы по участникам"""
+        from docx.oxml.ns import qn
+
+        prototype = table.rows[-1]._tr
+        for number, attendee in enumerate(attendees, start=1):
+            row = deepcopy(prototype)
+            values = {f'attendee.{name}': value for name, value in attendee.items()}
+            values['attendee.number'] = number
+            for element in row.iter(qn('w:p')):
+                fill_paragraph(element, values)
+            prototype.addprevious(row)
+        prototype.getparent().remove(prototype)
+
+
+@lru_cache(maxsize=8)
+def compile_template(path, modified):
+    if path is None:
+        return ProtocolTemplate(build_default_template())
+    with open(path, 'rb') as fileobj:
+        return ProtocolTemplate(fileobj.read())
+
+
+def get_template():
+    """Скомпилированный шаблон; при изменении файла шаблон перекомпилируется"""
+    path = getattr(settings, 'PROTOCOLS_DOCX_TEMPLATE', None)
+    return compile_template(path, os.path.getmtime(path) if path else None)
+
+
+def load_contexts(meetings):
+    """
+    Данные для протоколов собраний: два запроса на пакет независимо от числа
+    собраний и участников
+    """
+    meetings = list(meetings.select_related('meeting_type', 'organizer'))
+    attendees = defaultdict(list)
+    rows = (
+        Meeting.attendees.through.objects.filter(meeting_id__in=[meeting.pk for meeting in meetings])
+        .order_by('employee__full_name', 'employee_id')
+        .values_list('meeting_id', 'employee__full_name', 'employee__employee_number', 'employee__department__name')
+    )
+    for meeting_id, full_name, employee_number, department in rows.iterator():
+        attendees[meeting_id].append({
+            'full_name': full_name, 'employee_number': employee_number, 'department': department,
+        })
+
+    contexts = []
+    for meeting in meetings:
+        organizer = meeting.organizer
+        contexts.append(ProtocolContext(
+            meeting=meeting,
+            values={
+                'title': meeting.title,
+                'meeting_type': meeting.meeting_type.name,
+                'date': timezone.localtime(meeting.meeting_date).strftime('%d.%m.%Y %H:%M'),
+                'location': meeting.location,
+                'organizer': organizer.get_full_name() or organizer.username,
+                'agenda': meeting.agenda,
+                'protocol': meeting.protocol,
+                'attendee_count': len(attendees[meeting.pk]),
+            },
+            attendees=attendees[meeting.pk],
+        ))
+    return contexts
+
+
+def protocol_filename(meeting):
+    title = slugify(meeting.title, allow_unicode=True)[:80] or 'protokol'
+    return f"{timezone.localtime(meeting.meeting_date).strftime('%Y-%m-%d')}_{title}_{str(meeting.pk)[:8]}.docx"
+
+
+def render_protocol(meeting):
+    """Возвращает содержимое DOCX протокола одного собрания"""
+    context, = load_contexts(Meeting.objects.filter(pk=meeting.pk))
+    return get_template().render(context)
+
+
+def iter_protocols(meetings, batch_size=BATCH_SIZE):
+    """Генератор пар (имя файла, содержимое DOCX) по собраниям queryset"""
+    template = get_template()
+    ids = list(meetings.order_by('meeting_date', 'id').values_list('id', flat=True))
+    for start in range(0, len(ids), batch_size):
+        contexts = load_contexts(Meeting.objects.filter(pk__in=ids[start:start + batch_size]).order_by('meeting_date', 'id'))
+        for context in contexts:
+            yield protocol_filename(context.meeting), template.render(context)
+
+
+class ZipStream:
+    """Объект с интерфейсом файла, накапливающий записанные байты до выдачи"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_protocols_zip(meetings, batch_size=BATCH_SIZE):
+    """Генератор фрагментов ZIP-архива с протоколами собраний"""
+    stream = ZipStream()
+    # Поток без seek: zipfile пишет размеры после данных каждого файла.
+    # DOCX уже сжат, поэтому файлы сохраняются без повторного сжатия
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, content in iter_protocols(meetings, batch_size):
+            archive.writestr(filename, content)
+            yield stream.drain()
+    yield stream.drain()
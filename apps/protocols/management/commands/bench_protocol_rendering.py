@@ -0,0 +1,102 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.members.models import Employee, Organization
+from apps.members.synthetic import create_employees, create_organization
+from apps.protocols.documents import get_template, iter_protocols, iter_protocols_zip, render_protocol
+from apps.protocols.models import Meeting, MeetingType
+from apps.reports.rendering import ReportDocument, write_docx
+
+
+User = get_user_model()
+
+
+def render_naive(meeting):
+    """Протокол, собранный с нуля, с запросом участников на каждую строку"""
+    document = ReportDocument(f'Протокол собрания: {meeting.title}', [meeting.agenda, meeting.protocol])
+    rows = []
+    for number, employee_id in enumerate(meeting.attendees.values_list('id', flat=True), start=1):
+        employee = Employee.objects.select_related('department').get(pk=employee_id)
+        rows.append((number, employee.full_name, employee.employee_number, employee.department.name))
+    document.add_table('Присутствовали', ['№', 'ФИО', 'Табельный номер', 'Подразделение'], rows)
+    return write_docx(document)
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость формирования протоколов собраний в DOCX (документов в секунду)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meetings', type=int, default=50, help='Количество собраний')
+        parser.add_argument('--attendees', type=int, default=500, help='Участников на собрание')
+        parser.add_argument('--naive', type=int, default=5, help='Собраний для замера формирования с нуля')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        organization = create_organization(prefix, departments=10)
+        organizer = User.objects.create_user(username=prefix, password=uuid.uuid4().hex, role='chairman')
+        meeting_type = MeetingType.objects.create(name=f'{prefix} конференция')
+        try:
+            create_employees(organization, options['attendees'], prefix)
+            employee_ids = list(Employee.objects.filter(department__organization=organization).values_list('id', flat=True))
+            start = timezone.now() - timedelta(days=365)
+            meetings = Meeting.objects.bulk_create([
+                Meeting(
+                    title=f'{prefix} конференция {number}', meeting_type=meeting_type, organizer=organizer,
+                    meeting_date=start + timedelta(days=number * 7), location='Актовый зал',
+                    agenda='\n'.join(f'{item}. Вопрос повестки {item}' for item in range(1, 11)),
+                    protocol='\n'.join(f'Слушали: докладчик {item}. Постановили: принять к сведению.' for item in range(1, 31)),
+                )
+                for number in range(options['meetings'])
+            ])
+            Meeting.attendees.through.objects.bulk_create([
+                Meeting.attendees.through(meeting_id=meeting.pk, employee_id=employee_id)
+                for meeting in meetings
+                for employee_id in employee_ids
+            ], batch_size=5000)
+            queryset = Meeting.objects.filter(pk__in=[meeting.pk for meeting in meetings])
+
+            began = time.perf_counter()
+            get_template()
+            self.stdout.write(f'Компиляция шаблона: {(time.perf_counter() - began) * 1000:.1f} мс')
+
+            timings = []
+            for meeting in meetings[:options['naive']]:
+                began = time.perf_counter()
+                render_naive(meeting)
+                timings.append(time.perf_counter() - began)
+            self.report('С нуля, запрос на участника', timings)
+
+            timings = []
+            for meeting in meetings[:options['naive']]:
+                began = time.perf_counter()
+                render_protocol(meeting)
+                timings.append(time.perf_counter() - began)
+            self.report('Шаблон, один протокол', timings)
+
+            began = time.perf_counter()
+            count = sum(1 for _ in iter_protocols(queryset))
+            self.report('Шаблон, пакет', [(time.perf_counter() - began) / count] * count)
+
+            began = time.perf_counter()
+            size = sum(len(chunk) for chunk in iter_protocols_zip(queryset))
+            elapsed = time.perf_counter() - began
+            self.report('ZIP-архив', [elapsed / len(meetings)] * len(meetings))
+            self.stdout.write(f'Размер архива: {size / 1024 / 1024:.1f} МБ')
+        finally:
+            Meeting.objects.filter(meeting_type=meeting_type).delete()
+            meeting_type.delete()
+            organizer.delete()
+            Employee.objects.filter(department__organization=organization).delete()
+            Organization.objects.filter(pk=organization.pk).delete()
+
+    def report(self, label, timings):
+        self.stdout.write(
+            f'{label}: {len(timings)} документов, {len(timings) / sum(timings):.1f} документов/с, '
+            f'медиана {statistics.median(timings) * 1000:.0f} мс'
+        )
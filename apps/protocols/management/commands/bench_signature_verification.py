@@ -0,0 +1,70 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.members.models import Employee, Organization
+from apps.members.synthetic import create_employees, create_organization
+from apps.protocols.models import DocumentSignature, Meeting, MeetingType
+from apps.protocols.signatures import compute_signature, document_digest, verify_document
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость пакетной проверки подписей протокола собрания'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signatures', type=int, default=300, help='Подписей под протоколом')
+        parser.add_argument('--repeat', type=int, default=20, help='Повторов проверки')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        organization = create_organization(prefix, departments=5)
+        organizer = User.objects.create_user(username=prefix, password=uuid.uuid4().hex, role='chairman')
+        meeting_type = MeetingType.objects.create(name=f'{prefix} собрание')
+        try:
+            create_employees(organization, options['signatures'], prefix)
+            meeting = Meeting.objects.create(
+                title=f'{prefix} собрание', meeting_type=meeting_type, organizer=organizer,
+                meeting_date=timezone.now(), location='Актовый зал', agenda='Повестка',
+                protocol='\n'.join(f'Слушали: вопрос {item}. Постановили: утвердить.' for item in range(100)),
+            )
+            digest = document_digest('meeting', meeting)
+            DocumentSignature.objects.bulk_create([
+                DocumentSignature(
+                    document_type='meeting', document_id=meeting.pk, signer_id=employee_id,
+                    signature_hash=compute_signature('meeting', meeting.pk, employee_id, digest),
+                )
+                for employee_id in Employee.objects.filter(department__organization=organization).values_list('id', flat=True)
+            ])
+
+            timings = []
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(options['repeat']):
+                    began = time.perf_counter()
+                    results = verify_document('meeting', meeting.pk)
+                    timings.append(time.perf_counter() - began)
+            valid = sum(result.valid for result in results)
+            median = statistics.median(timings)
+            self.stdout.write(
+                f'Проверка {len(results)} подписей (действительных {valid}): медиана {median * 1000:.1f} мс, '
+                f'{len(results) / median:.0f} подписей/с, {len(queries) / options["repeat"]:.0f} запросов'
+            )
+
+            Meeting.objects.filter(pk=meeting.pk).update(protocol=meeting.protocol + '\nИзменено после подписания')
+            results = verify_document('meeting', meeting.pk)
+            self.stdout.write(f'После изменения протокола недействительных подписей: {sum(not result.valid for result in results)}')
+        finally:
+            DocumentSignature.objects.filter(signer__department__organization=organization).delete()
+            Meeting.objects.filter(meeting_type=meeting_type).delete()
+            meeting_type.delete()
+            organizer.delete()
+            Employee.objects.filter(department__organization=organization).delete()
+            Organization.objects.filter(pk=organization.pk).delete()
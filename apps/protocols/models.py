@@ -97,6 +97,9 @@ class DocumentSignature(models.Model):
         verbose_name = 'Электронная подпись'
         verbose_name_plural = 'Электронные подписи'
         unique_together = ['document_type', 'document_id', 'signer']
+        indexes = [
+            models.Index(fields=['signer', 'timestamp'], name='protocols_signature_signer_idx'),
+        ]
 
     def __str__(self):
         return f"Подпись {self.signer.full_name} для {self.document_type} {self.document_id}"
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Электронные подписи документов.
+
+DocumentSignature ссылается на документ парой (document_type, document_id).
+Подпись - HMAC-SHA256 (пакет cryptography) от типа и ID документа, ID
+подписавшего и SHA-256 содержимого документа на момент подписания; ключ
+выводится через HKDF из DOCUMENT_SIGNATURE_KEY, а если он не задан - из
+SECRET_KEY. Изменение текста документа после подписания делает подпись
+недействительной. Новые подписи ставятся текущим ключом, а проверка
+принимает и ключи, выведенные из DOCUMENT_SIGNATURE_KEY_FALLBACKS (или
+SECRET_KEY_FALLBACKS), поэтому смена секрета не делает старые подписи
+недействительными.
+
+Проверка идет пакетами: документы разрешаются одним запросом на тип
+документа, хэш содержимого считается один раз на документ, а подписи
+сверяются в памяти, поэтому проверка всех подписей протокола - два запроса
+независимо от числа подписей.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, hmac
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+
+from apps.protocols.models import DocumentSignature, Meeting, MotivatedOpinion
+
+
+# Тип документа -> (модель, поле с подписываемым текстом)
+DOCUMENT_TYPES = {
+    'meeting': (Meeting, 'protocol'),
+    'motivated_opinion': (MotivatedOpinion, 'content'),
+}
+
+
+class UnknownDocumentType(ValueError):
+    pass
+
+
+@dataclass
+class VerificationResult:
+    signature: DocumentSignature
+    document: object
+    valid: bool
+    reason: str = ''
+
+
+def derive_key(secret):
+    return HKDF(
+        algorithm=hashes.SHA256(), length=32, salt=None, info=b'union-portal document signature',
+    ).derive(secret.encode())
+
+
+@lru_cache(maxsize=1)
+def signing_keys():
+    """Ключи подписи: текущий первым, затем прежние"""
+    if getattr(settings, 'DOCUMENT_SIGNATURE_KEY', None):
+        secrets = [settings.DOCUMENT_SIGNATURE_KEY, *getattr(settings, 'DOCUMENT_SIGNATURE_KEY_FALLBACKS', [])]
+    else:
+        secrets = [settings.SECRET_KEY, *getattr(settings, 'SECRET_KEY_FALLBACKS', [])]
+    return tuple(derive_key(secret) for secret in secrets)
+
+
+def signing_key():
+    return signing_keys()[0]
+
+
+def get_document_model(document_type):
+    try:
+        return DOCUMENT_TYPES[document_type]
+    except KeyError:
+        raise UnknownDocumentType(f'Неизвестный тип документа: {document_type}')
+
+
+def document_digest(document_type, document):
+    """SHA-256 подписываемого текста документа"""
+    _, content_field = get_document_model(document_type)
+    digest = hashes.Hash(hashes.SHA256())
+    digest.update((getattr(document, content_field) or '').encode())
+    return digest.finalize()
+
+
+def signature_mac(document_type, document_id, signer_id, digest, key=None):
+    mac = hmac.HMAC(key or signing_key(), hashes.SHA256())
+    mac.update(f'{document_type}:{document_id}:{signer_id}:'.encode())
+    mac.update(digest)
+    return mac
+
+
+def compute_signature(document_type, document_id, signer_id, digest):
+    return signature_mac(document_type, document_id, signer_id, digest).finalize().hex()
+
+
+def signature_matches(document_type, document_id, signer_id, digest, signature_hash):
+    """Сверяет подпись с текущим и прежними ключами"""
+    try:
+        expected = bytes.fromhex(signature_hash)
+    except ValueError:
+        return False
+    for key in signing_keys():
+        try:
+            signature_mac(document_type, document_id, signer_id, digest, key).verify(expected)
+        except InvalidSignature:
+            continue
+        return True
+    return False
+
+
+def sign_document(document_type, document, signer, ip_address=None):
+    """Подписывает документ от имени сотрудника signer"""
+    return DocumentSignature.objects.create(
+        document_type=document_type,
+        document_id=document.pk,
+        signer=signer,
+        signature_hash=compute_signature(document_type, document.pk, signer.pk, document_digest(document_type, document)),
+        ip_address=ip_address,
+    )
+
+
+def resolve_documents(references):
+    """
+    Загружает документы по парам (тип, ID): один запрос на тип документа.
+    Возвращает {(тип, ID): документ}; отсутствующие документы и документы
+    неизвестных типов пропускаются.
+    """
+    ids_by_type = defaultdict(set)
+    for document_type, document_id in references:
+        if document_type in DOCUMENT_TYPES:
+            ids_by_type[document_type].add(document_id)
+    documents = {}
+    for document_type, ids in ids_by_type.items():
+        model, _ = DOCUMENT_TYPES[document_type]
+        for document in model.objects.filter(pk__in=ids):
+            documents[(document_type, document.pk)] = document
+    return documents
+
+
+def verify_signatures(signatures):
+    """Проверяет подписи пакетом; возвращает список VerificationResult в исходном порядке"""
+    signatures = list(signatures)
+    documents = resolve_documents((signature.document_type, signature.document_id) for signature in signatures)
+    digests = {}
+    results = []
+    for signature in signatures:
+        reference = (signature.document_type, signature.document_id)
+        document = documents.get(reference)
+        if signature.document_type not in DOCUMENT_TYPES:
+            results.append(VerificationResult(
+                signature, None, False, f'Неизвестный тип документа: {signature.document_type}',
+            ))
+            continue
+        if document is None:
+            results.append(VerificationResult(signature, None, False, 'Документ не найден'))
+            continue
+        if reference not in digests:
+            digests[reference] = document_digest(signature.document_type, document)
+        if signature_matches(*reference, signature.signer_id, digests[reference], signature.signature_hash):
+            results.append(VerificationResult(signature, document, True))
+        else:
+            results.append(VerificationResult(signature, document, False, 'Подпись не соответствует документу'))
+    return results
+
+
+def verify_document(document_type, document_id):
+    """Проверяет все подписи документа"""
+    get_document_model(document_type)
+    signatures = (
+        DocumentSignature.objects.filter(document_type=document_type, document_id=document_id)
+        .select_related('signer')
+        .order_by('timestamp')
+    )
+    return verify_signatures(signatures)
+
+
+def signed_documents(signer, limit=None):
+    """Подписи сотрудника (новые первыми) с разрешенными документами: [(подпись, документ)]"""
+    signatures = DocumentSignature.objects.filter(signer=signer).order_by('-timestamp')
+    if limit:
+        signatures = signatures[:limit]
+    signatures = list(signatures)
+    documents = resolve_documents((signature.document_type, signature.document_id) for signature in signatures)
+    return [(signature, documents.get((signature.document_type, signature.document_id))) for signature in signatures]
@@ -9,6 +9,8 @@ urlpatterns = [
     path('meetings/create/', views.create_meeting_view, name='create_meeting'),
     path('meetings/<uuid:meeting_id>/', views.meeting_detail_view, name='meeting_detail'),
     path('meetings/<uuid:meeting_id>/edit/', views.edit_meeting_view, name='edit_meeting'),
+    path('meetings/<uuid:meeting_id>/protocol.docx', views.meeting_protocol_docx_view, name='meeting_protocol_docx'),
+    path('meetings/protocols.zip', views.meeting_protocols_archive_view, name='meeting_protocols_archive'),
     # Мотивированные мнения
     path('motivated-opinions/', views.motivated_opinion_list_view, name='motivated_opinion_list'),
     path('motivated-opinions/create/', views.create_motivated_opinion_view, name='create_motivated_opinion'),
@@ -17,4 +19,5 @@ urlpatterns = [
     # Подписи документов
     path('sign-document/', views.sign_document_view, name='sign_document'),
     path('my-signed-documents/', views.my_signed_documents_view, name='my_signed_documents'),
+    path('signatures/<str:document_type>/<uuid:document_id>/', views.document_signatures_view, name='document_signatures'),
 ]
\ No newline at end of file
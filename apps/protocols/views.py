@@ -0,0 +1,71 @@
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import content_disposition_header
+
+from apps.protocols.documents import iter_protocols_zip, protocol_filename, render_protocol
+from apps.protocols.models import Meeting
+from apps.protocols.signatures import UnknownDocumentType, verify_document
+
+
+DRAFT_PROTOCOL_ROLES = ('admin', 'chairman')
+
+
+def visible_meetings(user):
+    """Неопубликованные протоколы доступны организатору и руководству"""
+    meetings = Meeting.objects.all()
+    if user.role not in DRAFT_PROTOCOL_ROLES:
+        meetings = meetings.filter(Q(is_published=True) | Q(organizer=user))
+    return meetings
+
+
+@login_required
+def meeting_protocol_docx_view(request, meeting_id):
+    """Протокол собрания в DOCX"""
+    meeting = get_object_or_404(visible_meetings(request.user), pk=meeting_id)
+    response = HttpResponse(
+        render_protocol(meeting),
+        content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    )
+    # Кириллица в имени файла передается параметром filename* (RFC 6266)
+    response['Content-Disposition'] = content_disposition_header(True, protocol_filename(meeting))
+    return response
+
+
+@login_required
+def meeting_protocols_archive_view(request):
+    """ZIP-архив протоколов собраний за год (параметр year)"""
+    if request.user.role not in DRAFT_PROTOCOL_ROLES:
+        raise PermissionDenied
+    try:
+        year = int(request.GET.get('year', ''))
+    except ValueError:
+        return HttpResponseBadRequest('Укажите год')
+    meetings = visible_meetings(request.user).filter(meeting_date__year=year)
+    response = StreamingHttpResponse(iter_protocols_zip(meetings), content_type='application/zip')
+    response['Content-Disposition'] = content_disposition_header(True, f'protocols_{year}.zip')
+    return response
+
+
+@login_required
+def document_signatures_view(request, document_type, document_id):
+    """Подписи документа с результатом проверки каждой"""
+    if request.user.role not in DRAFT_PROTOCOL_ROLES:
+        raise PermissionDenied
+    try:
+        results = verify_document(document_type, document_id)
+    except UnknownDocumentType as exc:
+        return HttpResponseBadRequest(str(exc))
+    return JsonResponse({'results': [
+        {
+            'id': str(result.signature.pk),
+            'signer': result.signature.signer.full_name,
+            'employee_number': result.signature.signer.employee_number,
+            'timestamp': result.signature.timestamp.isoformat(),
+            'valid': result.valid,
+            'reason': result.reason,
+        }
+        for result in results
+    ]})
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reports'
-    verbose_name = 'Отчеты'
\ No newline at end of file
+    verbose_name = 'Отчеты'
+
+    def ready(self):
+        from apps.reports import signals  # noqa: F401
@@ -0,0 +1,144 @@
+"""
+Очередь формирования отчетов.
+
+Отчеты формируются воркерами Celery, а не в запросе gunicorn. Одинаковые
+запросы (тип отчета, организация, подразделение, период, формат), пока
+предыдущий еще в очереди или формируется, возвращают уже существующее
+задание; запросивший пользователь добавляется к его подписчикам и может
+опрашивать состояние.
+
+Задание в статусе «Формируется» дольше JOB_LEASE считается брошенным
+(воркер упал): повторно доставленная задача забирает его снова, а
+requeue_stale_jobs() по расписанию возвращает такие задания в очередь.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.reports.models import ReportJob
+
+
+JOB_LEASE = timedelta(minutes=30)
+
+DEFAULT_FORMATS = {
+    'membership': 'docx',
+    'demographic': 'docx',
+    'movement': 'xlsx',
+    'financial': 'pdf',
+}
+
+
+def make_dedup_key(report_type, organization_id, department_id, period_start, period_end, output_format):
+    """Возвращает ключ дедупликации задания"""
+    raw = f'{report_type}:{organization_id}:{department_id}:{period_start}:{period_end}:{output_format}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def claimable_jobs(now=None):
+    """Задания, которые может забрать воркер: в очереди или брошенные при формировании"""
+    cutoff = (now or timezone.now()) - JOB_LEASE
+    return ReportJob.objects.filter(Q(status='queued') | Q(status='running', started_at__lt=cutoff))
+
+
+def dispatch_job(job_id):
+    from apps.reports.tasks import render_report_job
+
+    transaction.on_commit(lambda: render_report_job.delay(str(job_id)))
+
+
+def requeue_stale_jobs():
+    """Возвращает в очередь задания, зависшие в статусе «Формируется»; возвращает их число"""
+    cutoff = timezone.now() - JOB_LEASE
+    with transaction.atomic():
+        ids = list(
+            ReportJob.objects.select_for_update(skip_locked=True)
+            .filter(status='running', started_at__lt=cutoff)
+            .values_list('id', flat=True)
+        )
+        ReportJob.objects.filter(pk__in=ids).update(status='queued', started_at=None)
+        for job_id in ids:
+            dispatch_job(job_id)
+    return len(ids)
+
+
+def enqueue_report_job(report_type, period_start, period_end, requested_by, organization=None, department=None, output_format=None):
+    """
+    Ставит формирование отчета в очередь.
+
+    Возвращает пару (задание, создано ли новое задание).
+    """
+    output_format = output_format or DEFAULT_FORMATS[report_type]
+    dedup_key = make_dedup_key(
+        report_type, getattr(organization, 'pk', None), getattr(department, 'pk', None),
+        period_start, period_end, output_format,
+    )
+    existing = ReportJob.objects.filter(dedup_key=dedup_key, status__in=ReportJob.ACTIVE_STATUSES).first()
+    if existing is not None:
+        return attach_requester(existing, requested_by), False
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                report_type=report_type, output_format=output_format, organization=organization,
+                department=department, period_start=period_start, period_end=period_end,
+                dedup_key=dedup_key, requested_by=requested_by,
+            )
+    except IntegrityError:
+        # Такое же задание успели создать параллельно
+        existing = ReportJob.objects.get(dedup_key=dedup_key, status__in=ReportJob.ACTIVE_STATUSES)
+        return attach_requester(existing, requested_by), False
+
+    dispatch_job(job.pk)
+    return job, True
+
+
+def attach_requester(job, user):
+    """Подписывает пользователя на существующее задание; брошенное задание перезапускается"""
+    if user.pk != job.requested_by_id:
+        job.subscribers.add(user)
+    if job.status == 'running' and job.started_at and job.started_at < timezone.now() - JOB_LEASE:
+        dispatch_job(job.pk)
+    return job
+
+
+def jobs_visible_to(user):
+    """Задания, состояние которых может опрашивать пользователь"""
+    return ReportJob.objects.filter(Q(requested_by=user) | Q(subscribers=user)).distinct()
+
+
+def get_report_model(job):
+    from apps.finance.models import FinancialReport
+    from apps.reports.models import MembershipReport, DemographicReport, MovementReport
+
+    return {
+        'membership': MembershipReport,
+        'demographic': DemographicReport,
+        'movement': MovementReport,
+        'financial': FinancialReport,
+    }[job.report_type]
+
+
+def get_job_status(job):
+    """Возвращает состояние задания для опроса клиентом"""
+    status = {
+        'id': str(job.pk),
+        'report_type': job.report_type,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': None,
+        'error': job.error or None,
+    }
+    if job.status == 'done' and job.report_id:
+        url_names = {
+            'membership': 'reports:download_membership_report',
+            'demographic': 'reports:download_demographic_report',
+            'movement': 'reports:download_movement_report',
+            'financial': 'finance:download_financial_report',
+        }
+        status['download_url'] = reverse(url_names[job.report_type], kwargs={'report_id': job.report_id})
+    return status
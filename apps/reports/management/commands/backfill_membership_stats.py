@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from apps.members.models import Department
+from apps.reports.statistics import rebuild_department_stats
+
+
+class Command(BaseCommand):
+    help = 'Заполняет суточную статистику членства по данным сотрудников'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', help='ID организации (по умолчанию - все)')
+        parser.add_argument('--after', help='Продолжить с подразделения, следующего за указанным ID')
+
+    def handle(self, *args, **options):
+        departments = Department.objects.order_by('id')
+        if options['organization']:
+            departments = departments.filter(organization_id=options['organization'])
+        if options['after']:
+            departments = departments.filter(id__gt=options['after'])
+
+        total = departments.count()
+        last_done = None
+        try:
+            # Каждое подразделение пересчитывается в своей транзакции,
+            # поэтому прерванное заполнение можно продолжить с --after
+            for number, department in enumerate(departments.iterator(), start=1):
+                rows = rebuild_department_stats(department)
+                last_done = department.pk
+                self.stdout.write(f'[{number}/{total}] {department.name}: строк {rows}')
+        except KeyboardInterrupt:
+            if last_done is not None:
+                self.stdout.write(self.style.WARNING(f'Прервано. Для продолжения: --after {last_done}'))
+            raise
+        self.stdout.write(self.style.SUCCESS(f'Готово, подразделений: {total}'))
@@ -97,4 +97,89 @@ class MovementReport(models.Model):
         ordering = ['-generated_at']
 
     def __str__(self):
-        return f"{self.title} ({self.department.name})"
\ No newline at end of file
+        return f"{self.title} ({self.department.name})"
+
+
+class MembershipDailyStat(models.Model):
+    """
+    Модель суточной статистики членства по подразделению
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='membership_stats', verbose_name='Организация')
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='membership_stats', verbose_name='Подразделение')
+    date = models.DateField(verbose_name='Дата')
+    joined_count = models.PositiveIntegerField(default=0, verbose_name='Вступило за день')
+    left_count = models.PositiveIntegerField(default=0, verbose_name='Выбыло за день')
+    active_count = models.IntegerField(default=0, verbose_name='Членов на конец дня')
+
+    class Meta:
+        verbose_name = 'Суточная статистика членства'
+        verbose_name_plural = 'Суточная статистика членства'
+        ordering = ['-date']
+        unique_together = ['organization', 'department', 'date']
+        indexes = [
+            models.Index(fields=['department', 'date'], name='reports_mstat_dept_date_idx'),
+            models.Index(fields=['organization', 'date'], name='reports_mstat_org_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.department.name} - {self.date.strftime('%d.%m.%Y')}"
+
+
+class ReportJob(models.Model):
+    """
+    Модель задания на формирование отчета в фоне
+    """
+    REPORT_TYPE_CHOICES = [
+        ('membership', 'Отчет по членству'),
+        ('demographic', 'Демографический отчет'),
+        ('movement', 'Отчет по движению сотрудников'),
+        ('financial', 'Финансовый отчет'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('docx', 'Word (DOCX)'),
+        ('xlsx', 'Excel (XLSX)'),
+        ('pdf', 'PDF'),
+    ]
+
+    STATUS_CHOICES = [
+        ('queued', 'В очереди'),
+        ('running', 'Формируется'),
+        ('done', 'Готов'),
+        ('failed', 'Ошибка'),
+    ]
+
+    ACTIVE_STATUSES = ['queued', 'running']
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report_type = models.CharField(max_length=20, choices=REPORT_TYPE_CHOICES, verbose_name='Тип отчета')
+    output_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='docx', verbose_name='Формат файла')
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Организация')
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True, verbose_name='Подразделение')
+    period_start = models.DateField(verbose_name='Начало периода')
+    period_end = models.DateField(verbose_name='Конец периода')
+    dedup_key = models.CharField(max_length=64, editable=False, verbose_name='Ключ дедупликации')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', verbose_name='Статус')
+    report_id = models.UUIDField(null=True, blank=True, verbose_name='ID сформированного отчета')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Запрошено кем')
+    subscribers = models.ManyToManyField(User, blank=True, related_name='+', verbose_name='Ожидающие отчет пользователи')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начало формирования')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание формирования')
+
+    class Meta:
+        verbose_name = 'Задание на формирование отчета'
+        verbose_name_plural = 'Задания на формирование отчетов'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='reports_job_active_dedup',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} ({self.get_status_display()})"
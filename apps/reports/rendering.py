@@ -0,0 +1,204 @@
+"""
+Формирование файлов отчетов.
+
+Построитель отчета создает запись отчета и описание документа (заголовок,
+абзацы, таблицы), а писатель переводит описание в DOCX (python-docx),
+XLSX (openpyxl) или PDF (weasyprint).
+"""
+import io
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+
+from django.core.files.base import ContentFile
+from django.db.models import Q, Sum
+from django.utils.html import escape
+
+from apps.members.models import Employee, EmploymentHistory
+from apps.reports.models import DemographicReport, MovementReport
+from apps.reports.statistics import create_membership_report
+
+
+@dataclass
+class ReportDocument:
+    title: str
+    paragraphs: list = field(default_factory=list)
+    tables: list = field(default_factory=list)
+
+    def add_table(self, heading, header, rows):
+        self.tables.append((heading, header, rows))
+
+
+def write_docx(document):
+    """Возвращает содержимое DOCX-файла"""
+    from docx import Document
+
+    docx = Document()
+    docx.add_heading(document.title, level=1)
+    for paragraph in document.paragraphs:
+        docx.add_paragraph(paragraph)
+    for heading, header, rows in document.tables:
+        docx.add_heading(heading, level=2)
+        table = docx.add_table(rows=1, cols=len(header))
+        table.style = 'Table Grid'
+        for cell, value in zip(table.rows[0].cells, header):
+            cell.text = str(value)
+        for row in rows:
+            cells = table.add_row().cells
+            for cell, value in zip(cells, row):
+                cell.text = str(value)
+    buffer = io.BytesIO()
+    docx.save(buffer)
+    return buffer.getvalue()
+
+
+def write_xlsx(document):
+    """Возвращает содержимое XLSX-файла"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    summary = workbook.create_sheet('Сводка')
+    summary.append([document.title])
+    for paragraph in document.paragraphs:
+        summary.append([paragraph])
+    for number, (heading, header, rows) in enumerate(document.tables, start=1):
+        sheet = workbook.create_sheet(heading[:31] or f'Таблица {number}')
+        sheet.append(list(header))
+        for row in rows:
+            sheet.append(list(row))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def write_pdf(document):
+    """Возвращает содержимое PDF-файла"""
+    from weasyprint import HTML
+
+    parts = [f'<h1>{escape(document.title)}</h1>']
+    parts.extend(f'<p>{escape(paragraph)}</p>' for paragraph in document.paragraphs)
+    for heading, header, rows in document.tables:
+        parts.append(f'<h2>{escape(heading)}</h2><table border="1" cellspacing="0" cellpadding="4">')
+        parts.append('<tr>' + ''.join(f'<th>{escape(value)}</th>' for value in header) + '</tr>')
+        for row in rows:
+            parts.append('<tr>' + ''.join(f'<td>{escape(value)}</td>' for value in row) + '</tr>')
+        parts.append('</table>')
+    html = '<html><head><meta charset="utf-8"></head><body>' + ''.join(parts) + '</body></html>'
+    return HTML(string=html).write_pdf()
+
+
+WRITERS = {
+    'docx': write_docx,
+    'xlsx': write_xlsx,
+    'pdf': write_pdf,
+}
+
+
+def period_label(job):
+    return f"{job.period_start.strftime('%d.%m.%Y')} - {job.period_end.strftime('%d.%m.%Y')}"
+
+
+def build_membership(job):
+    report = create_membership_report(job.organization, job.period_start, job.period_end, job.requested_by)
+    document = ReportDocument(report.title, report.content.splitlines())
+    return report, document
+
+
+def build_demographic(job):
+    title = f'Демографический отчет за {period_label(job)}'
+    today = date.today()
+    age_groups = Counter()
+    marital = Counter()
+    employees = (
+        Employee.objects.filter(department__organization=job.organization, status='active')
+        .values_list('date_of_birth', 'marital_status')
+        .order_by()
+    )
+    for date_of_birth, marital_status in employees.iterator():
+        age = today.year - date_of_birth.year - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+        age_groups['до 30' if age < 30 else '30-39' if age < 40 else '40-49' if age < 50 else '50 и старше'] += 1
+        marital[dict(Employee.MARITAL_STATUS_CHOICES).get(marital_status, marital_status)] += 1
+
+    document = ReportDocument(title, [f'Действующих членов профсоюза: {sum(age_groups.values())}'])
+    document.add_table('Возраст', ['Группа', 'Количество'], sorted(age_groups.items()))
+    document.add_table('Семейное положение', ['Статус', 'Количество'], sorted(marital.items()))
+    report = DemographicReport.objects.create(
+        title=title, organization=job.organization, period_start=job.period_start, period_end=job.period_end,
+        content='\n'.join(document.paragraphs), generated_by=job.requested_by,
+    )
+    return report, document
+
+
+def build_movement(job):
+    title = f'Отчет по движению сотрудников за {period_label(job)}'
+    history = EmploymentHistory.objects.filter(employee__department=job.department)
+    arrived_ids = set(history.filter(
+        employment_start_date__gte=job.period_start, employment_start_date__lte=job.period_end,
+    ).values_list('employee_id', flat=True))
+    left_ids = set(history.filter(
+        employment_end_date__gte=job.period_start, employment_end_date__lte=job.period_end,
+    ).values_list('employee_id', flat=True))
+    employees = {
+        employee.pk: employee
+        for employee in Employee.objects.filter(pk__in=arrived_ids | left_ids).only('full_name', 'employee_number')
+    }
+
+    document = ReportDocument(title, [f'Прибыло: {len(arrived_ids)}', f'Уволено: {len(left_ids)}'])
+    for heading, ids in (('Прибывшие', arrived_ids), ('Уволенные', left_ids)):
+        rows = sorted((employees[pk].employee_number, employees[pk].full_name) for pk in ids if pk in employees)
+        document.add_table(heading, ['Табельный номер', 'ФИО'], rows)
+
+    report = MovementReport.objects.create(
+        title=title, organization=job.organization or job.department.organization, department=job.department,
+        period_start=job.period_start, period_end=job.period_end,
+        content='\n'.join(document.paragraphs), generated_by=job.requested_by,
+    )
+    report.arrived_employees.set(arrived_ids)
+    report.left_employees.set(left_ids)
+    return report, document
+
+
+def build_financial(job):
+    from apps.finance.models import FinancialRecord, FinancialReport
+
+    title = f'Финансовый отчет за {period_label(job)}'
+    records = FinancialRecord.objects.filter(
+        created_at__date__gte=job.period_start, created_at__date__lte=job.period_end,
+    )
+    totals = records.aggregate(
+        income=Sum('amount', filter=Q(record_type='income')),
+        expense=Sum('amount', filter=Q(record_type='expense')),
+    )
+    income, expense = totals['income'] or 0, totals['expense'] or 0
+    document = ReportDocument(title, [f'Доходы: {income}', f'Расходы: {expense}', f'Сальдо: {income - expense}'])
+    document.add_table(
+        'Операции',
+        ['Дата', 'Тип', 'Сумма', 'Описание'],
+        [
+            (created_at.strftime('%d.%m.%Y'), dict(FinancialRecord.RECORD_TYPE_CHOICES)[record_type], amount, description)
+            for created_at, record_type, amount, description in records.order_by('created_at').values_list(
+                'created_at', 'record_type', 'amount', 'description',
+            ).iterator()
+        ],
+    )
+    report = FinancialReport.objects.create(
+        title=title, period_start=job.period_start, period_end=job.period_end,
+        content='\n'.join(document.paragraphs), generated_by=job.requested_by,
+    )
+    return report, document
+
+
+BUILDERS = {
+    'membership': build_membership,
+    'demographic': build_demographic,
+    'movement': build_movement,
+    'financial': build_financial,
+}
+
+
+def render_report(job):
+    """Формирует отчет по заданию и сохраняет файл в поле file; возвращает отчет"""
+    report, document = BUILDERS[job.report_type](job)
+    content = WRITERS[job.output_format](document)
+    report.file.save(f'{job.report_type}_{job.pk}.{job.output_format}', ContentFile(content), save=True)
+    return report
@@ -0,0 +1,76 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from apps.members.models import Department, Employee, EmploymentHistory, Organization
+from apps.members.signals import employees_bulk_changed
+from apps.reports.statistics import get_membership_contribution, rebuild_department_stats, update_membership_contribution
+
+
+def origin_model(origin):
+    """Модель объекта или queryset, удаление которого вызвало каскад"""
+    return getattr(origin, 'model', type(origin))
+
+
+def deleted_with_department(origin):
+    """Удаление каскадом от подразделения или организации: их статистика удаляется вместе с ними"""
+    return origin_model(origin) in (Department, Organization)
+
+
+def deleted_with_employee(origin):
+    """Вклад удаляемого сотрудника снимается целиком сигналом удаления сотрудника"""
+    return origin_model(origin) in (Employee, Department, Organization)
+
+
+@receiver(pre_save, sender=Employee)
+@receiver(pre_delete, sender=Employee)
+def remember_membership_state(sender, instance, raw=False, **kwargs):
+    """Запоминает вклад сотрудника в статистику до изменения"""
+    instance._previous_membership = None
+    if not raw and not instance._state.adding:
+        instance._previous_membership = get_membership_contribution(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+def update_membership_stats(sender, instance, raw=False, **kwargs):
+    """Обновляет суточную статистику членства при изменении сотрудника"""
+    if not raw:
+        update_membership_contribution(
+            getattr(instance, '_previous_membership', None), get_membership_contribution(instance.pk),
+        )
+
+
+@receiver(post_delete, sender=Employee)
+def discount_deleted_member(sender, instance, origin=None, **kwargs):
+    """Снимает вклад удаленного сотрудника, как если бы статистику пересчитали"""
+    if not deleted_with_department(origin):
+        update_membership_contribution(getattr(instance, '_previous_membership', None), None)
+
+
+@receiver(pre_save, sender=EmploymentHistory)
+@receiver(pre_delete, sender=EmploymentHistory)
+def remember_history_membership_state(sender, instance, raw=False, origin=None, **kwargs):
+    """Дата увольнения в трудовой истории определяет дату выбытия: запоминает прежний вклад"""
+    instance._previous_membership = None
+    if not raw and not deleted_with_employee(origin):
+        instance._previous_membership = get_membership_contribution(instance.employee_id)
+
+
+@receiver(post_save, sender=EmploymentHistory)
+@receiver(post_delete, sender=EmploymentHistory)
+def update_history_membership_stats(sender, instance, raw=False, origin=None, **kwargs):
+    """Переносит дату выбытия сотрудника при изменении трудовой истории"""
+    if raw or deleted_with_employee(origin):
+        return
+    update_membership_contribution(
+        getattr(instance, '_previous_membership', None), get_membership_contribution(instance.employee_id),
+    )
+
+
+@receiver(employees_bulk_changed)
+def rebuild_stats_after_bulk_change(sender, employee_ids=(), department_ids=(), **kwargs):
+    """Пересчитывает статистику подразделений после массового изменения сотрудников"""
+    departments = Department.objects.filter(pk__in=set(department_ids)) | Department.objects.filter(
+        employees__pk__in=list(employee_ids),
+    )
+    for department in departments.distinct():
+        rebuild_department_stats(department)
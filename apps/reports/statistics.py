@@ -0,0 +1,191 @@
+"""
+Суточная статистика членства.
+
+MembershipDailyStat хранит по одной строке на подразделение и день, в который
+что-то произошло: сколько членов вступило, сколько выбыло и сколько состоит
+на конец дня. Численность на любую дату - active_count последней строки не
+позже этой даты, поэтому отчет за период читает не больше одной строки на
+подразделение и день.
+
+Сотрудник учитывается как вступивший в дату вступления в профсоюз и, если
+он не действующий член, как выбывший в дату выбытия (membership_span).
+Пересчет подразделения и сигналы изменения сотрудника используют одно и
+то же правило: сигнал снимает прежний вклад сотрудника и добавляет новый.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from apps.members.models import Department, Employee
+from apps.reports.models import MembershipDailyStat, MembershipReport
+
+
+def apply_membership_delta(department_id, organization_id, day, joined=0, left=0, active=0):
+    """Учитывает изменение численности подразделения начиная с даты day"""
+    with transaction.atomic():
+        if not MembershipDailyStat.objects.filter(department_id=department_id, date=day).exists():
+            previous = (
+                MembershipDailyStat.objects.filter(department_id=department_id, date__lt=day)
+                .order_by('-date')
+                .values_list('active_count', flat=True)
+                .first()
+            )
+            MembershipDailyStat.objects.bulk_create(
+                [MembershipDailyStat(
+                    organization_id=organization_id, department_id=department_id, date=day,
+                    active_count=previous or 0,
+                )],
+                ignore_conflicts=True,
+            )
+        if joined or left:
+            MembershipDailyStat.objects.filter(department_id=department_id, date=day).update(
+                joined_count=F('joined_count') + joined,
+                left_count=F('left_count') + left,
+            )
+        if active:
+            MembershipDailyStat.objects.filter(department_id=department_id, date__gte=day).update(
+                active_count=F('active_count') + active,
+            )
+        # День без событий повторяет численность предыдущего и при пересчете не создается
+        MembershipDailyStat.objects.filter(
+            department_id=department_id, date=day, joined_count=0, left_count=0,
+        ).delete()
+
+
+def membership_span(union_join_date, status, left_on, updated_at):
+    """
+    Возвращает пару (дата вступления, дата выбытия или None) сотрудника.
+
+    Датой выбытия считается последняя дата увольнения в трудовой истории,
+    а при ее отсутствии - дата последнего изменения карточки сотрудника.
+    """
+    if status == 'active':
+        return union_join_date, None
+    return union_join_date, left_on or timezone.localdate(updated_at)
+
+
+def membership_rows(employees):
+    """Значения сотрудников, необходимые для membership_span"""
+    return (
+        employees.order_by()
+        .annotate(left_on=Max('employment_history__employment_end_date'))
+        .values_list('department_id', 'department__organization_id', 'union_join_date', 'status', 'left_on', 'updated_at')
+    )
+
+
+def get_membership_contribution(employee_id):
+    """
+    Вклад сотрудника в статистику: (подразделение, организация, дата вступления,
+    дата выбытия) или None, если сотрудника нет
+    """
+    row = membership_rows(Employee.objects.filter(pk=employee_id)).first()
+    if row is None:
+        return None
+    department_id, organization_id, *values = row
+    return (department_id, organization_id, *membership_span(*values))
+
+
+def apply_membership_contribution(contribution, sign=1):
+    """Добавляет (sign=1) или снимает (sign=-1) вклад сотрудника"""
+    department_id, organization_id, joined_on, left_on = contribution
+    apply_membership_delta(department_id, organization_id, joined_on, joined=sign, active=sign)
+    if left_on is not None:
+        apply_membership_delta(department_id, organization_id, left_on, left=sign, active=-sign)
+
+
+def update_membership_contribution(previous, current):
+    """Заменяет прежний вклад сотрудника новым"""
+    if previous == current:
+        return
+    if previous is not None:
+        apply_membership_contribution(previous, -1)
+    if current is not None:
+        apply_membership_contribution(current)
+
+
+def rebuild_department_stats(department):
+    """Пересчитывает статистику подразделения по данным сотрудников"""
+    joined = defaultdict(int)
+    left = defaultdict(int)
+    for _, _, *values in membership_rows(Employee.objects.filter(department=department)).iterator():
+        joined_on, left_on = membership_span(*values)
+        joined[joined_on] += 1
+        if left_on is not None:
+            left[left_on] += 1
+
+    rows = []
+    active = 0
+    for day in sorted(set(joined) | set(left)):
+        active += joined[day] - left[day]
+        rows.append(MembershipDailyStat(
+            organization_id=department.organization_id, department=department, date=day,
+            joined_count=joined[day], left_count=left[day], active_count=active,
+        ))
+    with transaction.atomic():
+        MembershipDailyStat.objects.filter(department=department).delete()
+        MembershipDailyStat.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def get_membership_figures(organization, period_start, period_end):
+    """
+    Возвращает показатели членства организации за период.
+
+    Результат - словарь с ключами total_members (на конец периода),
+    new_members, left_members и membership_rate (доля действующих членов
+    среди всех сотрудников, учтенных на конец периода, %).
+    """
+    in_period = Q(date__gte=period_start)
+    movement = MembershipDailyStat.objects.filter(organization=organization, date__lte=period_end).aggregate(
+        new_members=Sum('joined_count', filter=in_period),
+        left_members=Sum('left_count', filter=in_period),
+        headcount=Sum('joined_count'),
+    )
+
+    last_active = Subquery(
+        MembershipDailyStat.objects.filter(department=OuterRef('pk'), date__lte=period_end)
+        .order_by('-date')
+        .values('active_count')[:1]
+    )
+    total_members = (
+        Department.objects.filter(organization=organization)
+        .annotate(active=last_active)
+        .aggregate(total=Sum('active'))['total']
+    ) or 0
+
+    headcount = movement['headcount'] or 0
+    membership_rate = Decimal('0.00')
+    if headcount:
+        membership_rate = (Decimal(total_members) * 100 / headcount).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+    return {
+        'total_members': total_members,
+        'new_members': movement['new_members'] or 0,
+        'left_members': movement['left_members'] or 0,
+        'membership_rate': membership_rate,
+    }
+
+
+def create_membership_report(organization, period_start, period_end, generated_by, title=None):
+    """Формирует отчет по членству по суточной статистике"""
+    figures = get_membership_figures(organization, period_start, period_end)
+    period = f"{period_start.strftime('%d.%m.%Y')} - {period_end.strftime('%d.%m.%Y')}"
+    content = (
+        f"Отчет по членству за период {period}\n"
+        f"Всего членов на конец периода: {figures['total_members']}\n"
+        f"Вступило: {figures['new_members']}\n"
+        f"Выбыло: {figures['left_members']}\n"
+        f"Процент охвата: {figures['membership_rate']}%"
+    )
+    return MembershipReport.objects.create(
+        title=title or f'Отчет по членству за {period}',
+        organization=organization,
+        period_start=period_start,
+        period_end=period_end,
+        content=content,
+        generated_by=generated_by,
+        **figures,
+    )
@@ -0,0 +1,35 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from apps.reports.jobs import claimable_jobs, requeue_stale_jobs
+from apps.reports.models import ReportJob
+from apps.reports.rendering import render_report
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def render_report_job(job_id):
+    """Формирует отчет по заданию из очереди"""
+    # Забираем задание атомарно: повторная доставка сообщения не запустит его,
+    # пока формирование идет, но заберет брошенное упавшим воркером
+    claimed = claimable_jobs().filter(pk=job_id).update(status='running', started_at=timezone.now())
+    if not claimed:
+        return
+    job = ReportJob.objects.select_related('organization', 'department__organization', 'requested_by').get(pk=job_id)
+    try:
+        report = render_report(job)
+    except Exception as exc:
+        logger.exception('Не удалось сформировать отчет по заданию %s', job_id)
+        ReportJob.objects.filter(pk=job_id).update(status='failed', error=str(exc), finished_at=timezone.now())
+        return
+    ReportJob.objects.filter(pk=job_id).update(status='done', report_id=report.pk, finished_at=timezone.now())
+
+
+@shared_task(ignore_result=True)
+def requeue_stale_report_jobs():
+    """Возвращает в очередь задания, брошенные упавшими воркерами"""
+    requeue_stale_jobs()
@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.members.models import EmploymentHistory, Position
+from apps.members.synthetic import build_employee, create_organization
+from apps.reports.models import MembershipDailyStat
+from apps.reports.statistics import get_membership_figures, rebuild_department_stats
+
+
+class MembershipStatsConsistencyTests(TestCase):
+    """
+    Статистика, накопленная сигналами, совпадает с пересчетом подразделения
+    """
+
+    def setUp(self):
+        self.organization = create_organization('stat', departments=2)
+        self.department, self.other_department = self.organization.departments.order_by('name')
+
+    def stats(self):
+        return list(
+            MembershipDailyStat.objects.order_by('department_id', 'date')
+            .values_list('department_id', 'date', 'joined_count', 'left_count', 'active_count')
+        )
+
+    def assert_matches_rebuild(self):
+        incremental = self.stats()
+        for department in (self.department, self.other_department):
+            rebuild_department_stats(department)
+        self.assertEqual(incremental, self.stats())
+
+    def create_employee(self, number):
+        employee = build_employee(self.department, number, 'stat')
+        employee.save()
+        return employee
+
+    def test_leave_and_rejoin(self):
+        employee = self.create_employee(1)
+        self.create_employee(2)
+        employee.status = 'inactive'
+        employee.save()
+        employee.status = 'active'
+        employee.save()
+        self.assert_matches_rebuild()
+
+    def test_leave_dated_by_employment_history(self):
+        employee = self.create_employee(1)
+        employee.status = 'inactive'
+        employee.save()
+        EmploymentHistory.objects.create(
+            employee=employee, position=Position.objects.create(name='Слесарь'), appointment_date=date(2015, 1, 1),
+            rate=100, employment_start_date=date(2015, 1, 1), employment_end_date=date(2020, 6, 30),
+        )
+        self.assert_matches_rebuild()
+
+    def test_transfer_and_delete(self):
+        employee = self.create_employee(1)
+        removed = self.create_employee(2)
+        employee.department = self.other_department
+        employee.save()
+        removed.delete()
+        self.assert_matches_rebuild()
+
+    def test_membership_rate_at_period_end(self):
+        for number, joined_on in enumerate([date(2001, 1, 1), date(2010, 1, 1)]):
+            employee = build_employee(self.department, number, 'stat')
+            employee.union_join_date = joined_on
+            employee.save()
+        figures = get_membership_figures(self.organization, date(2000, 1, 1), date(2005, 12, 31))
+        self.assertEqual(figures['total_members'], 1)
+        self.assertEqual(figures['membership_rate'], 100)
@@ -16,4 +16,6 @@ urlpatterns = [
     path('movement/', views.movement_reports_list_view, name='movement_reports_list'),
     path('movement/create/', views.create_movement_report_view, name='create_movement_report'),
     path('movement/<uuid:report_id>/download/', views.download_movement_report_view, name='download_movement_report'),
+    # Задания на формирование отчетов
+    path('jobs/<uuid:job_id>/', views.report_job_status_view, name='report_job_status'),
 ]
\ No newline at end of file
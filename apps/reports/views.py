@@ -0,0 +1,84 @@
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from apps.authentication.scope import get_user_scope
+from apps.members.models import Department, Organization
+from apps.reports.jobs import enqueue_report_job, get_job_status, jobs_visible_to
+from apps.reports.models import ReportJob
+
+
+REPORT_ROLES = ('admin', 'chairman', 'accountant')
+
+
+def create_report_job_response(request, report_type):
+    """
+    Ставит отчет в очередь по параметрам POST (organization, department,
+    period_start, period_end, format) и возвращает состояние задания
+    """
+    if request.user.role not in REPORT_ROLES:
+        raise PermissionDenied
+    try:
+        period_start = date.fromisoformat(request.POST.get('period_start', ''))
+        period_end = date.fromisoformat(request.POST.get('period_end', ''))
+    except ValueError:
+        return HttpResponseBadRequest('Укажите период в формате ГГГГ-ММ-ДД')
+    if period_start > period_end:
+        return HttpResponseBadRequest('Начало периода позже его конца')
+    output_format = request.POST.get('format') or None
+    if output_format and output_format not in dict(ReportJob.FORMAT_CHOICES):
+        return HttpResponseBadRequest('Неизвестный формат файла')
+
+    scope = get_user_scope(request.user)
+    organization = department = None
+    if request.POST.get('department'):
+        department = get_object_or_404(Department.objects.select_related('organization'), pk=request.POST['department'])
+        if not scope.can_see_department(department.pk):
+            raise PermissionDenied
+        organization = department.organization
+    elif request.POST.get('organization'):
+        organization = get_object_or_404(Organization, pk=request.POST['organization'])
+        if not scope.can_see_organization(organization.pk):
+            raise PermissionDenied
+    if report_type == 'movement' and department is None:
+        return HttpResponseBadRequest('Укажите подразделение')
+    if report_type in ('membership', 'demographic') and organization is None:
+        return HttpResponseBadRequest('Укажите организацию')
+
+    job, _ = enqueue_report_job(
+        report_type, period_start, period_end, request.user,
+        organization=organization, department=department, output_format=output_format,
+    )
+    return JsonResponse(get_job_status(job), status=202)
+
+
+@login_required
+@require_POST
+def create_membership_report_view(request):
+    """Поставить отчет по членству в очередь"""
+    return create_report_job_response(request, 'membership')
+
+
+@login_required
+@require_POST
+def create_demographic_report_view(request):
+    """Поставить демографический отчет в очередь"""
+    return create_report_job_response(request, 'demographic')
+
+
+@login_required
+@require_POST
+def create_movement_report_view(request):
+    """Поставить отчет по движению сотрудников в очередь"""
+    return create_report_job_response(request, 'movement')
+
+
+@login_required
+def report_job_status_view(request, job_id):
+    """Состояние задания на формирование отчета (для опроса со страницы)"""
+    job = get_object_or_404(jobs_visible_to(request.user), pk=job_id)
+    return JsonResponse(get_job_status(job))
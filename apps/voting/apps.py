@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class VotingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.voting'
-    verbose_name = 'Голосования'
\ No newline at end of file
+    verbose_name = 'Голосования'
+
+    def ready(self):
+        from apps.voting import signals  # noqa: F401
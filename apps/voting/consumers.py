@@ -0,0 +1,46 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from apps.authentication.scope import filter_votings_by_scope
+from apps.voting.live import get_snapshot, group_name
+
+
+class VotingResultsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Подписка на результаты голосования: при подключении отправляется текущий
+    снимок, затем - обновления по мере поступления голосов
+    """
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+        self.voting_id = self.scope['url_route']['kwargs']['voting_id']
+        if not await database_sync_to_async(self.can_view)(user):
+            await self.close(code=4403)
+            return
+        snapshot = await database_sync_to_async(get_snapshot)(self.voting_id)
+        if snapshot is None or snapshot['status'] == 'draft':
+            await self.close(code=4404)
+            return
+        self.group = group_name(self.voting_id)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        await self.send_json({'type': 'results', 'results': snapshot})
+
+    def can_view(self, user):
+        """Голосование доступно, если его аудитория пересекается с областью пользователя"""
+        from apps.voting.models import Voting
+
+        return filter_votings_by_scope(Voting.objects.filter(pk=self.voting_id), user).exists()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        """Клиент только слушает обновления"""
+
+    async def results_update(self, event):
+        await self.send_json({'type': 'results', 'results': event['results']})
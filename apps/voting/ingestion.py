@@ -0,0 +1,278 @@
+"""
+Прием бюллетеней с пакетной записью.
+
+Бюллетени проверяются сразу (право голоса, повторное голосование, варианты
+ответа), затем накапливаются в буфере процесса и записываются одним
+bulk_create для Vote и таблицы выбранных вариантов. Запрос голосующего ждет
+записи своего пакета, поэтому подтверждение выдается только после фиксации
+транзакции.
+
+Пакетирование имеет смысл при многопоточных воркерах (gthread/ASGI): у
+синхронного воркера в буфере всегда будет не больше одного бюллетеня.
+"""
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+
+from apps.voting.models import Vote
+from apps.voting.participants import get_eligible_voter_ids, is_eligible_voter
+from apps.voting.tally import apply_tally_delta, cast_vote
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCHING': False,
+    'MAX_BATCH': 200,
+    'MAX_DELAY': 0.05,
+    'CONFIRM_TIMEOUT': 10,
+    'ELIGIBILITY_TTL': 30,
+}
+
+
+def get_ingestion_setting(name):
+    """Возвращает параметр приема бюллетеней из settings.VOTE_INGESTION"""
+    return getattr(settings, 'VOTE_INGESTION', {}).get(name, DEFAULTS[name])
+
+
+class BallotRejected(Exception):
+    """Бюллетень не принят"""
+
+
+class BallotPending(Exception):
+    """
+    Бюллетень уже записывается, но подтверждение не пришло вовремя: голос
+    будет учтен, если запись пакета завершится успешно
+    """
+
+    def __init__(self, vote_id):
+        super().__init__('Голос принят и записывается, проверьте результат позже')
+        self.vote_id = vote_id
+
+
+@dataclass
+class Ballot:
+    voting_id: uuid.UUID
+    voter_id: uuid.UUID
+    option_ids: list
+    ip_address: str = None
+    vote_id: uuid.UUID = field(default_factory=uuid.uuid4)
+    done: threading.Event = field(default_factory=threading.Event)
+    error: str = None
+
+
+class VotingRegistry:
+    """
+    Кэш данных голосования в памяти процесса: допустимые варианты,
+    имеющие право голоса и уже проголосовавшие сотрудники.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._options = {}
+        self._eligible = {}
+        self._voted = defaultdict(set)
+        self._voted_loaded = set()
+
+    def options_valid(self, voting, option_ids):
+        with self._lock:
+            if voting.pk not in self._options:
+                self._options[voting.pk] = set(voting.options.values_list('id', flat=True))
+            return set(option_ids) <= self._options[voting.pk]
+
+    def is_eligible(self, voting, voter_id):
+        ttl = get_ingestion_setting('ELIGIBILITY_TTL')
+        with self._lock:
+            cached = self._eligible.get(voting.pk)
+            if cached is None or time.monotonic() - cached[0] > ttl:
+                cached = (time.monotonic(), get_eligible_voter_ids(voting))
+                self._eligible[voting.pk] = cached
+            return voter_id in cached[1]
+
+    def reserve(self, voting, voter_id):
+        """Отмечает сотрудника как проголосовавшего; False, если он уже голосовал"""
+        with self._lock:
+            if voting.pk not in self._voted_loaded:
+                self._voted[voting.pk].update(Vote.objects.filter(voting=voting).values_list('voter_id', flat=True))
+                self._voted_loaded.add(voting.pk)
+            voted = self._voted[voting.pk]
+            if voter_id in voted:
+                return False
+            voted.add(voter_id)
+            return True
+
+    def release(self, voting_id, voter_id):
+        with self._lock:
+            self._voted[voting_id].discard(voter_id)
+
+
+class DatabaseChecks:
+    """Проверки бюллетеня запросами к базе данных, без кэша процесса"""
+
+    def options_valid(self, voting, option_ids):
+        return voting.options.filter(pk__in=option_ids).count() == len(option_ids)
+
+    def is_eligible(self, voting, voter_id):
+        return is_eligible_voter(voting, voter_id)
+
+    def reserve(self, voting, voter_id):
+        return not Vote.objects.filter(voting=voting, voter_id=voter_id).exists()
+
+    def release(self, voting_id, voter_id):
+        pass
+
+
+def validate_ballot(voting, voter_id, option_ids, registry):
+    """Проверяет бюллетень и резервирует голос сотрудника"""
+    if not voting.is_active:
+        raise BallotRejected('Голосование не активно')
+    option_ids = list(dict.fromkeys(option_ids))
+    if not option_ids:
+        raise BallotRejected('Не выбран ни один вариант ответа')
+    if voting.vote_type != 'multiple' and len(option_ids) > 1:
+        raise BallotRejected('В этом голосовании можно выбрать только один вариант')
+    if not registry.options_valid(voting, option_ids):
+        raise BallotRejected('Выбран недопустимый вариант ответа')
+    if not registry.is_eligible(voting, voter_id):
+        raise BallotRejected('Сотрудник не входит в число участников голосования')
+    if not registry.reserve(voting, voter_id):
+        raise BallotRejected('Сотрудник уже проголосовал')
+    return option_ids
+
+
+class BallotBuffer:
+    """
+    Буфер бюллетеней процесса. Сбрасывается фоновым потоком при накоплении
+    MAX_BATCH бюллетеней или по истечении MAX_DELAY секунд.
+    """
+
+    def __init__(self, max_batch=None, max_delay=None):
+        self.max_batch = max_batch or get_ingestion_setting('MAX_BATCH')
+        self.max_delay = max_delay or get_ingestion_setting('MAX_DELAY')
+        self.registry = VotingRegistry()
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='ballot-buffer', daemon=True)
+        self._thread.start()
+
+    def submit(self, voting, voter_id, option_ids, ip_address=None):
+        """Принимает бюллетень и ждет его записи; возвращает ID голоса"""
+        option_ids = validate_ballot(voting, voter_id, option_ids, self.registry)
+        ballot = Ballot(voting_id=voting.pk, voter_id=voter_id, option_ids=option_ids, ip_address=ip_address)
+        with self._condition:
+            self._pending.append(ballot)
+            if len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        if not ballot.done.wait(get_ingestion_setting('CONFIRM_TIMEOUT')):
+            with self._condition:
+                queued = ballot in self._pending
+                if queued:
+                    self._pending.remove(ballot)
+            if not queued:
+                # Пакет с бюллетенем уже записывается
+                raise BallotPending(ballot.vote_id)
+            self.registry.release(ballot.voting_id, ballot.voter_id)
+            raise BallotRejected('Голос не удалось записать вовремя, попробуйте еще раз')
+        if ballot.error:
+            raise BallotRejected(ballot.error)
+        return ballot.vote_id
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if len(self._pending) < self.max_batch:
+                    self._condition.wait(self.max_delay)
+                batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            try:
+                close_old_connections()
+                self.flush(batch)
+            except Exception:
+                # Поток буфера не должен завершаться: иначе все следующие бюллетени зависнут
+                logger.exception('Ошибка потока буфера бюллетеней')
+
+    def flush(self, batch):
+        """Записывает пакет бюллетеней"""
+        try:
+            write_ballots(batch)
+        except IntegrityError:
+            # Голос мог прийти через другой процесс: пишем по одному, чтобы найти конфликт
+            for ballot in batch:
+                try:
+                    write_ballots([ballot])
+                except IntegrityError:
+                    ballot.error = 'Сотрудник уже проголосовал'
+                except Exception:
+                    logger.exception('Не удалось записать бюллетень %s', ballot.vote_id)
+                    self.fail(ballot)
+        except Exception:
+            logger.exception('Не удалось записать пакет бюллетеней')
+            for ballot in batch:
+                self.fail(ballot)
+        finally:
+            for ballot in batch:
+                ballot.done.set()
+
+    def fail(self, ballot):
+        ballot.error = 'Голос не удалось записать, попробуйте еще раз'
+        self.registry.release(ballot.voting_id, ballot.voter_id)
+
+
+def write_ballots(ballots):
+    """Записывает бюллетени и обновляет счетчики в одной транзакции"""
+    through = Vote.selected_options.through
+    with transaction.atomic():
+        Vote.objects.bulk_create([
+            Vote(id=ballot.vote_id, voting_id=ballot.voting_id, voter_id=ballot.voter_id, ip_address=ballot.ip_address)
+            for ballot in ballots
+        ])
+        through.objects.bulk_create([
+            through(vote_id=ballot.vote_id, voteoption_id=option_id)
+            for ballot in ballots
+            for option_id in ballot.option_ids
+        ])
+        by_voting = defaultdict(list)
+        for ballot in ballots:
+            by_voting[ballot.voting_id].append(ballot)
+        for voting_id, voting_ballots in by_voting.items():
+            option_counts = Counter(option_id for ballot in voting_ballots for option_id in ballot.option_ids)
+            apply_tally_delta(voting_id, ballots=len(voting_ballots), option_counts=option_counts)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_ballot_buffer():
+    """Возвращает буфер бюллетеней текущего процесса"""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = BallotBuffer()
+        return _buffer
+
+
+def submit_ballot(voting, voter, options, ip_address=None):
+    """
+    Принимает голос сотрудника и возвращает ID записанного голоса.
+
+    При VOTE_INGESTION['BATCHING'] бюллетень проходит через буфер процесса,
+    иначе записывается сразу. Вызывает BallotRejected, если голос не принят,
+    и BallotPending, если запись бюллетеня не подтверждена вовремя.
+    """
+    option_ids = [getattr(option, 'pk', option) for option in options]
+    if get_ingestion_setting('BATCHING'):
+        return get_ballot_buffer().submit(voting, voter.pk, option_ids, ip_address)
+
+    option_ids = validate_ballot(voting, voter.pk, option_ids, DatabaseChecks())
+    try:
+        return cast_vote(voting, voter, option_ids, ip_address).pk
+    except IntegrityError:
+        raise BallotRejected('Сотрудник уже проголосовал')
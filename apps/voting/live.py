@@ -0,0 +1,177 @@
+"""
+Результаты голосований в реальном времени.
+
+Изменение счетчиков (apps.voting.tally.apply_tally_delta) после фиксации
+транзакции отмечает голосование как измененное. Поток рассылки процесса раз в
+BROADCAST_INTERVAL собирает отмеченные голосования, читает счетчики и
+отправляет снимок результатов в группу канального слоя. Голоса, пришедшие
+за интервал, уходят одной рассылкой, поэтому частота рассылок не зависит от
+частоты голосов.
+
+Между процессами рассылка согласуется блокировкой в общем кэше: за интервал
+голосование рассылает один процесс, остальные оставляют отметку и повторяют
+попытку на следующем интервале. Django округляет таймауты кэша до целых
+секунд (0.25 превращается в 0, и ключ сразу удаляется), поэтому на Redis
+блокировка ставится напрямую командой SET NX PX, а на других бэкендах
+живет не меньше секунды. Последнее изменение поэтому всегда доходит
+до подписчиков.
+
+Для анонимных голосований отправляются только агрегаты, для открытых - еще
+и последние проголосовавшие.
+"""
+import logging
+import math
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import close_old_connections
+
+from apps.voting.models import Vote, Voting
+
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_INTERVAL = 0.25
+SNAPSHOT_TTL = 5
+RECENT_VOTERS = 10
+
+
+def group_name(voting_id):
+    return f'voting.{voting_id}.results'
+
+
+def snapshot_key(voting_id):
+    return f'voting:live:snapshot:{voting_id}'
+
+
+def lock_key(voting_id):
+    return f'voting:live:lock:{voting_id}'
+
+
+def acquire_broadcast_lock(voting_id, interval):
+    """Занимает право рассылки голосования на interval секунд; False, если оно занято"""
+    key = lock_key(voting_id)
+    backend = caches['default']
+    if isinstance(backend, RedisCache):
+        client = backend._cache.get_client(key, write=True)
+        return bool(client.set(backend.make_and_validate_key(key), 1, nx=True, px=max(1, int(interval * 1000))))
+    return cache.add(key, 1, timeout=max(1, math.ceil(interval)))
+
+
+def percentage(part, total):
+    if not total:
+        return '0.00'
+    return str((Decimal(part) * 100 / total).quantize(Decimal('0.01'), ROUND_HALF_UP))
+
+
+def build_snapshot(voting_id):
+    """
+    Снимок результатов голосования для подписчиков.
+    Читает счетчики, а не таблицу голосов; возвращает None, если голосования нет.
+    """
+    voting = Voting.objects.select_related('voting_type', 'tally').filter(pk=voting_id).first()
+    if voting is None:
+        return None
+    votes_count = voting.get_votes_count()
+    participants = voting.get_participants_count()
+    snapshot = {
+        'voting': str(voting.pk),
+        'status': voting.status,
+        'votes_count': votes_count,
+        'participants_count': participants,
+        'turnout': percentage(votes_count, participants),
+        'options': [
+            {'id': str(item['option'].pk), 'votes_count': item['votes_count'], 'percentage': str(item['percentage'])}
+            for item in voting.get_results()
+        ],
+    }
+    if voting.voting_type.type != 'anonymous':
+        voters = (
+            Vote.objects.filter(voting_id=voting_id)
+            .order_by('-created_at')
+            .values_list('voter__short_name', flat=True)[:RECENT_VOTERS]
+        )
+        snapshot['recent_voters'] = list(voters)
+    return snapshot
+
+
+def get_snapshot(voting_id):
+    """Снимок из кэша (его обновляет рассылка) или построенный заново"""
+    snapshot = cache.get(snapshot_key(voting_id))
+    if snapshot is None:
+        snapshot = build_snapshot(voting_id)
+        if snapshot is not None:
+            cache.set(snapshot_key(voting_id), snapshot, timeout=SNAPSHOT_TTL)
+    return snapshot
+
+
+class ResultsBroadcaster:
+    """
+    Объединяет изменения голосований и рассылает их не чаще раза в интервал
+    """
+
+    def __init__(self, interval=BROADCAST_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._timer = None
+
+    def mark(self, voting_id):
+        with self._lock:
+            self._dirty.add(voting_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            self._timer = None
+        postponed = []
+        try:
+            for voting_id in dirty:
+                # Голосование за этот интервал уже разослал другой процесс
+                if not acquire_broadcast_lock(voting_id, self.interval):
+                    postponed.append(voting_id)
+                    continue
+                try:
+                    self.broadcast(voting_id)
+                except Exception:
+                    logger.exception('Не удалось разослать результаты голосования %s', voting_id)
+        finally:
+            close_old_connections()
+        for voting_id in postponed:
+            self.mark(voting_id)
+
+    def broadcast(self, voting_id):
+        from channels.layers import get_channel_layer
+
+        snapshot = build_snapshot(voting_id)
+        if snapshot is None:
+            return
+        cache.set(snapshot_key(voting_id), snapshot, timeout=SNAPSHOT_TTL)
+        layer = get_channel_layer()
+        if layer is not None:
+            async_to_sync(layer.group_send)(group_name(voting_id), {'type': 'results.update', 'results': snapshot})
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster():
+    """Рассылка результатов текущего процесса"""
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            _broadcaster = ResultsBroadcaster()
+        return _broadcaster
+
+
+def results_changed(voting_id):
+    """Отмечает, что результаты голосования изменились"""
+    get_broadcaster().mark(voting_id)
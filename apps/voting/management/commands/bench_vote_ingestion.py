@@ -0,0 +1,93 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.members.models import Employee
+from apps.members.synthetic import create_organization, create_employees
+from apps.voting.ingestion import BallotBuffer, DatabaseChecks, validate_ballot
+from apps.voting.models import Voting, VotingType, VoteOption
+from apps.voting.tally import cast_vote
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает прием голосов по одному и пакетную запись (p50/p99 и голосов в секунду)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ballots', type=int, default=2000, help='Количество голосов в каждом режиме')
+        parser.add_argument('--concurrency', type=int, default=32, help='Количество одновременных голосующих')
+        parser.add_argument('--max-batch', type=int, default=200, help='Размер пакета при пакетной записи')
+        parser.add_argument('--max-delay', type=float, default=0.05, help='Окно пакета в секундах')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        ballots = options['ballots']
+        self.stdout.write(f'Подготовка данных: {ballots * 2} сотрудников...')
+        organization = create_organization(prefix, departments=5)
+        create_employees(organization, ballots * 2, prefix)
+        author = get_user_model().objects.create(username=prefix)
+        voting_type, _ = VotingType.objects.get_or_create(name='Бенчмарк', defaults={'type': 'open'})
+        voter_ids = list(
+            Employee.objects.filter(department__organization=organization).values_list('id', flat=True)
+        )
+
+        try:
+            direct = self.create_voting(prefix, voting_type, author, 'по одному')
+            batched = self.create_voting(prefix, voting_type, author, 'пакетами')
+            buffer = BallotBuffer(max_batch=options['max_batch'], max_delay=options['max_delay'])
+
+            def submit_direct(voting, voter_id, option_id):
+                option_ids = validate_ballot(voting, voter_id, [option_id], DatabaseChecks())
+                cast_vote(voting, Employee(pk=voter_id), option_ids)
+
+            def submit_batched(voting, voter_id, option_id):
+                buffer.submit(voting, voter_id, [option_id])
+
+            self.report('По одному', self.run(direct, voter_ids[:ballots], submit_direct, options['concurrency']))
+            self.report('Пакетами', self.run(batched, voter_ids[ballots:], submit_batched, options['concurrency']))
+        finally:
+            Voting.objects.filter(author=author).delete()
+            organization.delete()
+            author.delete()
+
+    def create_voting(self, prefix, voting_type, author, label):
+        now = timezone.now()
+        voting = Voting.objects.create(
+            title=f'{prefix} {label}', description='Бенчмарк', voting_type=voting_type, author=author,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(days=1), status='active',
+        )
+        for order, text in enumerate(['За', 'Против', 'Воздержался'], start=1):
+            VoteOption.objects.create(voting=voting, text=text, order=order)
+        return voting
+
+    def run(self, voting, voter_ids, submit, concurrency):
+        option_ids = list(voting.options.values_list('id', flat=True))
+
+        def task(index):
+            started = time.perf_counter()
+            try:
+                submit(voting, voter_ids[index], option_ids[index % len(option_ids)])
+            finally:
+                # Как и после обычного запроса, соединение закрывается
+                connection.close()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(task, range(len(voter_ids))))
+        return latencies, time.perf_counter() - started
+
+    def report(self, label, result):
+        latencies, elapsed = result
+        percentiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'{label}: {len(latencies)} голосов за {elapsed:.2f} с, '
+            f'{len(latencies) / elapsed:.0f} голосов/с, '
+            f'p50 {percentiles[49] * 1000:.1f} мс, p99 {percentiles[98] * 1000:.1f} мс'
+        )
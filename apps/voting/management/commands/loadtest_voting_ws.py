@@ -0,0 +1,135 @@
+import asyncio
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.members.models import Employee
+from apps.members.synthetic import create_employees, create_organization
+from apps.voting.models import VoteOption, Voting, VotingType
+from apps.voting.routing import websocket_urlpatterns
+from apps.voting.tally import cast_vote
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный тест рассылки результатов голосования подписчикам WebSocket'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=5000, help='Количество одновременных подписчиков')
+        parser.add_argument('--votes', type=int, default=1000, help='Количество голосов во время теста')
+        parser.add_argument('--concurrency', type=int, default=16, help='Количество одновременных голосующих')
+        parser.add_argument('--anonymous', action='store_true', help='Анонимное голосование')
+        parser.add_argument('--timeout', type=float, default=30, help='Ожидание итоговых результатов, с')
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{uuid.uuid4().hex[:8]}'
+        self.stdout.write(f"Подготовка данных: {options['votes']} голосующих...")
+        organization = create_organization(prefix, departments=5)
+        create_employees(organization, options['votes'], prefix)
+        user = get_user_model().objects.create(username=prefix)
+        voting_type, _ = VotingType.objects.get_or_create(
+            name='Нагрузочный тест (анонимное)' if options['anonymous'] else 'Нагрузочный тест',
+            defaults={'type': 'anonymous' if options['anonymous'] else 'open'},
+        )
+        now = timezone.now()
+        voting = Voting.objects.create(
+            title=f'{prefix} нагрузочный тест', description='Нагрузочный тест', voting_type=voting_type, author=user,
+            start_date=now - timedelta(hours=1), end_date=now + timedelta(days=1), status='active',
+        )
+        options_list = [VoteOption.objects.create(voting=voting, text=text, order=order)
+                        for order, text in enumerate(['За', 'Против', 'Воздержался'], start=1)]
+        voter_ids = list(Employee.objects.filter(department__organization=organization).values_list('id', flat=True))
+        try:
+            asyncio.run(self.run(voting, options_list, voter_ids, user, options))
+        finally:
+            Voting.objects.filter(pk=voting.pk).delete()
+            organization.delete()
+            user.delete()
+
+    async def run(self, voting, options_list, voter_ids, user, options):
+        application = URLRouter(websocket_urlpatterns)
+        path = f'/ws/votings/{voting.pk}/results/'
+        expected = len(voter_ids)
+
+        started = time.perf_counter()
+        communicators = []
+        for start in range(0, options['subscribers'], 500):
+            batch = [WebsocketCommunicator(application, path) for _ in range(start, min(start + 500, options['subscribers']))]
+            for communicator in batch:
+                communicator.scope['user'] = user
+            results = await asyncio.gather(*(communicator.connect(timeout=30) for communicator in batch))
+            for communicator in batch:
+                await communicator.receive_json_from(timeout=30)
+            communicators.extend(batch)
+            if not all(connected for connected, _ in results):
+                self.stdout.write(self.style.ERROR('Часть подписчиков не подключилась'))
+        self.stdout.write(f'Подключено {len(communicators)} подписчиков за {time.perf_counter() - started:.1f} с')
+
+        finished = {}
+        received = [0] * len(communicators)
+        anonymous_leaks = 0
+
+        async def listen(index, communicator):
+            nonlocal anonymous_leaks
+            while True:
+                message = await communicator.receive_json_from(timeout=options['timeout'])
+                received[index] += 1
+                results = message['results']
+                if options['anonymous'] and 'recent_voters' in results:
+                    anonymous_leaks += 1
+                if results['votes_count'] >= expected:
+                    finished[index] = time.perf_counter()
+                    return
+
+        def vote(index):
+            try:
+                cast_vote(voting, Employee(pk=voter_ids[index]), [options_list[index % len(options_list)]])
+            finally:
+                connection.close()
+
+        listeners = [asyncio.ensure_future(listen(index, communicator)) for index, communicator in enumerate(communicators)]
+        votes_started = time.perf_counter()
+
+        def cast_all():
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                list(executor.map(vote, range(len(voter_ids))))
+
+        await asyncio.get_running_loop().run_in_executor(None, cast_all)
+        votes_finished = time.perf_counter()
+        self.stdout.write(
+            f'Принято {expected} голосов за {votes_finished - votes_started:.1f} с '
+            f'({expected / (votes_finished - votes_started):.0f} голосов/с)'
+        )
+
+        outcome = await asyncio.gather(*listeners, return_exceptions=True)
+        timeouts = sum(1 for item in outcome if isinstance(item, Exception))
+        for communicator in communicators:
+            await communicator.disconnect()
+
+        lags = [max(0, moment - votes_finished) * 1000 for moment in finished.values()]
+        duration = votes_finished - votes_started
+        self.stdout.write(
+            f'Итоговые результаты получили {len(finished)} из {len(communicators)} подписчиков '
+            f'(не дождались: {timeouts})'
+        )
+        if lags:
+            percentiles = statistics.quantiles(lags, n=100) if len(lags) > 1 else [lags[0]] * 99
+            self.stdout.write(
+                f'Задержка итоговых результатов после последнего голоса: '
+                f'p50 {percentiles[49]:.0f} мс, p99 {percentiles[98]:.0f} мс'
+            )
+        self.stdout.write(
+            f'Сообщений на подписчика: медиана {statistics.median(received):.0f} '
+            f'({statistics.median(received) / max(duration, 0.001):.1f} в секунду), '
+            f'всего {sum(received)}'
+        )
+        if options['anonymous']:
+            self.stdout.write(f'Сообщений с данными голосующих в анонимном голосовании: {anonymous_leaks}')
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.voting.models import Voting
+from apps.voting.tally import reconcile_voting
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счетчики голосов с таблицей голосов и сообщает о расхождениях'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--voting', dest='voting_ids', action='append', default=[],
+                            help='ID голосования (можно указать несколько раз)')
+        parser.add_argument('--status', choices=[choice for choice, _ in Voting.STATUS_CHOICES],
+                            help='Сверять только голосования с указанным статусом')
+        parser.add_argument('--fix', action='store_true', help='Перезаписать счетчики фактическими значениями')
+
+    def handle(self, *args, **options):
+        votings = Voting.objects.all()
+        if options['voting_ids']:
+            votings = votings.filter(pk__in=options['voting_ids'])
+            if not votings.exists():
+                raise CommandError('Голосования не найдены')
+        if options['status']:
+            votings = votings.filter(status=options['status'])
+
+        total_drift = 0
+        for voting in votings.iterator():
+            drift = reconcile_voting(voting, fix=options['fix'])
+            total_drift += len(drift)
+            for option, stored, actual in drift:
+                label = option.text if option is not None else 'бюллетени'
+                self.stdout.write(self.style.WARNING(
+                    f'{voting.title} [{voting.pk}] - {label}: счетчик {stored}, фактически {actual}'
+                ))
+
+        if not total_drift:
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Исправлено расхождений: {total_drift}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Найдено расхождений: {total_drift} (используйте --fix для исправления)'))
@@ -77,6 +77,8 @@ class Voting(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', verbose_name='Статус')
     target_audience = models.ManyToManyField(Department, blank=True, verbose_name='Целевая аудитория')
     quorum_required = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, verbose_name='Требуемый кворум (%)')
+    participants_count = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Количество участников (снимок)')
+    participants_snapshot_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Дата снимка участников')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
 
@@ -94,18 +96,50 @@ class Voting(models.Model):
         now = timezone.now()
         return self.status == 'active' and self.start_date <= now and self.end_date >= now
 
-    def get_participants_count(self):
-        """Возвращает количество участников голосования"""
+    def get_eligible_voters(self):
+        """Возвращает queryset сотрудников, имеющих право голоса"""
         if self.target_audience.exists():
-            # Если указана целевая аудитория (подразделения), считаем сотрудников этих подразделений
-            return Employee.objects.filter(department__in=self.target_audience.all()).count()
+            # Если указана целевая аудитория (подразделения), берем сотрудников этих подразделений
+            return Employee.objects.filter(status='active', department__in=self.target_audience.all())
         else:
-            # Иначе считаем всех сотрудников
-            return Employee.objects.count()
+            # Иначе всех действующих членов профсоюза
+            return Employee.objects.filter(status='active')
+
+    def get_participants_count(self):
+        """Возвращает количество участников голосования"""
+        if self.participants_count is not None:
+            return self.participants_count
+        # Снимок создается при запуске голосования, а не при чтении
+        return self.get_eligible_voters().count()
 
     def get_votes_count(self):
         """Возвращает количество отданных голосов"""
-        return self.votes.count()
+        try:
+            return self.tally.votes_count
+        except VotingTally.DoesNotExist:
+            return self.votes.count()
+
+    def get_results(self):
+        """Возвращает результаты голосования по вариантам ответа"""
+        from apps.voting.tally import get_results
+        return get_results(self)
+
+
+class VotingParticipant(models.Model):
+    """
+    Модель снимка участника голосования
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    voting = models.ForeignKey(Voting, on_delete=models.CASCADE, related_name='participants', verbose_name='Голосование')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='voting_participations', verbose_name='Сотрудник')
+
+    class Meta:
+        verbose_name = 'Участник голосования'
+        verbose_name_plural = 'Участники голосований'
+        unique_together = ['voting', 'employee']
+
+    def __str__(self):
+        return f"{self.employee.full_name} в {self.voting.title}"
 
 
 class Vote(models.Model):
@@ -123,6 +157,9 @@ class Vote(models.Model):
         verbose_name = 'Голос'
         verbose_name_plural = 'Голоса'
         unique_together = ['voting', 'voter']
+        indexes = [
+            models.Index(fields=['voting', '-created_at'], name='voting_vote_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Голос {self.voter.full_name} в {self.voting.title}"
@@ -147,4 +184,38 @@ class QuorumVotingResult(models.Model):
         verbose_name_plural = 'Результаты голосований кворума'
 
     def __str__(self):
-        return f"Результат кворума: {self.voting.title}"
\ No newline at end of file
+        return f"Результат кворума: {self.voting.title}"
+
+
+class VotingTally(models.Model):
+    """
+    Модель счетчика голосов по голосованию
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    voting = models.OneToOneField(Voting, on_delete=models.CASCADE, related_name='tally', verbose_name='Голосование')
+    votes_count = models.PositiveIntegerField(default=0, verbose_name='Количество голосов')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    class Meta:
+        verbose_name = 'Счетчик голосования'
+        verbose_name_plural = 'Счетчики голосований'
+
+    def __str__(self):
+        return f"Счетчик {self.voting.title}: {self.votes_count}"
+
+
+class VoteOptionTally(models.Model):
+    """
+    Модель счетчика голосов по варианту ответа
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    voting = models.ForeignKey(Voting, on_delete=models.CASCADE, related_name='option_tallies', verbose_name='Голосование')
+    option = models.OneToOneField(VoteOption, on_delete=models.CASCADE, related_name='tally', verbose_name='Вариант ответа')
+    votes_count = models.PositiveIntegerField(default=0, verbose_name='Количество голосов')
+
+    class Meta:
+        verbose_name = 'Счетчик варианта ответа'
+        verbose_name_plural = 'Счетчики вариантов ответов'
+
+    def __str__(self):
+        return f"Счетчик {self.option.text}: {self.votes_count}"
@@ -0,0 +1,134 @@
+"""
+Снимки участников голосований.
+
+При переводе голосования из черновика в активное состояние сохраняется
+количество и состав имеющих право голоса сотрудников, чтобы кворум и списки
+голосований не пересчитывали таблицу сотрудников на каждый запрос.
+
+Снимок пишется только при запуске голосования и после сброса (изменилась
+аудитория или сотрудники) - задачей refresh_participant_snapshots после
+фиксации транзакции. Пути чтения снимок не создают: пока его нет, участники
+считаются по таблице сотрудников.
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.members.models import Employee
+from apps.voting.models import Voting, VotingParticipant
+
+
+SNAPSHOT_BATCH_SIZE = 2000
+
+
+def snapshot_participants(voting):
+    """Сохраняет снимок участников голосования и возвращает их количество"""
+    with transaction.atomic():
+        # Блокировка строки голосования сериализует параллельные снимки
+        Voting.objects.select_for_update().filter(pk=voting.pk).values_list('id', flat=True).first()
+        VotingParticipant.objects.filter(voting=voting).delete()
+        batch = []
+        count = 0
+        for employee_id in voting.get_eligible_voters().values_list('id', flat=True).iterator(chunk_size=SNAPSHOT_BATCH_SIZE):
+            batch.append(VotingParticipant(voting=voting, employee_id=employee_id))
+            if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                VotingParticipant.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            VotingParticipant.objects.bulk_create(batch)
+            count += len(batch)
+
+        snapshot_at = timezone.now()
+        Voting.objects.filter(pk=voting.pk).update(participants_count=count, participants_snapshot_at=snapshot_at)
+    voting.participants_count = count
+    voting.participants_snapshot_at = snapshot_at
+    return count
+
+
+def invalidate_participants(voting_ids):
+    """Сбрасывает снимки участников указанных голосований и ставит их пересчет в очередь"""
+    from apps.voting.tasks import refresh_participant_snapshots
+
+    voting_ids = [str(voting_id) for voting_id in voting_ids]
+    if not voting_ids:
+        return
+    with transaction.atomic():
+        VotingParticipant.objects.filter(voting_id__in=voting_ids).delete()
+        Voting.objects.filter(pk__in=voting_ids).update(participants_count=None, participants_snapshot_at=None)
+    transaction.on_commit(lambda: refresh_participant_snapshots.delay(voting_ids))
+
+
+def refresh_snapshots(voting_ids):
+    """Пересоздает снимки активных голосований без снимка; возвращает их число"""
+    votings = Voting.objects.filter(pk__in=voting_ids, status='active', participants_count__isnull=True)
+    for voting in votings:
+        snapshot_participants(voting)
+    return len(votings)
+
+
+def invalidate_for_departments(department_ids):
+    """Сбрасывает снимки активных голосований, затрагивающих подразделения"""
+    department_ids = [department_id for department_id in department_ids if department_id is not None]
+    voting_ids = (
+        Voting.objects.filter(status='active', participants_count__isnull=False)
+        .filter(Q(target_audience__in=department_ids) | Q(target_audience__isnull=True))
+        .values_list('id', flat=True)
+        .distinct()
+    )
+    invalidate_participants(voting_ids)
+
+
+def get_eligible_voter_ids(voting):
+    """Возвращает множество ID сотрудников, имеющих право голоса"""
+    if voting.participants_count is not None:
+        return set(VotingParticipant.objects.filter(voting=voting).values_list('employee_id', flat=True))
+    return set(voting.get_eligible_voters().values_list('id', flat=True))
+
+
+def is_eligible_voter(voting, employee_id):
+    """Проверяет право голоса одного сотрудника"""
+    if voting.participants_count is not None:
+        return VotingParticipant.objects.filter(voting=voting, employee_id=employee_id).exists()
+    return voting.get_eligible_voters().filter(pk=employee_id).exists()
+
+
+def get_participants_counts(votings):
+    """
+    Возвращает количество участников для набора голосований.
+
+    Для голосований со снимком используется сохраненное значение, остальные
+    считаются одним сгруппированным запросом. Результат - словарь
+    {id голосования: количество участников}.
+    """
+    counts = {}
+    pending_ids = []
+    for voting in votings:
+        if voting.participants_count is not None:
+            counts[voting.pk] = voting.participants_count
+        else:
+            pending_ids.append(voting.pk)
+    if not pending_ids:
+        return counts
+
+    grouped = (
+        Voting.objects.filter(pk__in=pending_ids)
+        .annotate(
+            audience_size=Count('target_audience', distinct=True),
+            eligible=Count(
+                'target_audience__employees',
+                filter=Q(target_audience__employees__status='active'),
+                distinct=True,
+            ),
+        )
+        .values_list('id', 'audience_size', 'eligible')
+    )
+    everyone = None
+    for voting_id, audience_size, eligible in grouped:
+        if audience_size:
+            counts[voting_id] = eligible
+        else:
+            if everyone is None:
+                everyone = Employee.objects.filter(status='active').count()
+            counts[voting_id] = everyone
+    return counts
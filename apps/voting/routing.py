@@ -0,0 +1,8 @@
+from django.urls import path
+
+from apps.voting import consumers
+
+
+websocket_urlpatterns = [
+    path('ws/votings/<uuid:voting_id>/results/', consumers.VotingResultsConsumer.as_asgi()),
+]
@@ -0,0 +1,130 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.members.models import Employee
+from apps.members.signals import employees_bulk_changed
+from apps.voting.models import Voting, Vote, VoteOption
+from apps.voting.participants import snapshot_participants, invalidate_participants, invalidate_for_departments
+from apps.voting.tally import ensure_tallies, apply_tally_delta
+
+
+@receiver(pre_save, sender=Voting)
+def remember_voting_status(sender, instance, raw=False, **kwargs):
+    """Запоминает статус голосования до сохранения"""
+    instance._previous_status = None
+    if not raw and not instance._state.adding:
+        instance._previous_status = Voting.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Voting)
+def create_voting_tally(sender, instance, created, **kwargs):
+    """Создает счетчик для нового голосования"""
+    if created:
+        ensure_tallies(instance.pk)
+
+
+@receiver(post_save, sender=Voting)
+def snapshot_on_activation(sender, instance, created, raw=False, **kwargs):
+    """Сохраняет снимок участников при запуске голосования"""
+    if raw or instance.status != 'active':
+        return
+    if created or getattr(instance, '_previous_status', None) != 'active':
+        snapshot_participants(instance)
+
+
+@receiver(m2m_changed, sender=Voting.target_audience.through)
+def invalidate_on_audience_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Сбрасывает снимок участников при изменении целевой аудитории"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # instance - подразделение, pk_set - идентификаторы голосований
+        if action == 'post_clear':
+            invalidate_for_departments([instance.pk])
+        else:
+            invalidate_participants(Voting.objects.filter(pk__in=pk_set, status='active').values_list('id', flat=True))
+    elif instance.status == 'active':
+        invalidate_participants([instance.pk])
+        instance.participants_count = None
+        instance.participants_snapshot_at = None
+
+
+@receiver(pre_save, sender=Employee)
+def remember_employee_eligibility(sender, instance, raw=False, **kwargs):
+    """Запоминает подразделение и статус сотрудника до сохранения"""
+    instance._previous_eligibility = None
+    if not raw and not instance._state.adding:
+        instance._previous_eligibility = (
+            Employee.objects.filter(pk=instance.pk).values_list('department_id', 'status').first()
+        )
+
+
+@receiver(post_save, sender=Employee)
+def invalidate_on_employee_change(sender, instance, created, raw=False, **kwargs):
+    """Сбрасывает снимки участников при изменении подразделения или статуса сотрудника"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_eligibility', None)
+    if created or previous is None:
+        if instance.status == 'active':
+            invalidate_for_departments([instance.department_id])
+        return
+    previous_department_id, previous_status = previous
+    if previous_department_id != instance.department_id or previous_status != instance.status:
+        invalidate_for_departments([previous_department_id, instance.department_id])
+
+
+@receiver(post_delete, sender=Employee)
+def invalidate_on_employee_delete(sender, instance, **kwargs):
+    """Сбрасывает снимки участников при удалении сотрудника"""
+    if instance.status == 'active':
+        invalidate_for_departments([instance.department_id])
+
+
+@receiver(post_save, sender=VoteOption)
+def create_option_tally(sender, instance, created, **kwargs):
+    """Создает счетчик для нового варианта ответа"""
+    if created:
+        ensure_tallies(instance.voting_id, [instance.pk])
+
+
+@receiver(post_save, sender=Vote)
+def count_ballot(sender, instance, created, raw=False, **kwargs):
+    """Учитывает новый бюллетень в счетчике голосования"""
+    if created and not raw:
+        apply_tally_delta(instance.voting_id, ballots=1)
+
+
+@receiver(pre_delete, sender=Vote)
+def discount_ballot(sender, instance, **kwargs):
+    """Исключает удаляемый бюллетень и его варианты из счетчиков"""
+    option_ids = instance.selected_options.values_list('id', flat=True)
+    apply_tally_delta(instance.voting_id, ballots=-1, option_counts={option_id: -1 for option_id in option_ids})
+
+
+@receiver(m2m_changed, sender=Vote.selected_options.through)
+def count_selected_options(sender, instance, action, reverse, pk_set, **kwargs):
+    """Обновляет счетчики вариантов при изменении выбранных вариантов голоса"""
+    if action == 'pre_clear':
+        if reverse:
+            apply_tally_delta(instance.voting_id, option_counts={instance.pk: -instance.vote_set.count()})
+        else:
+            option_ids = instance.selected_options.values_list('id', flat=True)
+            apply_tally_delta(instance.voting_id, option_counts={option_id: -1 for option_id in option_ids})
+        return
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    sign = 1 if action == 'post_add' else -1
+    if reverse:
+        # instance - вариант ответа, pk_set - идентификаторы голосов
+        apply_tally_delta(instance.voting_id, option_counts={instance.pk: sign * len(pk_set)})
+    else:
+        apply_tally_delta(instance.voting_id, option_counts={option_id: sign for option_id in pk_set})
+
+
+@receiver(employees_bulk_changed)
+def invalidate_after_bulk_change(sender, department_ids=(), **kwargs):
+    """Сбрасывает снимки участников после массового изменения сотрудников"""
+    if department_ids:
+        invalidate_for_departments(department_ids)
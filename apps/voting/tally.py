@@ -0,0 +1,159 @@
+"""
+Инкрементальный подсчет голосов.
+
+Счетчики VotingTally/VoteOptionTally обновляются в той же транзакции, что и
+запись голоса, поэтому результаты и кворум читаются за O(число вариантов)
+без пересчета таблицы Vote.
+"""
+import math
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from apps.voting.live import results_changed
+from apps.voting.models import Vote, VotingTally, VoteOptionTally, QuorumVotingResult
+
+
+def ensure_tallies(voting_id, option_ids=()):
+    """Создает недостающие счетчики голосования и вариантов ответа"""
+    VotingTally.objects.bulk_create([VotingTally(voting_id=voting_id)], ignore_conflicts=True)
+    if option_ids:
+        VoteOptionTally.objects.bulk_create(
+            [VoteOptionTally(voting_id=voting_id, option_id=option_id) for option_id in option_ids],
+            ignore_conflicts=True,
+        )
+
+
+def apply_tally_delta(voting_id, ballots=0, option_counts=None):
+    """
+    Изменяет счетчики голосования на указанные величины.
+
+    ballots - изменение числа бюллетеней, option_counts - словарь
+    {id варианта: изменение числа голосов}.
+    """
+    option_counts = {option_id: n for option_id, n in (option_counts or {}).items() if n}
+    if ballots or option_counts:
+        # Подписчики получат результаты после фиксации голоса (apps.voting.live)
+        transaction.on_commit(lambda: results_changed(voting_id))
+    with transaction.atomic():
+        if ballots:
+            updated = VotingTally.objects.filter(voting_id=voting_id).update(votes_count=F('votes_count') + ballots)
+            if not updated:
+                ensure_tallies(voting_id)
+                VotingTally.objects.filter(voting_id=voting_id).update(votes_count=F('votes_count') + ballots)
+
+        # Группируем варианты по величине изменения: один UPDATE на группу
+        by_delta = defaultdict(list)
+        for option_id, n in option_counts.items():
+            by_delta[n].append(option_id)
+        for n, option_ids in by_delta.items():
+            updated = VoteOptionTally.objects.filter(option_id__in=option_ids).update(votes_count=F('votes_count') + n)
+            if updated < len(option_ids):
+                existing = set(
+                    VoteOptionTally.objects.filter(option_id__in=option_ids).values_list('option_id', flat=True)
+                )
+                missing = [option_id for option_id in option_ids if option_id not in existing]
+                ensure_tallies(voting_id, missing)
+                VoteOptionTally.objects.filter(option_id__in=missing).update(votes_count=F('votes_count') + n)
+
+
+def cast_vote(voting, voter, options, ip_address=None):
+    """Сохраняет голос вместе с выбранными вариантами в одной транзакции"""
+    with transaction.atomic():
+        vote = Vote.objects.create(voting=voting, voter=voter, ip_address=ip_address)
+        vote.selected_options.set(options)
+    return vote
+
+
+def get_results(voting):
+    """
+    Возвращает результаты голосования в порядке вариантов ответа.
+
+    Каждый элемент - словарь с ключами option, votes_count и percentage
+    (процент от числа отданных бюллетеней).
+    """
+    options = list(voting.options.select_related('tally'))
+    total = voting.get_votes_count()
+    results = []
+    for option in options:
+        try:
+            votes_count = option.tally.votes_count
+        except VoteOptionTally.DoesNotExist:
+            votes_count = 0
+        percentage = Decimal('0.00')
+        if total:
+            percentage = (Decimal(votes_count) * 100 / total).quantize(Decimal('0.01'), ROUND_HALF_UP)
+        results.append({'option': option, 'votes_count': votes_count, 'percentage': percentage})
+    return results
+
+
+def get_quorum_percentage(voting, participants_count=None):
+    """Возвращает процент проголосовавших от числа участников"""
+    if participants_count is None:
+        participants_count = voting.get_participants_count()
+    if not participants_count:
+        return Decimal('0.00')
+    return (Decimal(voting.get_votes_count()) * 100 / participants_count).quantize(Decimal('0.01'), ROUND_HALF_UP)
+
+
+def refresh_quorum_result(voting):
+    """Обновляет результат голосования кворума по текущим счетчикам"""
+    participants_count = voting.get_participants_count()
+    quorum_percentage = get_quorum_percentage(voting, participants_count)
+    required_percentage = voting.quorum_required or Decimal('0')
+    required_voters = math.ceil(participants_count * required_percentage / 100)
+    total_voters = voting.get_votes_count()
+    result = QuorumVotingResult.objects.filter(voting=voting).first()
+    if result is None:
+        result = QuorumVotingResult(voting=voting, decision_made=False)
+    result.quorum_percentage = quorum_percentage
+    result.total_voters = total_voters
+    result.required_voters = required_voters
+    result.is_quorum_reached = total_voters >= required_voters
+    result.save()
+    return result
+
+
+def count_actual_votes(voting_id):
+    """Подсчитывает голоса по таблицам Vote и выбранных вариантов"""
+    through = Vote.selected_options.through
+    ballots = Vote.objects.filter(voting_id=voting_id).count()
+    option_counts = dict(
+        through.objects.filter(vote__voting_id=voting_id)
+        .values('voteoption_id')
+        .annotate(n=Count('id'))
+        .values_list('voteoption_id', 'n')
+    )
+    return ballots, option_counts
+
+
+def reconcile_voting(voting, fix=False):
+    """
+    Сверяет счетчики голосования с таблицей Vote.
+
+    Возвращает список расхождений (вариант или None для бюллетеней,
+    значение счетчика, фактическое значение). При fix=True счетчики
+    перезаписываются фактическими значениями.
+    """
+    option_ids = list(voting.options.values_list('id', flat=True))
+    with transaction.atomic():
+        ensure_tallies(voting.pk, option_ids)
+        # Блокировка счетчика голосования сериализует сверку с записью новых голосов
+        tally = VotingTally.objects.select_for_update().get(voting=voting)
+        ballots, option_counts = count_actual_votes(voting.pk)
+
+        drift = []
+        if tally.votes_count != ballots:
+            drift.append((None, tally.votes_count, ballots))
+            if fix:
+                VotingTally.objects.filter(pk=tally.pk).update(votes_count=ballots)
+
+        for option_tally in VoteOptionTally.objects.filter(voting=voting).select_related('option'):
+            actual = option_counts.get(option_tally.option_id, 0)
+            if option_tally.votes_count != actual:
+                drift.append((option_tally.option, option_tally.votes_count, actual))
+                if fix:
+                    VoteOptionTally.objects.filter(pk=option_tally.pk).update(votes_count=actual)
+    return drift
@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from apps.voting.participants import refresh_snapshots
+
+
+@shared_task(ignore_result=True)
+def refresh_participant_snapshots(voting_ids):
+    """Пересоздает сброшенные снимки участников активных голосований"""
+    refresh_snapshots(voting_ids)
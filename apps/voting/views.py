@@ -0,0 +1,41 @@
+import uuid
+
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST
+
+from apps.authentication.scope import filter_votings_by_scope
+from apps.members.models import Employee
+from apps.voting.ingestion import BallotPending, BallotRejected, submit_ballot
+from apps.voting.models import Voting
+
+
+def get_voter(user):
+    """Сотрудник, от имени которого голосует пользователь (сопоставляется по email)"""
+    if not user.email:
+        return None
+    return Employee.objects.filter(email__iexact=user.email, status='active').first()
+
+
+@login_required
+@require_POST
+def vote_view(request, voting_id):
+    """Принять голос пользователя (варианты ответа - параметры option)"""
+    voting = get_object_or_404(filter_votings_by_scope(Voting.objects.all(), request.user), pk=voting_id)
+    voter = get_voter(request.user)
+    if voter is None:
+        raise PermissionDenied
+    try:
+        option_ids = [uuid.UUID(value) for value in request.POST.getlist('option')]
+    except ValueError:
+        return JsonResponse({'error': 'Выбран недопустимый вариант ответа'}, status=400)
+
+    try:
+        vote_id = submit_ballot(voting, voter, option_ids, ip_address=request.META.get('REMOTE_ADDR'))
+    except BallotRejected as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except BallotPending as exc:
+        return JsonResponse({'vote_id': str(exc.vote_id), 'status': 'pending', 'message': str(exc)}, status=202)
+    return JsonResponse({'vote_id': str(vote_id), 'status': 'recorded'})
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class AccountsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'accounts'
+    verbose_name = 'Учетные записи'
+
+    def ready(self):
+        from .hierarchy import organization_tree
+
+        organization_tree.connect(dispatch_uid='accounts_organization_tree')
@@ -0,0 +1,13 @@
+"""
+Иерархия организаций модуля учетных записей.
+
+Таблица замыкания OrganizationClosure поддерживается тем же
+apps.core.hierarchy.ClosureTree, что и иерархия apps.members; сигналы
+подключаются в AccountsConfig.ready().
+"""
+from apps.core.hierarchy import ClosureTree
+
+from .models import Organization, OrganizationClosure
+
+
+organization_tree = ClosureTree(Organization, OrganizationClosure)
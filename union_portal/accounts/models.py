@@ -58,4 +58,34 @@ class Organization(models.Model):
 
     class Meta:
         verbose_name = 'Организация'
-        verbose_name_plural = 'Организации'
\ No newline at end of file
+        verbose_name_plural = 'Организации'
+
+
+class OrganizationClosure(models.Model):
+    """
+    Модель связи организации с ее родительскими организациями (таблица замыкания)
+    """
+    ancestor = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='descendant_links',
+        verbose_name='Родительская организация'
+    )
+    descendant = models.ForeignKey(
+        Organization,
+        on_delete=models.CASCADE,
+        related_name='ancestor_links',
+        verbose_name='Дочерняя организация'
+    )
+    depth = models.PositiveIntegerField(verbose_name='Уровень вложенности')
+
+    def __str__(self):
+        return f"{self.ancestor} → {self.descendant} ({self.depth})"
+
+    class Meta:
+        verbose_name = 'Связь организаций'
+        verbose_name_plural = 'Иерархия организаций'
+        unique_together = ['ancestor', 'descendant']
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='accounts_orgclosure_desc_idx'),
+        ]
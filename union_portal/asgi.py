@@ -1,10 +1,8 @@
 """
 ASGI config for union_portal project.
 
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+HTTP-запросы обслуживает Django, WebSocket - маршруты channels
+(результаты голосований в реальном времени, apps.voting.routing).
 """
 
 import os
@@ -13,4 +11,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'union_portal.settings')
 
-application = get_asgi_application()
+# Приложение Django инициализируется до импорта потребителей, использующих модели
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+
+from apps.voting.routing import websocket_urlpatterns  # noqa: E402
+
+application = ProtocolTypeRouter({
+    'http': django_asgi_app,
+    'websocket': AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(websocket_urlpatterns))),
+})
@@ -0,0 +1,16 @@
+"""
+Celery-приложение проекта union_portal.
+
+Брокер и бэкенд результатов задаются в settings (CELERY_*). В тестах
+CELERY_TASK_ALWAYS_EAGER выполняет задачи в том же процессе.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'union_portal.settings')
+
+app = Celery('union_portal')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'django_otp',
     'django_otp.plugins.otp_totp',
     'django_otp.plugins.otp_static',
@@ -39,6 +40,7 @@ INSTALLED_APPS = [
     'reports',
     'dashboard',
     'core',
+    'mailing',
 ]
 
 MIDDLEWARE = [
@@ -46,8 +48,8 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django_otp.middleware.OTPMiddleware',
+    'apps.authentication.middleware.CachedAuthenticationMiddleware',
+    'apps.authentication.middleware.CachedOTPMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,6 +73,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'union_portal.wsgi.application'
+ASGI_APPLICATION = 'union_portal.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -136,6 +139,9 @@ LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'dashboard:index'
 LOGOUT_REDIRECT_URL = 'news:home'
 
+# Сессии: чтение из кэша, запись в кэш и в базу (снимки пользователей - apps.authentication.snapshots)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
@@ -143,6 +149,105 @@ EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER or 'webmaster@localhost')
+
+# Рассылки (apps.mailing.sending): порции на воркер, лимит писем в секунду, повторы
+MAILING = {
+    'BACKEND': os.environ.get('MAILING_EMAIL_BACKEND'),
+    'CHUNK_SIZE': 200,
+    'RATE_PER_SECOND': int(os.environ.get('MAILING_RATE_PER_SECOND', 10)),
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 60,
+}
+
+# Поиск сотрудников: по умолчанию выбирается по типу СУБД (apps.members.search)
+# MEMBERS_SEARCH_BACKEND = 'apps.members.search.SimpleSearchBackend'
+
+# Ключ подписей документов (apps.protocols.signatures), не зависящий от SECRET_KEY;
+# без него ключ выводится из SECRET_KEY, а старые подписи проверяются по SECRET_KEY_FALLBACKS.
+# Прежние ключи после смены перечисляются в DOCUMENT_SIGNATURE_KEY_FALLBACKS.
+DOCUMENT_SIGNATURE_KEY = os.environ.get('DOCUMENT_SIGNATURE_KEY')
+DOCUMENT_SIGNATURE_KEY_FALLBACKS = []
+
+# Celery: фоновое формирование отчетов и рассылки
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', REDIS_URL)
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    # Снимки остатка фонда взаимопомощи (apps.finance.ledger)
+    'finance-balance-snapshots': {
+        'task': 'apps.finance.tasks.build_balance_snapshots',
+        'schedule': 6 * 60 * 60,
+    },
+    # Заявки, взятые в работу и не рассмотренные (apps.finance.queues)
+    'finance-release-stale-claims': {
+        'task': 'apps.finance.tasks.release_stale_support_claims',
+        'schedule': 30 * 60,
+    },
+    # Задания на отчеты, брошенные упавшими воркерами (apps.reports.jobs)
+    'reports-requeue-stale-jobs': {
+        'task': 'apps.reports.tasks.requeue_stale_report_jobs',
+        'schedule': 10 * 60,
+    },
+    # Импорты сотрудников, брошенные упавшими воркерами (apps.members.tasks)
+    'members-requeue-stale-imports': {
+        'task': 'apps.members.tasks.requeue_stale_member_imports',
+        'schedule': 10 * 60,
+    },
+}
+
+# Общий кэш (данные виджетов дашборда): Redis, если задан REDIS_URL, иначе память процесса
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'union_portal',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Канальный слой WebSocket (результаты голосований): Redis, если задан REDIS_URL, иначе память процесса
+if os.environ.get('REDIS_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+                'capacity': 1500,
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Процент членского взноса от заработной платы по умолчанию (apps.finance.accrual)
+MEMBERSHIP_FEE_DEFAULT_RATE = '1.00'
+
+# Шаблон протокола собрания (DOCX с подстановками, apps.protocols.documents);
+# по умолчанию используется встроенный шаблон
+# PROTOCOLS_DOCX_TEMPLATE = BASE_DIR / 'templates' / 'protocols' / 'protocol.docx'
+
+# Прием голосов: пакетная запись бюллетеней (apps.voting.ingestion)
+VOTE_INGESTION = {
+    'BATCHING': os.environ.get('VOTE_INGESTION_BATCHING', 'False').lower() == 'true',
+    'MAX_BATCH': 200,
+    'MAX_DELAY': 0.05,
+}
 
 # OTP settings
 OTP_TOTP_ISSUER = 'Union Portal'
\ No newline at end of file